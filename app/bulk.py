@@ -0,0 +1,158 @@
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Type
+import json
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Base
+from app.embeddings import embed_written_rows
+from app.revisions import bump_vocabulary_revisions
+from app.schemas import BulkImportResponse
+from app.search import ensure_language_indexed
+from app.vocab_cache import invalidate_vocabulary
+
+BULK_CHUNK_SIZE: int = 1000
+NDJSON_CONTENT_TYPES: tuple[str, ...] = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def iter_request_items(request: Request) -> AsyncIterator[Any]:
+    """
+    Yield the items of a bulk request body.
+
+    NDJSON bodies are parsed line by line as they arrive; anything else must be a
+    JSON array.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_CONTENT_TYPES:
+        buffer = b""
+        line_number = 0
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    yield _decode_line(line, line_number)
+        if buffer.strip():
+            yield _decode_line(buffer, line_number + 1)
+        return
+
+    try:
+        data = json.loads(await request.body())
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {exc.msg}")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or an NDJSON body")
+    for item in data:
+        yield item
+
+
+def _decode_line(line: bytes, line_number: int) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_number}: {exc.msg}")
+
+
+async def _aiter(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+async def write_chunk(
+    db: AsyncSession,
+    model: Type[Base],
+    key: str,
+    rows: List[Dict[str, Any]],
+    upsert: bool
+) -> int:
+    """
+    Insert one chunk of rows with a single executemany statement.
+
+    Rows whose (language, key) pair already exists are updated when `upsert` is
+    set and skipped otherwise.
+
+    Returns:
+        Number of rows inserted or updated
+    """
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(model)
+    if upsert:
+        updates = {name: stmt.excluded[name] for name in rows[0] if name not in ("language", key)}
+        # Columns rendered from the row, like its prompt line, are rewritten along with it
+        updates.update({
+            column.name: stmt.excluded[column.name]
+            for column in inspect(model).columns if column.info.get("derived")
+        })
+        stmt = stmt.on_conflict_do_update(index_elements=["language", key], set_=updates)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["language", key])
+    # Execute on the connection so this stays a plain Core executemany
+    connection = await db.connection()
+    result = await connection.execute(stmt, rows)
+    return result.rowcount if result.rowcount >= 0 else len(rows)
+
+
+async def import_rows(
+    db: AsyncSession,
+    items: AsyncIterable[Any] | Iterable[Any],
+    schema: Type[BaseModel],
+    model: Type[Base],
+    key: str,
+    upsert: bool = False,
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> BulkImportResponse:
+    """
+    Validate and write rows in chunks, committing each chunk in its own transaction.
+
+    A validation error stops the import with a 422 naming the failing item. Chunks
+    written before it stay committed, so the import can resume from that index.
+
+    Args:
+        db: Database session
+        items: Raw items to import (dicts matching `schema`)
+        schema: Pydantic model used to validate each item
+        model: ORM model whose table receives the rows
+        key: Name of the column that, with the language, detects existing rows
+        upsert: Update existing rows instead of skipping them
+        chunk_size: Number of rows per statement and transaction
+
+    Returns:
+        BulkImportResponse with received, written and batch counts
+    """
+    adapter: TypeAdapter[List[BaseModel]] = TypeAdapter(List[schema])  # type: ignore[valid-type]
+    source = items if isinstance(items, AsyncIterable) else _aiter(items)
+    response = BulkImportResponse(received=0, written=0, batches=0)
+
+    async def flush(chunk: List[Any]) -> None:
+        try:
+            validated = adapter.validate_python(chunk)
+        except ValidationError as exc:
+            raise RequestValidationError([
+                {**error, "loc": ("body", response.received + int(error["loc"][0]), *error["loc"][1:])}
+                for error in exc.errors(include_url=False)
+            ])
+        rows = [row.model_dump() for row in validated]
+        languages = {row["language"] for row in rows}
+        for language in languages:
+            await ensure_language_indexed(db, language)
+        response.written += await write_chunk(db, model, key, rows, upsert)
+        names = await bump_vocabulary_revisions(db, model.__tablename__, languages)
+        await db.commit()
+        await invalidate_vocabulary(names)
+        embed_written_rows(db, model.__tablename__, languages, [row[key] for row in rows] if upsert else None)
+        response.received += len(chunk)
+        response.batches += 1
+
+    chunk: List[Any] = []
+    async for item in source:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            await flush(chunk)
+            chunk = []
+    if chunk:
+        await flush(chunk)
+    return response
@@ -1,9 +1,101 @@
+from typing import Literal
+import os
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Settings are read from .env, then from .env.<APP_ENV> (e.g. .env.production) if it exists
+APP_ENV: str = os.getenv("APP_ENV", "development")
+
 class Settings(BaseSettings):
-    openai_api_key: str
+    # Only needed by the OpenAI generator and embeddings, so the app starts without one
+    openai_api_key: str | None = None
     database_url: str = "sqlite+aiosqlite:///./app.db"
     
-    model_config = SettingsConfigDict(env_file=".env")
+    # Database engine
+    db_echo: bool = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_pre_ping: bool = True
+    db_pool_recycle_seconds: int = 1800
+    sqlite_journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"] = "WAL"
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_mmap_size: int = 268_435_456
+    sqlite_busy_timeout_ms: int = 5000
+    
+    # Question cache
+    question_cache_backend: Literal["memory", "database", "shared", "none"] = "memory"
+    question_cache_ttl_seconds: int = 3600
+    question_cache_max_entries: int = 1024
+    
+    # Vocabulary read cache
+    vocab_cache_max_entries: int = 4096
+    vocab_cache_max_rows: int = 100_000
+    vocab_cache_ttl_seconds: float = 30.0
+    
+    # Embeddings for similarity and distractors
+    embedding_backend: Literal["hashing", "openai", "none"] = "hashing"
+    embedding_model: str = "text-embedding-3-small"
+    embedding_dimensions: int = 128
+    embedding_dir: str = "./embeddings"
+    
+    # Prompt context selection
+    prompt_token_budget: int = 3000
+    prompt_max_words: int = 300
+    prompt_max_grammar: int = 60
+    prompt_strata: int = 8
+    prompt_grammar_share: float = 0.35
+    
+    # Question generators
+    question_generator: Literal["openai", "local", "template"] = "openai"
+    question_generator_fallback: Literal["template", "none"] = "none"
+    local_llm_base_url: str | None = None
+    local_llm_model: str = "llama3.1"
+    local_llm_api_key: str = "local"
+    openai_structured_outputs: bool = True
+    local_llm_structured_outputs: bool = False
+    generation_max_topups: int = 1
+    
+    # Model API client
+    openai_base_url: str | None = None
+    llm_timeout_seconds: float = 30.0
+    llm_max_retries: int = 3
+    llm_backoff_base_seconds: float = 0.5
+    llm_backoff_max_seconds: float = 8.0
+    llm_max_concurrency: int = 8
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 200_000
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+    
+    # Fan-out of large generation requests
+    generation_shard_size: int = 5
+    generation_max_concurrency: int = 4
+    generation_shard_retries: int = 2
+    
+    # Observability
+    metrics_enabled: bool = True
+    otel_enabled: bool = False
+    
+    # Pre-generated question pool
+    question_pool_enabled: bool = True
+    question_pool_low_watermark: int = 20
+    question_pool_target_size: int = 50
+    question_pool_languages: list[str] = ["vi"]
+    question_pool_refill_interval_seconds: float = 30.0
+    
+    # Shared store coordinating the workers of a deployment
+    shared_store_backend: Literal["redis", "memory", "none"] = "none"
+    shared_store_url: str = "redis://localhost:6379/0"
+    shared_store_prefix: str = "langapp:"
+    shared_store_poll_interval_seconds: float = 0.05
+    
+    # Quiz sessions
+    quiz_session_ttl_seconds: int = 7200
+    quiz_session_cache_max_entries: int = 10_000
+    quiz_answer_flush_interval_seconds: float = 1.0
+    quiz_answer_flush_batch_size: int = 500
+    quiz_answer_buffer_max_entries: int = 100_000
+    
+    model_config = SettingsConfigDict(env_file=(".env", f".env.{APP_ENV}"))
 
-settings = Settings()  # type: ignore[call-arg]
\ No newline at end of file
+settings = Settings()
\ No newline at end of file
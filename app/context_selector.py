@@ -0,0 +1,256 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from dataclasses import dataclass, field
+import math
+import random
+from sqlalchemy import func, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from app.config import settings
+from app.languages import DEFAULT_LANGUAGE, partition
+from app.models import Word, Grammar
+from app.prompt_lines import grammar_line, word_line
+from app.vocab_cache import vocab_cache
+from app.scheduler import fetch_due
+
+WORD_PROMPT_COLUMNS: Sequence[InstrumentedAttribute[Any]] = (
+    Word.id,
+    Word.vietnamese_word,
+    Word.english_definition,
+    Word.prompt_line,
+)
+
+GRAMMAR_PROMPT_COLUMNS: Sequence[InstrumentedAttribute[Any]] = (
+    Grammar.id,
+    Grammar.grammar_point,
+    Grammar.english_explanation,
+    Grammar.example_sentence,
+    Grammar.prompt_line,
+)
+
+
+@dataclass
+class PromptContext:
+    """The words and grammar points chosen for one prompt."""
+    words: List[Dict[str, str]] = field(default_factory=list)
+    grammar: List[Dict[str, Optional[str]]] = field(default_factory=list)
+    word_ids: List[int] = field(default_factory=list)
+    grammar_ids: List[int] = field(default_factory=list)
+    estimated_tokens: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.words and not self.grammar
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of a prompt fragment (about 4 characters per token)."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+async def sample_rows(
+    db: AsyncSession,
+    columns: Sequence[InstrumentedAttribute[Any]],
+    max_rows: int,
+    strata: int,
+    rng: random.Random,
+    language: str = DEFAULT_LANGUAGE
+) -> List[Dict[str, Any]]:
+    """
+    Sample up to `max_rows` rows of one language spread evenly across its id range.
+
+    The id range is split into equal strata and each stratum contributes a run of
+    consecutive rows starting at a random id inside it, so every query is a
+    (language, id) index range seek and the whole sample is fetched in one round
+    trip. Languages whose id span fits in `max_rows` are returned whole, in id
+    order.
+
+    Args:
+        db: Database session
+        columns: Projected columns, id column first
+        max_rows: Maximum number of rows to return
+        strata: Number of id ranges to sample from
+        rng: Seeded random source, so a seed always selects the same rows
+        language: Language code of the rows
+
+    Returns:
+        List of row dictionaries, interleaved across strata
+    """
+    id_column = columns[0]
+    model = id_column.class_
+    table = partition(model.__tablename__, language)
+    in_language = model.language == language
+    column_names = tuple(column.key for column in columns)
+
+    async def load_bounds() -> Any:
+        # Separate min and max subqueries, so each is a single seek into the (language, id) index
+        low = select(func.min(id_column)).where(in_language).scalar_subquery()
+        high = select(func.max(id_column)).where(in_language).scalar_subquery()
+        return tuple((await db.execute(select(low, high))).one())
+
+    low, high = await vocab_cache.get_or_load(table, ("bounds",), load_bounds)
+    if low is None:
+        return []
+
+    async def load_rows(stmt: Any) -> List[Dict[str, Any]]:
+        result = await db.execute(stmt)
+        return [dict(row) for row in result.mappings()]
+
+    span = high - low + 1
+    if span <= max_rows:
+        return await vocab_cache.get_or_load(
+            table, ("all", column_names),
+            lambda: load_rows(select(*columns).where(in_language).order_by(id_column))
+        )
+
+    strata = max(1, min(strata, max_rows))
+    per_stratum = math.ceil(max_rows / strata)
+    width = span / strata
+    offsets = []
+    for i in range(strata):
+        start = low + int(i * width)
+        end = low + int((i + 1) * width) - 1
+        offsets.append(rng.randint(start, max(start, end - per_stratum + 1)))
+    queries = [
+        select(*columns)
+        .where(in_language, id_column >= offset)
+        .order_by(id_column)
+        .limit(per_stratum)
+        .subquery()
+        .select()
+        for offset in offsets
+    ]
+    sampled = await vocab_cache.get_or_load(
+        table, ("sample", column_names, tuple(offsets), per_stratum),
+        lambda: load_rows(union_all(*queries))
+    )
+
+    # Interleave strata so a budget cut keeps the sample spread across the table
+    buckets: List[List[Dict[str, Any]]] = [[] for _ in range(strata)]
+    for row in sampled:
+        buckets[min(strata - 1, int((row["id"] - low) / width))].append(row)
+    seen: set[int] = set()
+    rows: List[Dict[str, Any]] = []
+    for position in range(per_stratum):
+        for bucket in buckets:
+            if position < len(bucket) and bucket[position]["id"] not in seen:
+                seen.add(bucket[position]["id"])
+                rows.append(bucket[position])
+    return rows[:max_rows]
+
+
+def _fit_budget(
+    rows: List[Dict[str, Any]],
+    line: Callable[[Dict[str, Any]], str],
+    budget: int
+) -> tuple[List[Dict[str, Any]], int]:
+    """Keep rows in order until their prompt lines would exceed the token budget."""
+    kept: List[Dict[str, Any]] = []
+    used = 0
+    for row in rows:
+        cost = estimate_tokens(line(row))
+        if used + cost > budget:
+            break
+        kept.append(row)
+        used += cost
+    return kept, used
+
+
+async def select_context(
+    db: AsyncSession,
+    token_budget: Optional[int] = None,
+    seed: Optional[int] = None,
+    language: str = DEFAULT_LANGUAGE
+) -> PromptContext:
+    """
+    Pick a bounded, stratified sample of one language's words and grammar that fits a token budget.
+
+    Args:
+        db: Database session
+        token_budget: Tokens available for vocabulary lines (defaults to settings)
+        seed: Optional seed making the selection reproducible
+        language: Language code of the vocabulary
+
+    Returns:
+        PromptContext with the chosen rows and their estimated token cost
+    """
+    budget = token_budget if token_budget is not None else settings.prompt_token_budget
+    rng = random.Random(seed)
+
+    grammar_rows = await sample_rows(
+        db, GRAMMAR_PROMPT_COLUMNS, settings.prompt_max_grammar, settings.prompt_strata, rng, language
+    )
+    grammar_rows, grammar_tokens = _fit_budget(
+        grammar_rows, grammar_line, int(budget * settings.prompt_grammar_share)
+    )
+
+    # Words get whatever the grammar did not use
+    word_rows = await sample_rows(
+        db, WORD_PROMPT_COLUMNS, settings.prompt_max_words, settings.prompt_strata, rng, language
+    )
+    word_rows, word_tokens = _fit_budget(word_rows, word_line, budget - grammar_tokens)
+
+    return _build_context(word_rows, grammar_rows, word_tokens + grammar_tokens)
+
+
+async def select_due_context(
+    db: AsyncSession,
+    user_id: str,
+    token_budget: Optional[int] = None,
+    language: str = DEFAULT_LANGUAGE
+) -> PromptContext:
+    """
+    Pick the learner's most overdue words and grammar in one language that fit a token budget.
+
+    Args:
+        db: Database session
+        user_id: The learner whose due items are used
+        token_budget: Tokens available for vocabulary lines (defaults to settings)
+        language: Language code of the vocabulary
+
+    Returns:
+        PromptContext with the chosen rows, empty if nothing is due
+    """
+    budget = token_budget if token_budget is not None else settings.prompt_token_budget
+
+    grammar_rows = await fetch_due(
+        db, "grammar", GRAMMAR_PROMPT_COLUMNS, user_id, settings.prompt_max_grammar, language=language
+    )
+    grammar_rows, grammar_tokens = _fit_budget(
+        grammar_rows, grammar_line, int(budget * settings.prompt_grammar_share)
+    )
+    word_rows = await fetch_due(
+        db, "words", WORD_PROMPT_COLUMNS, user_id, settings.prompt_max_words, language=language
+    )
+    word_rows, word_tokens = _fit_budget(word_rows, word_line, budget - grammar_tokens)
+
+    return _build_context(word_rows, grammar_rows, word_tokens + grammar_tokens)
+
+
+def _build_context(
+    word_rows: List[Dict[str, Any]],
+    grammar_rows: List[Dict[str, Any]],
+    estimated_tokens: int
+) -> PromptContext:
+    """Shape selected rows into the dictionaries the prompt builder expects."""
+    return PromptContext(
+        words=[
+            {
+                "vietnamese_word": w["vietnamese_word"],
+                "english_definition": w["english_definition"],
+                "prompt_line": word_line(w)
+            }
+            for w in word_rows
+        ],
+        grammar=[
+            {
+                "grammar_point": g["grammar_point"],
+                "english_explanation": g["english_explanation"],
+                "example_sentence": g["example_sentence"],
+                "prompt_line": grammar_line(g)
+            }
+            for g in grammar_rows
+        ],
+        word_ids=[w["id"] for w in word_rows],
+        grammar_ids=[g["id"] for g in grammar_rows],
+        estimated_tokens=estimated_tokens,
+    )
@@ -1,9 +1,61 @@
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from typing import Any, AsyncGenerator, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from app.config import settings
+from app.config import settings, Settings
 
-engine = create_async_engine(settings.database_url, echo=True)
+def normalize_database_url(database_url: str) -> URL:
+    """Parse a database URL, choosing the async driver for plain Postgres URLs."""
+    url = make_url(database_url)
+    if url.drivername in ("postgres", "postgresql"):
+        url = url.set(drivername="postgresql+asyncpg")
+    return url
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def create_engine_from_settings(config: Settings) -> AsyncEngine:
+    """
+    Create the async engine described by the settings.
+    
+    File-backed SQLite and server databases get a bounded connection pool.
+    SQLite connections are switched to the configured journal mode (WAL by
+    default), synchronous level and mmap size as they are opened.
+    """
+    url = normalize_database_url(config.database_url)
+    options: Dict[str, Any] = {"echo": config.db_echo}
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout_seconds,
+            pool_pre_ping=config.db_pool_pre_ping,
+            pool_recycle=config.db_pool_recycle_seconds,
+        )
+    new_engine = create_async_engine(url, **options)
+    
+    if url.get_backend_name() == "sqlite":
+        pragmas = [
+            f"PRAGMA busy_timeout={config.sqlite_busy_timeout_ms}",
+            f"PRAGMA synchronous={config.sqlite_synchronous}",
+        ]
+        if not _is_memory_sqlite(url):
+            pragmas += [
+                f"PRAGMA journal_mode={config.sqlite_journal_mode}",
+                f"PRAGMA mmap_size={config.sqlite_mmap_size}",
+            ]
+        
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def apply_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+    
+    return new_engine
+
+engine = create_engine_from_settings(settings)
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 class Base(DeclarativeBase):
@@ -14,7 +66,6 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
 
-async def init_db() -> None:
-    """Initialize database tables."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+def get_session_maker() -> async_sessionmaker[AsyncSession]:
+    """Dependency for work that needs sessions of its own, apart from the request's."""
+    return async_session_maker
@@ -1,6 +1,14 @@
+from typing import Any, Iterable, Iterator
+import argparse
 import asyncio
-from app.database import async_session_maker, init_db
+import json
+from app.bulk import import_rows
+from app.database import async_session_maker
+from app.embeddings import wait_for_embeddings
+from app.migrations import init_db
 from app.models import Word, Grammar
+from app.schemas import WordCreate, GrammarCreate
+import app.search  # noqa: F401  (registers the search index with the metadata)
 
 # Words data
 WORDS = [
@@ -221,25 +229,45 @@ GRAMMAR = [
 ]
 
 
-async def seed_database() -> None:
-    """Seed the database with initial words and grammar."""
+def load_items(path: str) -> Iterator[Any]:
+    """Read vocabulary items from a JSON array file, or an NDJSON file (.ndjson/.jsonl)."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+async def seed_database(
+    words: Iterable[Any] = WORDS,
+    grammar: Iterable[Any] = GRAMMAR
+) -> None:
+    """Seed the database with words and grammar, updating entries that already exist."""
     print("Initializing database...")
     await init_db()
     
     async with async_session_maker() as session:
-        print(f"Adding {len(WORDS)} words...")
-        for word_data in WORDS:
-            word = Word(**word_data)
-            session.add(word)
+        print("Adding words...")
+        result = await import_rows(session, words, WordCreate, Word, "vietnamese_word", upsert=True)
+        print(f"  {result.received} words in {result.batches} batches")
         
-        print(f"Adding {len(GRAMMAR)} grammar points...")
-        for grammar_data in GRAMMAR:
-            grammar = Grammar(**grammar_data)
-            session.add(grammar)
+        print("Adding grammar points...")
+        result = await import_rows(session, grammar, GrammarCreate, Grammar, "grammar_point", upsert=True)
+        print(f"  {result.received} grammar points in {result.batches} batches")
         
-        await session.commit()
+        print("Embedding...")
+        await wait_for_embeddings()
         print("✅ Database seeded successfully!")
 
 
 if __name__ == "__main__":
-    asyncio.run(seed_database())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the vocabulary database.")
+    parser.add_argument("--words", help="JSON or NDJSON file of words (defaults to the built-in list)")
+    parser.add_argument("--grammar", help="JSON or NDJSON file of grammar points (defaults to the built-in list)")
+    args = parser.parse_args()
+    asyncio.run(seed_database(
+        words=load_items(args.words) if args.words else WORDS,
+        grammar=load_items(args.grammar) if args.grammar else GRAMMAR,
+    ))
@@ -0,0 +1,716 @@
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Protocol, Sequence, Set, Tuple
+)
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+import asyncio
+import json
+import logging
+import os
+import re
+import unicodedata
+import zlib
+import numpy as np
+import numpy.typing as npt
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import InstrumentedAttribute
+from app.config import settings
+from app.languages import stored_languages
+from app.models import Word, Grammar
+from app.openai_service import get_openai_client
+from app.shared_store import SharedStore, hold_lock, lock_held, shared_store
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+Matrix = npt.NDArray[np.float32]
+Ids = npt.NDArray[np.int64]
+
+# Id, term and meaning columns of each embedded table
+EMBEDDED_COLUMNS: Dict[str, Tuple[InstrumentedAttribute[Any], ...]] = {
+    "words": (Word.id, Word.vietnamese_word, Word.english_definition),
+    "grammar": (Grammar.id, Grammar.grammar_point, Grammar.english_explanation),
+}
+EMBEDDING_BATCH_SIZE: int = 1000
+# Ids below a store's newest that are checked again after each write, for rows that committed late
+LATE_ROW_WINDOW: int = 10_000
+# A worker embedding one batch holds its store's lock; it expires in case the worker dies mid-batch
+EMBEDDING_LOCK_TTL_SECONDS: float = 120.0
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def embedding_text(term: str, meaning: str) -> str:
+    """The text embedded for a row: its meaning first, then the term itself."""
+    return f"{meaning} ({term})"
+
+
+def normalize_rows(matrix: Matrix) -> Matrix:
+    """Scale every row to unit length, leaving all-zero rows as they are."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    normalized: Matrix = (matrix / norms).astype(np.float32, copy=False)
+    return normalized
+
+
+class Embedder(Protocol):
+    """Turns texts into unit vectors of a fixed size."""
+
+    dimensions: int
+    # Identifies the vector space; stores built by a different embedder are discarded
+    signature: str
+
+    async def embed(self, texts: Sequence[str]) -> Matrix:
+        """Embed texts as the rows of a (len(texts), dimensions) matrix."""
+        ...
+
+
+class HashingEmbedder:
+    """
+    Deterministic, offline embeddings from hashed word and character trigram features.
+
+    Texts that share words or word fragments get nearby vectors, which is enough
+    to find related meanings and look-alike terms without a model. Features are
+    hashed with crc32 rather than hash(), whose seed changes per process, because
+    the vectors outlive the process on disk.
+    """
+
+    def __init__(self, dimensions: int) -> None:
+        self.dimensions = dimensions
+        self.signature = f"hashing-v1-{dimensions}"
+
+    async def embed(self, texts: Sequence[str]) -> Matrix:
+        # Hashing a batch is CPU work, so it runs off the event loop
+        return await asyncio.to_thread(self.embed_sync, texts)
+
+    def embed_sync(self, texts: Sequence[str]) -> Matrix:
+        """Embed texts without awaiting; hashing never does I/O."""
+        rows: List[int] = []
+        columns: List[int] = []
+        values: List[float] = []
+        for row, text in enumerate(texts):
+            for feature, weight in _features(text):
+                digest = zlib.crc32(feature.encode())
+                rows.append(row)
+                columns.append(digest % self.dimensions)
+                # The top bit picks the sign, so colliding features tend to cancel out
+                values.append(weight if digest & 0x80000000 else -weight)
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(matrix, (rows, columns), values)
+        return normalize_rows(matrix)
+
+
+def _features(text: str) -> Iterable[Tuple[str, float]]:
+    """Whole words, plus the character trigrams of each word at half weight."""
+    folded = unicodedata.normalize("NFKD", text.lower().replace("đ", "d"))
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    for token in _TOKEN_PATTERN.findall(folded):
+        yield token, 1.0
+        padded = f"<{token}>"
+        for start in range(len(padded) - 2):
+            yield padded[start:start + 3], 0.5
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI embeddings API, shortened to the configured size."""
+
+    def __init__(self, openai_client: Callable[[], "AsyncOpenAI"], model: str, dimensions: int) -> None:
+        # Resolved per call, so the SDK client is only created once something is embedded
+        self.client = openai_client
+        self.model = model
+        self.dimensions = dimensions
+        self.signature = f"openai-{model}-{dimensions}"
+
+    async def embed(self, texts: Sequence[str]) -> Matrix:
+        response = await self.client().embeddings.create(
+            model=self.model,
+            input=list(texts),
+            dimensions=self.dimensions,
+            timeout=settings.llm_timeout_seconds
+        )
+        return normalize_rows(np.array([item.embedding for item in response.data], dtype=np.float32))
+
+
+class VectorStore:
+    """
+    Unit vectors of one table's rows in one language, memory-mapped from disk.
+
+    Rows are appended in id order, so the ids stay sorted and a row is found by
+    binary search. A row that commits after a newer one is appended late by
+    `insert`; lookups then go through a sorted copy of the ids. The files grow
+    in doubling steps, and the row count in the metadata file only advances
+    once the vectors are written, so a crash mid-append loses that append and
+    nothing else. Other processes sharing the files see new rows after
+    `reload`. Writes are left to the OS to sync: the store is derived data and
+    is rebuilt if it ever disagrees with the database.
+    """
+
+    def __init__(self, prefix: Path, dimensions: int, signature: str) -> None:
+        self.dimensions = dimensions
+        self.signature = signature
+        self._vectors_path = prefix.with_name(prefix.name + ".vectors")
+        self._ids_path = prefix.with_name(prefix.name + ".ids")
+        self._meta_path = prefix.with_name(prefix.name + ".json")
+        self._vectors: Optional[np.memmap[Any, np.dtype[np.float32]]] = None
+        self._ids: Optional[np.memmap[Any, np.dtype[np.int64]]] = None
+        # Sorted ids and their row positions, once rows are stored out of id order
+        self._order: Optional[Tuple[Ids, Ids]] = None
+        self._max_id = 0
+        # Inode and size of the ids file when it was mapped, to notice another process growing or replacing it
+        self._mapped: Optional[Tuple[int, int]] = None
+        self.count = 0
+
+        count = self._stored_count()
+        if count is None:
+            self.clear()
+        else:
+            self.count = count
+            self._map()
+            self._index()
+
+    def _stored_count(self) -> Optional[int]:
+        """Row count in the metadata file, or None if it was written for another embedder."""
+        meta: Dict[str, Any] = {}
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text())
+        if meta.get("signature") == self.signature and meta.get("dimensions") == self.dimensions:
+            return int(meta["count"])
+        return None
+
+    def reload(self) -> None:
+        """Pick up rows that another process has stored since this one last looked."""
+        # Written by another embedder: this store starts over from its next write
+        count = self._stored_count() or 0
+        stat = self._ids_path.stat() if self._ids_path.exists() else None
+        remap = (stat.st_ino, stat.st_size) != self._mapped if stat else self._mapped is not None
+        if remap:
+            self._map()
+        if remap or count != self.count:
+            self.count = count
+            self._index()
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._ids is None else len(self._ids)
+
+    @property
+    def ids(self) -> Ids:
+        """Ids of the stored rows, in the order they were stored."""
+        if self._ids is None:
+            return np.empty(0, dtype=np.int64)
+        return np.asarray(self._ids[:self.count])
+
+    @property
+    def max_id(self) -> int:
+        """Id of the newest stored row, or 0 when empty."""
+        return self._max_id
+
+    def _index(self) -> None:
+        """Recompute the newest id, and the sorted lookup if rows were stored out of id order."""
+        stored = self.ids
+        self._max_id = int(stored.max()) if len(stored) else 0
+        if len(stored) > 1 and not (np.diff(stored) > 0).all():
+            order = np.argsort(stored, kind="stable")
+            self._order = (stored[order], order)
+        else:
+            self._order = None
+
+    def _map(self) -> None:
+        """Memory-map the files at their current size."""
+        self._vectors = self._ids = None
+        self._mapped = None
+        if not self._ids_path.exists():
+            return
+        stat = self._ids_path.stat()
+        capacity = stat.st_size // 8
+        if capacity:
+            self._mapped = (stat.st_ino, stat.st_size)
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimensions)
+            )
+            self._ids = np.memmap(self._ids_path, dtype=np.int64, mode="r+", shape=(capacity,))
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the files so `rows` more rows fit."""
+        if self.count + rows <= self.capacity:
+            return
+        capacity = max(self.count + rows, 2 * self.capacity, 1024)
+        self.flush()
+        self._vectors = self._ids = None
+        for path, row_bytes in ((self._vectors_path, 4 * self.dimensions), (self._ids_path, 8)):
+            path.touch()
+            os.truncate(path, capacity * row_bytes)
+        self._map()
+
+    def _save_meta(self) -> None:
+        staged = self._meta_path.with_name(self._meta_path.name + ".tmp")
+        staged.write_text(json.dumps(
+            {"signature": self.signature, "dimensions": self.dimensions, "count": self.count}
+        ))
+        os.replace(staged, self._meta_path)
+
+    def flush(self) -> None:
+        if self._vectors is not None and self._ids is not None:
+            self._vectors.flush()
+            self._ids.flush()
+
+    def clear(self) -> None:
+        """Drop every stored vector and truncate the files."""
+        self._vectors = self._ids = None
+        self._mapped = None
+        for path in (self._vectors_path, self._ids_path):
+            path.unlink(missing_ok=True)
+        self.count = 0
+        self._index()
+        self._save_meta()
+
+    def append(self, ids: Ids, vectors: Matrix) -> None:
+        """Store vectors for rows newer than every stored row, in ascending id order."""
+        if not len(ids):
+            return
+        if ids[0] <= self.max_id:
+            raise ValueError("Appended ids must be greater than every stored id")
+        self._write(ids, vectors)
+        self._max_id = int(ids[-1])
+
+    def insert(self, ids: Ids, vectors: Matrix) -> None:
+        """Store vectors for rows that are not stored yet, whatever their ids."""
+        if not len(ids):
+            return
+        if (self.positions(ids) >= 0).any():
+            raise ValueError("Inserted ids must not be stored already")
+        self._write(ids, vectors)
+        self._index()
+
+    def _write(self, ids: Ids, vectors: Matrix) -> None:
+        self._reserve(len(ids))
+        assert self._vectors is not None and self._ids is not None
+        self._vectors[self.count:self.count + len(ids)] = vectors
+        self._ids[self.count:self.count + len(ids)] = ids
+        self.count += len(ids)
+        self._save_meta()
+
+    def positions(self, ids: Sequence[int] | Ids) -> Ids:
+        """Row positions of ids, -1 for ids that are not stored."""
+        stored, order = self._order or (self.ids, None)
+        wanted = np.asarray(ids, dtype=np.int64)
+        if not len(stored):
+            return np.full(len(wanted), -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(stored, wanted), len(stored) - 1)
+        return np.where(stored[found] == wanted, found if order is None else order[found], -1)
+
+    def update(self, ids: Ids, vectors: Matrix) -> None:
+        """Overwrite the vectors of stored rows; ids that are not stored are ignored."""
+        positions = self.positions(ids)
+        present = positions >= 0
+        if self._vectors is None or not present.any():
+            return
+        self._vectors[positions[present]] = vectors[present]
+
+    def vectors(self, ids: Sequence[int]) -> Matrix:
+        """Vectors of the given ids in order, all zeros for ids that are not stored."""
+        positions = self.positions(ids)
+        matrix = np.zeros((len(positions), self.dimensions), dtype=np.float32)
+        present = positions >= 0
+        if self._vectors is not None and present.any():
+            matrix[present] = self._vectors[positions[present]]
+        return matrix
+
+    def top_k(self, vector: Matrix, k: int, exclude: Sequence[int] = ()) -> Tuple[Ids, Matrix]:
+        """
+        Find the stored rows most similar to a unit vector.
+
+        One matrix-vector product scores every row by cosine similarity, and
+        argpartition picks the best `k` without sorting the rest.
+
+        Returns:
+            Ids and similarities of up to `k` rows, most similar first
+        """
+        if self._vectors is None or not self.count or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self._vectors[:self.count] @ vector
+        excluded = self.positions(exclude)
+        scores[excluded[excluded >= 0]] = -np.inf
+        k = min(k, self.count)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        best = best[np.isfinite(scores[best])]
+        return self.ids[best], scores[best]
+
+
+@dataclass
+class Neighbours:
+    """For each word and grammar point of a prompt context, the indices of the others closest to it."""
+    words: List[List[int]] = field(default_factory=list)
+    grammar: List[List[int]] = field(default_factory=list)
+
+
+def rank_neighbours(vectors: Matrix, count: int) -> List[List[int]]:
+    """
+    Rank a small set of unit vectors against each other.
+
+    Returns:
+        For each row, the indices of up to `count` other rows, most similar first;
+        rows without a vector have no neighbours and are nobody's neighbour
+    """
+    missing: npt.NDArray[np.bool_] = ~np.asarray(vectors.any(axis=1))
+    scores = vectors @ vectors.T
+    np.fill_diagonal(scores, -np.inf)
+    scores[:, missing] = -np.inf
+    ranked: List[List[int]] = []
+    for row, order in enumerate(np.argsort(-scores, axis=1, kind="stable")[:, :count]):
+        ranked.append([] if missing[row] else [int(i) for i in order if np.isfinite(scores[row, i])])
+    return ranked
+
+
+class EmbeddingIndex:
+    """
+    Vector stores for every embedded table and language, kept in step with the database.
+
+    New rows are embedded once, after the write that created them commits, by
+    catching each store up to the newest id of its language. Reads never
+    embed or write. Where ids can commit out of order (PostgreSQL
+    sequences), rows below the newest id are found by `fill_gaps`.
+
+    Every worker of a deployment maps the same files. With a shared store,
+    writes to a store hold its lock there, one batch at a time, and start by
+    re-reading the files, so workers append after each other's rows instead
+    of over them. Without one, workers must not share an `EMBEDDING_DIR`.
+    """
+
+    def __init__(self, directory: Path, embedder: Embedder, shared: Optional[SharedStore] = None) -> None:
+        self.directory = directory
+        self.embedder = embedder
+        self.shared = shared
+        self._stores: Dict[Tuple[str, str], VectorStore] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    def store(self, table: str, language: str) -> VectorStore:
+        """The store of one table and language, opened on first use."""
+        key = (table, language)
+        if key not in self._stores:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._stores[key] = VectorStore(
+                self.directory / f"{table}-{language}", self.embedder.dimensions, self.embedder.signature
+            )
+        return self._stores[key]
+
+    def reset(self, directory: Optional[Path] = None) -> None:
+        """Close every store, optionally moving to another directory; files stay on disk."""
+        for store in self._stores.values():
+            store.flush()
+        self._stores.clear()
+        self._locks.clear()
+        if directory is not None:
+            self.directory = directory
+
+    def _lock(self, table: str, language: str) -> asyncio.Lock:
+        return self._locks.setdefault((table, language), asyncio.Lock())
+
+    @asynccontextmanager
+    async def _writing(self, table: str, language: str, wait: bool = True) -> AsyncIterator[Optional[VectorStore]]:
+        """
+        Hold a store's lock across workers and yield the store, re-read from disk.
+
+        Yields None when another worker holds the lock and `wait` is not set.
+        """
+        name = f"embeddings:{table}:{language}"
+        while True:
+            async with hold_lock(self.shared, name, EMBEDDING_LOCK_TTL_SECONDS) as acquired:
+                if acquired:
+                    store = self.store(table, language)
+                    store.reload()
+                    yield store
+                    return
+            if not wait:
+                yield None
+                return
+            assert self.shared is not None
+            while await lock_held(self.shared, name):
+                await asyncio.sleep(settings.shared_store_poll_interval_seconds)
+
+    async def catch_up(
+        self,
+        db: AsyncSession,
+        table: str,
+        language: str,
+        max_rows: Optional[int] = None,
+        wait: bool = True
+    ) -> int:
+        """
+        Embed the rows of one table and language that are newer than its store.
+
+        When a store is first opened it is checked against the table: one holding
+        ids beyond the table's newest was built from other data (a restored
+        database, or deleted rows), so it is rebuilt. After that each call is a
+        single keyset query for rows past the store's newest id.
+
+        Args:
+            db: Database session
+            table: Name of an embedded table
+            language: Language code of the rows
+            max_rows: Stop after embedding about this many rows
+            wait: Wait for a catch-up already running on the store instead of skipping
+
+        Returns:
+            Number of rows embedded
+        """
+        lock = self._lock(table, language)
+        if lock.locked() and not wait:
+            return 0
+        async with lock:
+            id_column, term_column, meaning_column = EMBEDDED_COLUMNS[table]
+            in_language = id_column.class_.language == language
+            opened = (table, language) in self._stores
+            if not opened and self.store(table, language).count:
+                newest = (await db.execute(select(func.max(id_column)).where(in_language))).scalar() or 0
+                async with self._writing(table, language) as store:
+                    assert store is not None
+                    if newest < store.max_id:
+                        logger.warning(
+                            "Rebuilding %s embeddings for '%s': the store is ahead of the table", table, language
+                        )
+                        store.clear()
+
+            added = 0
+            while max_rows is None or added < max_rows:
+                async with self._writing(table, language, wait) as store:
+                    if store is None:
+                        break
+                    result = await db.execute(
+                        select(id_column, term_column, meaning_column)
+                        .where(in_language, id_column > store.max_id)
+                        .order_by(id_column)
+                        .limit(EMBEDDING_BATCH_SIZE)
+                    )
+                    rows = result.all()
+                    if rows:
+                        vectors = await self.embedder.embed(
+                            [embedding_text(term, meaning) for _, term, meaning in rows]
+                        )
+                        store.append(np.array([row[0] for row in rows], dtype=np.int64), vectors)
+                        added += len(rows)
+                if len(rows) < EMBEDDING_BATCH_SIZE:
+                    break
+            return added
+
+    async def fill_gaps(self, db: AsyncSession, table: str, language: str, after_id: int = 0) -> int:
+        """
+        Embed rows of one table and language at or below the store's newest id that it lacks.
+
+        A row whose transaction commits after a newer row was embedded is passed
+        over by `catch_up`. This walks the ids past `after_id` in keyset batches
+        and embeds the ones the store does not hold.
+
+        Returns:
+            Number of rows embedded
+        """
+        id_column, term_column, meaning_column = EMBEDDED_COLUMNS[table]
+        in_language = id_column.class_.language == language
+        async with self._lock(table, language):
+            store = self.store(table, language)
+            store.reload()
+            newest = store.max_id
+            added = 0
+            while after_id < newest:
+                ids = (await db.execute(
+                    select(id_column)
+                    .where(in_language, id_column > after_id, id_column <= newest)
+                    .order_by(id_column)
+                    .limit(EMBEDDING_BATCH_SIZE)
+                )).scalars().all()
+                if not ids:
+                    break
+                after_id = ids[-1]
+                async with self._writing(table, language) as writable:
+                    assert writable is not None
+                    missing = [row_id for row_id, position in zip(ids, writable.positions(ids)) if position < 0]
+                    if missing:
+                        result = await db.execute(
+                            select(id_column, term_column, meaning_column)
+                            .where(id_column.in_(missing))
+                            .order_by(id_column)
+                        )
+                        rows = result.all()
+                        vectors = await self.embedder.embed(
+                            [embedding_text(term, meaning) for _, term, meaning in rows]
+                        )
+                        writable.insert(np.array([row[0] for row in rows], dtype=np.int64), vectors)
+                        added += len(rows)
+            return added
+
+    async def refresh(self, db: AsyncSession, table: str, language: str, terms: Sequence[str]) -> None:
+        """Re-embed stored rows whose text may have changed, found by their terms."""
+        id_column, term_column, meaning_column = EMBEDDED_COLUMNS[table]
+        async with self._lock(table, language):
+            for start in range(0, len(terms), EMBEDDING_BATCH_SIZE):
+                async with self._writing(table, language) as store:
+                    assert store is not None
+                    result = await db.execute(
+                        select(id_column, term_column, meaning_column).where(
+                            id_column.class_.language == language,
+                            term_column.in_(terms[start:start + EMBEDDING_BATCH_SIZE]),
+                            id_column <= store.max_id
+                        )
+                    )
+                    rows = result.all()
+                    if rows:
+                        vectors = await self.embedder.embed(
+                            [embedding_text(term, meaning) for _, term, meaning in rows]
+                        )
+                        store.update(np.array([row[0] for row in rows], dtype=np.int64), vectors)
+
+    def stored(self, table: str, language: str) -> int:
+        """Rows stored for one table and language, re-read from disk."""
+        store = self.store(table, language)
+        store.reload()
+        return store.count
+
+    async def similar(
+        self,
+        table: str,
+        language: str,
+        item_id: int,
+        limit: int
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the rows of a language closest in meaning to one of its rows.
+
+        Returns:
+            (id, cosine similarity) pairs, most similar first; empty if the row has
+            not been embedded yet
+        """
+        store = self.store(table, language)
+        # Rows may have been stored by a background task or another worker since the last read
+        store.reload()
+        vector = store.vectors([item_id])[0]
+        if not vector.any():
+            return []
+        # The scan releases the GIL, so other requests keep being served while it runs
+        ids, scores = await asyncio.to_thread(store.top_k, vector, limit, [item_id])
+        return list(zip(ids.tolist(), scores.tolist()))
+
+    def neighbours(
+        self,
+        language: str,
+        word_ids: Sequence[int],
+        grammar_ids: Sequence[int],
+        count: int
+    ) -> Neighbours:
+        """
+        Rank the words and grammar points of one prompt context against each other.
+
+        Only the context's own vectors are compared, so this costs one small
+        matrix product however large the vocabulary is.
+        """
+        ranked = Neighbours()
+        for table, ids in (("words", word_ids), ("grammar", grammar_ids)):
+            if not ids:
+                continue
+            store = self.store(table, language)
+            store.reload()
+            neighbours = rank_neighbours(store.vectors(ids), count)
+            if table == "words":
+                ranked.words = neighbours
+            else:
+                ranked.grammar = neighbours
+        return ranked
+
+
+def _create_index() -> Optional[EmbeddingIndex]:
+    """Build the configured embedding index, or None when embeddings are disabled."""
+    embedder: Embedder
+    if settings.embedding_backend == "none":
+        return None
+    if settings.embedding_backend == "openai":
+        embedder = OpenAIEmbedder(get_openai_client, settings.embedding_model, settings.embedding_dimensions)
+    else:
+        embedder = HashingEmbedder(settings.embedding_dimensions)
+    return EmbeddingIndex(Path(settings.embedding_dir), embedder, shared_store)
+
+
+embedding_index: Optional[EmbeddingIndex] = _create_index()
+
+
+def _commits_out_of_order(db: AsyncSession) -> bool:
+    """Whether a row can commit after a newer one; SQLite writers hold the write lock until they commit."""
+    return db.get_bind().dialect.name != "sqlite"
+
+
+# Background embedding tasks, referenced until they finish
+_embedding_tasks: Set[asyncio.Task[None]] = set()
+
+
+def embed_written_rows(
+    db: AsyncSession,
+    table: str,
+    languages: Iterable[str],
+    updated_terms: Optional[Sequence[str]] = None
+) -> None:
+    """
+    Embed rows just committed to a table, and re-embed rows an upsert may have changed.
+
+    The embedding runs as a task of its own, with its own session on the
+    writer's database, so the write's response never waits for the embedder.
+    The write has already succeeded, so a failure there is logged rather than
+    raised; the next catch-up embeds whatever was missed.
+    """
+    if embedding_index is None or db.bind is None:
+        return
+    index = embedding_index
+    languages = list(languages)
+    terms = list(updated_terms or ())
+    session_maker = async_sessionmaker(db.bind, class_=AsyncSession, expire_on_commit=False)
+
+    async def embed() -> None:
+        try:
+            async with session_maker() as session:
+                for language in languages:
+                    # Refresh first: it only touches rows the store already had, so new rows are embedded once
+                    if terms:
+                        await index.refresh(session, table, language, terms)
+                    await index.catch_up(session, table, language)
+                    if _commits_out_of_order(session):
+                        newest = index.store(table, language).max_id
+                        await index.fill_gaps(session, table, language, newest - LATE_ROW_WINDOW)
+        except Exception:
+            logger.warning("Could not embed new %s rows", table, exc_info=True)
+
+    task = asyncio.create_task(embed())
+    _embedding_tasks.add(task)
+    task.add_done_callback(_embedding_tasks.discard)
+
+
+async def wait_for_embeddings() -> None:
+    """Wait until every background embedding scheduled so far has finished."""
+    while _embedding_tasks:
+        await asyncio.gather(*_embedding_tasks, return_exceptions=True)
+
+
+async def run_backfill(session_maker: async_sessionmaker[AsyncSession]) -> None:
+    """Embed every stored row that has no vector yet, one batch and transaction at a time."""
+    if embedding_index is None:
+        return
+    try:
+        async with session_maker() as db:
+            for table in EMBEDDED_COLUMNS:
+                connection = await db.connection()
+                languages = await connection.run_sync(stored_languages, table)
+                await db.commit()
+                for language in languages:
+                    total = 0
+                    while added := await embedding_index.catch_up(db, table, language, EMBEDDING_BATCH_SIZE):
+                        total += added
+                        # End the read transaction between batches so checkpoints are not held back
+                        await db.commit()
+                    if _commits_out_of_order(db):
+                        total += await embedding_index.fill_gaps(db, table, language)
+                        await db.commit()
+                    if total:
+                        logger.info("Embedded %d %s rows for '%s'", total, table, language)
+    except Exception:
+        logger.warning("Embedding backfill failed", exc_info=True)
@@ -0,0 +1,331 @@
+from typing import AsyncIterator, Callable, Dict, List, Literal, Optional, Protocol, Sequence, Tuple
+import random
+from app.config import settings
+from app.embeddings import Neighbours
+from app.languages import DEFAULT_LANGUAGE, language_name
+from app.llm_client import ResilientChatClient, create_llm_client
+from app.openai_service import MODEL, generate_questions, get_llm, stream_questions
+from app.schemas import Question
+
+GeneratorName = Literal["openai", "local", "template"]
+
+# question_type values produced by the template generator; type 2 translates into the vocabulary's language
+TRANSLATE_TO_ENGLISH: int = 1
+TRANSLATE_TO_VIETNAMESE: int = 2
+GRAMMAR_MEANING: int = 3
+
+ANSWERS_PER_DIFFICULTY: Dict[Optional[str], int] = {None: 4, "easy": 3, "medium": 4, "hard": 5}
+
+# Question type, question text, correct answer, the answers to draw distractors from,
+# and the answers of the most similar items, closest first
+_Candidate = Tuple[int, str, str, Sequence[str], Sequence[str]]
+
+
+class GeneratorUnavailable(Exception):
+    """The requested generator is not configured on this deployment."""
+
+
+class QuestionGenerator(Protocol):
+    """A source of questions for a set of words and grammar points."""
+
+    name: str
+
+    @property
+    def available(self) -> bool:
+        """Whether the generator can be called right now."""
+        ...
+
+    def retry_after(self) -> float:
+        """Seconds until an unavailable generator may be called again."""
+        ...
+
+    async def generate(
+        self,
+        words: List[Dict[str, str]],
+        grammar: List[Dict[str, Optional[str]]],
+        num_questions: int,
+        difficulty: Optional[str] = None,
+        seed: Optional[int] = None,
+        language: str = DEFAULT_LANGUAGE,
+        neighbours: Optional[Neighbours] = None
+    ) -> List[Question]:
+        """
+        Generate up to `num_questions` questions.
+
+        `neighbours` ranks the words and grammar points by similarity to each
+        other; generators that choose their own wrong answers may ignore it.
+        """
+        ...
+
+    def stream(
+        self,
+        words: List[Dict[str, str]],
+        grammar: List[Dict[str, Optional[str]]],
+        num_questions: int,
+        difficulty: Optional[str] = None,
+        seed: Optional[int] = None,
+        language: str = DEFAULT_LANGUAGE,
+        neighbours: Optional[Neighbours] = None
+    ) -> AsyncIterator[Question]:
+        """Yield questions as soon as each one is ready."""
+        ...
+
+
+class ChatModelGenerator:
+    """Questions written by a chat model behind an OpenAI-compatible API."""
+
+    def __init__(self, name: str, llm_client: ResilientChatClient, model: str, structured_output: bool) -> None:
+        self.name = name
+        self.llm_client = llm_client
+        self.model = model
+        self.structured_output = structured_output
+
+    @property
+    def available(self) -> bool:
+        return self.llm_client.available
+
+    def retry_after(self) -> float:
+        return self.llm_client.breaker.retry_after()
+
+    async def generate(
+        self,
+        words: List[Dict[str, str]],
+        grammar: List[Dict[str, Optional[str]]],
+        num_questions: int,
+        difficulty: Optional[str] = None,
+        seed: Optional[int] = None,
+        language: str = DEFAULT_LANGUAGE,
+        neighbours: Optional[Neighbours] = None
+    ) -> List[Question]:
+        return await generate_questions(
+            words=words,
+            grammar=grammar,
+            num_questions=num_questions,
+            difficulty=difficulty,
+            seed=seed,
+            llm_client=self.llm_client,
+            model=self.model,
+            structured_output=self.structured_output,
+            language=language
+        )
+
+    def stream(
+        self,
+        words: List[Dict[str, str]],
+        grammar: List[Dict[str, Optional[str]]],
+        num_questions: int,
+        difficulty: Optional[str] = None,
+        seed: Optional[int] = None,
+        language: str = DEFAULT_LANGUAGE,
+        neighbours: Optional[Neighbours] = None
+    ) -> AsyncIterator[Question]:
+        return stream_questions(
+            words=words,
+            grammar=grammar,
+            num_questions=num_questions,
+            difficulty=difficulty,
+            seed=seed,
+            llm_client=self.llm_client,
+            model=self.model,
+            structured_output=self.structured_output,
+            language=language
+        )
+
+
+class TemplateGenerator:
+    """
+    Deterministic, offline questions built straight from vocabulary rows.
+
+    Words become translation questions in both directions and grammar points
+    become "what does this express" questions. Wrong answers are drawn from the
+    other definitions in the same vocabulary, so the generator needs at least
+    two distinct answers of a kind to ask about it. Given neighbours, hard
+    questions take the answers of the most similar items instead, so the wrong
+    answers are the plausible ones. The same inputs and seed always give the
+    same questions.
+    """
+
+    name = "template"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def retry_after(self) -> float:
+        return 0.0
+
+    async def generate(
+        self,
+        words: List[Dict[str, str]],
+        grammar: List[Dict[str, Optional[str]]],
+        num_questions: int,
+        difficulty: Optional[str] = None,
+        seed: Optional[int] = None,
+        language: str = DEFAULT_LANGUAGE,
+        neighbours: Optional[Neighbours] = None
+    ) -> List[Question]:
+        return self.build(words, grammar, num_questions, difficulty, seed, language, neighbours)
+
+    async def stream(
+        self,
+        words: List[Dict[str, str]],
+        grammar: List[Dict[str, Optional[str]]],
+        num_questions: int,
+        difficulty: Optional[str] = None,
+        seed: Optional[int] = None,
+        language: str = DEFAULT_LANGUAGE,
+        neighbours: Optional[Neighbours] = None
+    ) -> AsyncIterator[Question]:
+        for question in self.build(words, grammar, num_questions, difficulty, seed, language, neighbours):
+            yield question
+
+    def build(
+        self,
+        words: List[Dict[str, str]],
+        grammar: List[Dict[str, Optional[str]]],
+        num_questions: int,
+        difficulty: Optional[str] = None,
+        seed: Optional[int] = None,
+        language: str = DEFAULT_LANGUAGE,
+        neighbours: Optional[Neighbours] = None
+    ) -> List[Question]:
+        """
+        Build questions synchronously.
+
+        Args:
+            words: List of dictionaries containing vietnamese_word and english_definition
+            grammar: List of dictionaries containing grammar_point and english_explanation
+            num_questions: Maximum number of questions to build
+            difficulty: Optional difficulty level; harder questions offer more answers
+            seed: Seed for the choice of items, distractors and answer order
+            language: Language code of the vocabulary, named in translation questions
+            neighbours: Similarity ranking of the words and grammar, used for hard distractors
+
+        Returns:
+            Up to `num_questions` distinct questions (fewer if the vocabulary is too small)
+        """
+        rng = random.Random(seed)
+        answer_count = ANSWERS_PER_DIFFICULTY.get(difficulty, 4)
+        definitions = _distinct([w["english_definition"] for w in words])
+        terms = _distinct([w["vietnamese_word"] for w in words])
+        explanations = _distinct([g["english_explanation"] or "" for g in grammar])
+
+        # Every (template, item) pair that could become a question, in a seeded order
+        word_neighbours: List[List[int]] = [[] for _ in words]
+        grammar_neighbours: List[List[int]] = [[] for _ in grammar]
+        if neighbours is not None and difficulty == "hard":
+            if len(neighbours.words) == len(words):
+                word_neighbours = neighbours.words
+            if len(neighbours.grammar) == len(grammar):
+                grammar_neighbours = neighbours.grammar
+        candidates: List[_Candidate] = []
+        if len(definitions) > 1:
+            candidates += [
+                (TRANSLATE_TO_ENGLISH, f"What does '{w['vietnamese_word']}' mean?", w["english_definition"],
+                 definitions, [words[j]["english_definition"] for j in closest])
+                for w, closest in zip(words, word_neighbours)
+            ]
+        if len(terms) > 1:
+            name = language_name(language)
+            candidates += [
+                (TRANSLATE_TO_VIETNAMESE, f"How do you say '{w['english_definition']}' in {name}?",
+                 w["vietnamese_word"], terms, [words[j]["vietnamese_word"] for j in closest])
+                for w, closest in zip(words, word_neighbours)
+            ]
+        if len(explanations) > 1:
+            candidates += [
+                (GRAMMAR_MEANING, f"What does the grammar point '{g['grammar_point']}' express?",
+                 g["english_explanation"] or "", explanations,
+                 [grammar[j]["english_explanation"] or "" for j in closest])
+                for g, closest in zip(grammar, grammar_neighbours)
+            ]
+        rng.shuffle(candidates)
+
+        questions: List[Question] = []
+        asked: set[str] = set()
+        for question_type, text, correct, pool, closest in candidates:
+            if len(questions) >= num_questions:
+                break
+            if text in asked:
+                continue
+            asked.add(text)
+            answers = _pick_distractors(rng, pool, correct, answer_count - 1, closest)
+            answers.insert(rng.randrange(len(answers) + 1), correct)
+            questions.append(Question(
+                question_type=question_type,
+                question=text,
+                answers=answers,
+                correct_idx=answers.index(correct),
+            ))
+        return questions
+
+
+def _distinct(values: List[str]) -> List[str]:
+    """Drop duplicate and empty values, keeping first-seen order."""
+    return list(dict.fromkeys(v for v in values if v))
+
+
+def _pick_distractors(
+    rng: random.Random,
+    pool: Sequence[str],
+    correct: str,
+    count: int,
+    preferred: Sequence[str] = ()
+) -> List[str]:
+    """Choose up to `count` wrong answers, taking preferred ones in order before random ones from the pool."""
+    if len(pool) - 1 <= count:
+        return [value for value in pool if value != correct]
+    picked = [value for value in dict.fromkeys(preferred) if value and value != correct][:count]
+    while len(picked) < count:
+        value = pool[rng.randrange(len(pool))]
+        if value != correct and value not in picked:
+            picked.append(value)
+    return picked
+
+
+def _create_openai_generator() -> Optional[ChatModelGenerator]:
+    """Build the OpenAI generator, if an API key is configured."""
+    if not settings.openai_api_key:
+        return None
+    return ChatModelGenerator("openai", get_llm(), MODEL, settings.openai_structured_outputs)
+
+
+def _create_local_generator() -> Optional[ChatModelGenerator]:
+    """Build the generator for the configured OpenAI-compatible local endpoint, if any."""
+    if not settings.local_llm_base_url:
+        return None
+    from openai import AsyncOpenAI
+    local_client = AsyncOpenAI(
+        api_key=settings.local_llm_api_key,
+        base_url=settings.local_llm_base_url,
+        max_retries=0
+    )
+    return ChatModelGenerator(
+        "local", create_llm_client(local_client, "local"), settings.local_llm_model, settings.local_llm_structured_outputs
+    )
+
+
+_FACTORIES: Dict[str, Callable[[], Optional[QuestionGenerator]]] = {
+    "openai": _create_openai_generator,
+    "local": _create_local_generator,
+    "template": TemplateGenerator,
+}
+_generators: Dict[str, Optional[QuestionGenerator]] = {}
+
+
+def get_generator(name: Optional[GeneratorName] = None) -> QuestionGenerator:
+    """
+    Return a generator by name, defaulting to the configured one.
+
+    Raises:
+        GeneratorUnavailable: If the generator is unknown or not configured
+    """
+    name = name or settings.question_generator
+    if name not in _FACTORIES:
+        raise GeneratorUnavailable(f"Unknown question generator '{name}'")
+    if name not in _generators:
+        _generators[name] = _FACTORIES[name]()
+    generator = _generators[name]
+    if generator is None:
+        raise GeneratorUnavailable(f"The '{name}' question generator is not configured")
+    return generator
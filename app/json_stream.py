@@ -0,0 +1,67 @@
+from typing import Any, Dict, List, Optional
+import json
+
+
+class ArrayItemParser:
+    """
+    Incrementally extract JSON objects that are elements of an array.
+
+    Text is fed in arbitrary chunks, as it arrives from a streaming completion.
+    Each object whose parent is an array is returned as soon as its closing brace
+    is seen, so both `[{...}, {...}]` and `{"questions": [{...}, {...}]}` yield
+    their items one at a time. Items that fail to decode are skipped.
+    """
+
+    def __init__(self) -> None:
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._capture_depth: Optional[int] = None
+        self._captured: List[str] = []
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume the next chunk of text and return any items it completed."""
+        items: List[Dict[str, Any]] = []
+        for char in text:
+            if self._capture_depth is not None:
+                self._captured.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if (
+                    char == "{"
+                    and self._capture_depth is None
+                    and self._stack
+                    and self._stack[-1] == "["
+                ):
+                    self._capture_depth = len(self._stack) + 1
+                    self._captured = [char]
+                self._stack.append(char)
+            elif char in "}]":
+                if self._capture_depth == len(self._stack) and char == "}":
+                    item = self._decode("".join(self._captured))
+                    if item is not None:
+                        items.append(item)
+                    self._capture_depth = None
+                    self._captured = []
+                if self._stack:
+                    self._stack.pop()
+        return items
+
+    @staticmethod
+    def _decode(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
@@ -0,0 +1,49 @@
+from typing import Dict, List
+from sqlalchemy import Connection
+
+DEFAULT_LANGUAGE: str = "vi"
+
+# BCP 47 style codes: a primary language subtag plus optional region or script subtags
+LANGUAGE_PATTERN: str = r"^[a-z]{2,3}(-[A-Za-z0-9]{2,8})*$"
+LANGUAGE_MAX_LENGTH: int = 16
+
+LANGUAGE_NAMES: Dict[str, str] = {
+    "vi": "Vietnamese",
+    "zh": "Chinese",
+    "ja": "Japanese",
+    "ko": "Korean",
+    "th": "Thai",
+    "id": "Indonesian",
+    "fr": "French",
+    "de": "German",
+    "es": "Spanish",
+    "it": "Italian",
+    "pt": "Portuguese",
+}
+
+
+def language_name(code: str) -> str:
+    """English name of a language code, falling back to the code itself."""
+    return LANGUAGE_NAMES.get(code) or LANGUAGE_NAMES.get(code.split("-")[0]) or code
+
+
+def partition(table: str, language: str) -> str:
+    """
+    Name one language's slice of a vocabulary table.
+
+    Revisions and vocabulary cache entries are kept per partition, so writes in
+    one language never invalidate reads of another.
+    """
+    return f"{table}:{language}"
+
+
+def stored_languages(connection: Connection, table: str) -> List[str]:
+    """Distinct language codes of a vocabulary table's rows, in code order."""
+    # Walks the (language, id) index one distinct language at a time instead of scanning it
+    result = connection.exec_driver_sql(
+        f"WITH RECURSIVE codes(code) AS ("
+        f"SELECT min(language) FROM {table} "
+        f"UNION ALL SELECT (SELECT min(language) FROM {table} WHERE language > code) FROM codes "
+        f"WHERE code IS NOT NULL) SELECT code FROM codes WHERE code IS NOT NULL"
+    )
+    return [row[0] for row in result]
@@ -0,0 +1,412 @@
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Callable, Dict, Optional, Union
+from functools import cache
+import asyncio
+import logging
+import random
+import time
+from app.config import settings
+from app.shared_store import SharedStore, shared_store
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+
+@cache
+def retryable_errors() -> tuple[type[Exception], ...]:
+    """
+    Upstream failures worth retrying; anything else (bad request, auth) is raised at once.
+
+    Imported on first use, since a client exists by then and the SDK is already loaded.
+    """
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+    return (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError, TimeoutError)
+
+
+class UpstreamUnavailable(Exception):
+    """The model API cannot serve a call right now; retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+
+    Callers reserve capacity up front and are told how long to wait before it is
+    theirs, so a burst is spread out instead of being rejected.
+    """
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` tokens (possibly on credit) and return the seconds to wait before using them."""
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """Return tokens that were reserved but not used, or charge extra with a negative amount."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class SharedTokenBucket:
+    """
+    Token bucket kept in the shared store, so every worker draws from one budget.
+
+    Behaves like TokenBucket, with the refill and the reservation done atomically
+    by the store.
+    """
+
+    def __init__(self, store: SharedStore, name: str, per_minute: float) -> None:
+        self.store = store
+        self.key = f"ratelimit:{name}"
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+
+    async def reserve(self, amount: float) -> float:
+        """Take `amount` tokens (possibly on credit) and return the seconds to wait before using them."""
+        tokens = await self.store.take_tokens(self.key, min(amount, self.capacity), self.capacity, self.rate)
+        return max(0.0, -tokens / self.rate)
+
+    async def refund(self, amount: float) -> None:
+        """Return tokens that were reserved but not used, or charge extra with a negative amount."""
+        await self.store.take_tokens(self.key, -amount, self.capacity, self.rate)
+
+
+Bucket = Union[TokenBucket, SharedTokenBucket]
+
+
+async def _reserve(bucket: Bucket, amount: float) -> float:
+    if isinstance(bucket, SharedTokenBucket):
+        return await bucket.reserve(amount)
+    return bucket.reserve(amount)
+
+
+async def _refund(bucket: Bucket, amount: float) -> None:
+    if isinstance(bucket, SharedTokenBucket):
+        await bucket.refund(amount)
+    else:
+        bucket.refund(amount)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and calls fail
+    fast for `reset_seconds`. Then a single trial call is let through: success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._clock = clock
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Return whether a call may be made now, claiming the trial slot when half open."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a trial call through."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_seconds - (self._clock() - self.opened_at))
+
+    def release_trial(self) -> None:
+        """Free the trial slot after a call that neither proved nor disproved upstream health."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("Model API circuit opened after %d consecutive failures", self.failures)
+            self.opened_at = self._clock()
+        self._trial_in_flight = False
+
+
+class ResilientChatClient:
+    """
+    Chat completion calls with a deadline, retries, rate limits and a circuit breaker.
+
+    Every call gets one overall deadline covering queueing, rate-limit waits,
+    attempts and backoff. Retryable failures are retried with exponential
+    backoff and full jitter, honouring Retry-After on 429s. Requests and tokens
+    per minute are metered with token buckets, and at most `max_concurrency`
+    calls are in flight at once; a stream holds its slot and stays under the
+    deadline until its last chunk. Calls that cannot be served raise
+    UpstreamUnavailable, which the API turns into a 503 or a fallback.
+    """
+
+    def __init__(
+        self,
+        client: "AsyncOpenAI",
+        timeout_seconds: float,
+        max_retries: int,
+        backoff_base_seconds: float,
+        backoff_max_seconds: float,
+        max_concurrency: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        breaker: CircuitBreaker,
+        store: Optional[SharedStore] = None,
+        name: str = "openai"
+    ) -> None:
+        self.client = client
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max(0, max_retries)
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = breaker
+        # With a shared store the per-minute limits hold for the whole deployment, not per worker
+        self.request_bucket: Optional[Bucket] = None
+        self.token_bucket: Optional[Bucket] = None
+        if requests_per_minute > 0:
+            self.request_bucket = (
+                SharedTokenBucket(store, f"{name}:requests", requests_per_minute) if store is not None
+                else TokenBucket(requests_per_minute)
+            )
+        if tokens_per_minute > 0:
+            self.token_bucket = (
+                SharedTokenBucket(store, f"{name}:tokens", tokens_per_minute) if store is not None
+                else TokenBucket(tokens_per_minute)
+            )
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.calls = 0
+        self.retries = 0
+        self.rejected = 0
+
+    @property
+    def available(self) -> bool:
+        """Whether the circuit currently lets calls through (without claiming a trial)."""
+        return self.breaker.state != "open"
+
+    async def create(self, estimated_tokens: int = 0, **params: Any) -> Any:
+        """
+        Call `chat.completions.create` with the resilience policies applied.
+
+        Args:
+            estimated_tokens: Expected prompt plus completion tokens, charged to the token bucket
+            **params: Arguments for `chat.completions.create`; use `stream` for streamed completions
+
+        Returns:
+            The completion returned by the SDK
+        """
+        deadline = asyncio.get_running_loop().time() + self.timeout_seconds
+        response = await self._open(estimated_tokens, deadline, params)
+        self._semaphore.release()
+        self.breaker.record_success()
+        await self._settle_tokens(estimated_tokens, response)
+        return response
+
+    async def stream(self, estimated_tokens: int = 0, **params: Any) -> AsyncGenerator[Any, None]:
+        """
+        Stream a chat completion's chunks with the resilience policies applied to the whole stream.
+
+        Opening the stream is retried like any call. Every chunk is then awaited
+        under the same deadline, the concurrency slot is held until the stream
+        ends, and a failure partway through counts against the circuit breaker.
+
+        Args:
+            estimated_tokens: Expected prompt plus completion tokens, charged to the token bucket
+            **params: Arguments for `chat.completions.create`, without `stream`
+
+        Yields:
+            The SDK's completion chunks
+
+        Raises:
+            UpstreamUnavailable: If the stream cannot be opened, stalls past the deadline or breaks off
+        """
+        deadline = asyncio.get_running_loop().time() + self.timeout_seconds
+        stream = await self._open(estimated_tokens, deadline, {**params, "stream": True})
+        with_usage: Any = None
+        try:
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    # Only the wait for each chunk is timed; the caller's own work between chunks is not cancelled
+                    async with asyncio.timeout_at(deadline):
+                        chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    break
+                except retryable_errors() as exc:
+                    self.breaker.record_failure()
+                    raise UpstreamUnavailable(
+                        f"Model API stream failed: {exc!r}", retry_after=self.breaker.retry_after() or None
+                    ) from exc
+                if getattr(chunk, "usage", None):
+                    with_usage = chunk
+                yield chunk
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+        finally:
+            self._semaphore.release()
+            close = getattr(stream, "close", None)
+            if close is not None:
+                await close()
+        self.breaker.record_success()
+        await self._settle_tokens(estimated_tokens, with_usage)
+
+    async def _open(self, estimated_tokens: int, deadline: float, params: Dict[str, Any]) -> Any:
+        """
+        Make the call, retrying within the deadline.
+
+        Returns holding a concurrency slot, which the caller releases once it is
+        done with the response.
+        """
+        loop = asyncio.get_running_loop()
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise UpstreamUnavailable("Model API circuit is open", retry_after=self.breaker.retry_after())
+
+        await self._throttle(estimated_tokens, deadline)
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            held = False
+            try:
+                if remaining <= 0:
+                    raise TimeoutError("Model API call deadline exceeded")
+                async with asyncio.timeout_at(deadline):
+                    await self._semaphore.acquire()
+                    held = True
+                    self.calls += 1
+                    response = await self.client.chat.completions.create(**params, timeout=remaining)
+            except retryable_errors() as exc:
+                if held:
+                    self._semaphore.release()
+                self.breaker.record_failure()
+                attempt += 1
+                delay = self._backoff(attempt, exc)
+                if attempt > self.max_retries or loop.time() + delay >= deadline or not self.breaker.allow():
+                    raise UpstreamUnavailable(
+                        f"Model API unavailable after {attempt} attempt(s): {exc!r}",
+                        retry_after=self.breaker.retry_after() or delay or None
+                    ) from exc
+                self.retries += 1
+                logger.warning("Model API call failed (attempt %d), retrying in %.2fs: %r", attempt, delay, exc)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                if held:
+                    self._semaphore.release()
+                self.breaker.release_trial()
+                raise
+            return response
+
+    async def _throttle(self, estimated_tokens: int, deadline: float) -> None:
+        """Wait for request and token budget, failing fast if it would not arrive before the deadline."""
+        loop = asyncio.get_running_loop()
+        wait = 0.0
+        if self.request_bucket is not None:
+            wait = max(wait, await _reserve(self.request_bucket, 1))
+        if self.token_bucket is not None and estimated_tokens:
+            wait = max(wait, await _reserve(self.token_bucket, estimated_tokens))
+        if wait <= 0:
+            return
+        if loop.time() + wait >= deadline:
+            if self.request_bucket is not None:
+                await _refund(self.request_bucket, 1)
+            if self.token_bucket is not None and estimated_tokens:
+                await _refund(self.token_bucket, estimated_tokens)
+            self.rejected += 1
+            raise UpstreamUnavailable("Model API rate limit reached", retry_after=wait)
+        await asyncio.sleep(wait)
+
+    async def _settle_tokens(self, estimated_tokens: int, response: Any) -> None:
+        """Correct the token bucket with the usage the API actually reported."""
+        usage = getattr(response, "usage", None)
+        total = getattr(usage, "total_tokens", None)
+        if self.token_bucket is not None and isinstance(total, int):
+            await _refund(self.token_bucket, estimated_tokens - total)
+
+    def _backoff(self, attempt: int, exc: Exception) -> float:
+        """Exponential backoff with full jitter, at least as long as any Retry-After."""
+        ceiling = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (attempt - 1))
+        delay = random.uniform(0, ceiling)
+        response = getattr(exc, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    def reset(self) -> None:
+        """Close the circuit and zero the counters."""
+        self.breaker.record_success()
+        self.calls = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return breaker state and call counters."""
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "calls": self.calls,
+            "retries": self.retries,
+            "rejected": self.rejected,
+        }
+
+
+def create_llm_client(client: "AsyncOpenAI", name: str = "openai") -> ResilientChatClient:
+    """Wrap an SDK client with the policies configured in settings, its rate limits shared under `name`."""
+    return ResilientChatClient(
+        client,
+        timeout_seconds=settings.llm_timeout_seconds,
+        max_retries=settings.llm_max_retries,
+        backoff_base_seconds=settings.llm_backoff_base_seconds,
+        backoff_max_seconds=settings.llm_backoff_max_seconds,
+        max_concurrency=settings.llm_max_concurrency,
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        breaker=CircuitBreaker(settings.llm_breaker_failure_threshold, settings.llm_breaker_reset_seconds),
+        store=shared_store,
+        name=name,
+    )
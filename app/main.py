@@ -1,23 +1,75 @@
-from typing import Dict
+from typing import Dict, Optional
+import asyncio
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager, suppress
 from collections.abc import AsyncIterator
-from app.database import init_db
+from app.config import settings
+from app.database import async_session_maker
+from app.embeddings import embedding_index, run_backfill, wait_for_embeddings
+from app.migrations import init_db
+from app.metrics import (
+    CACHE_ENTRIES, CACHE_EVENTS, LLM_CIRCUIT_OPEN, LLM_CLIENT_EVENTS, QUIZ_ANSWERS,
+    MetricsMiddleware, instrument_database, registry
+)
+from app.openai_service import loaded_llm
+from app.question_cache import question_cache
+from app.question_pool import run_refill_worker
+from app.quiz_sessions import answer_buffer, flush_answers, quiz_sessions, run_answer_flusher
+from app.responses import ORJSONResponse
 from app.routes import router
+from app.shared_store import shared_store
+from app.singleflight import inflight, shared_inflight
+from app.vocab_cache import run_invalidation_listener, vocab_cache
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Handle startup and shutdown events."""
     # Startup: create tables
     await init_db()
+    
+    # Keep the pre-generated question pool topped up in the background
+    refill_task: Optional[asyncio.Task[None]] = None
+    if settings.question_pool_enabled:
+        refill_task = asyncio.create_task(
+            run_refill_worker(async_session_maker, settings.question_pool_refill_interval_seconds)
+        )
+    
+    # Embed rows written while the index was missing or disabled
+    backfill_task: Optional[asyncio.Task[None]] = None
+    if embedding_index is not None:
+        backfill_task = asyncio.create_task(run_backfill(async_session_maker))
+    
+    # Write buffered quiz answers in batches
+    flush_task = asyncio.create_task(
+        run_answer_flusher(async_session_maker, settings.quiz_answer_flush_interval_seconds)
+    )
+    
+    # Drop cached vocabulary that other workers have written
+    listener_task: Optional[asyncio.Task[None]] = None
+    if shared_store is not None:
+        listener_task = asyncio.create_task(run_invalidation_listener(shared_store))
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: stop the background workers, then write the answers still buffered
+    for task in (refill_task, backfill_task, flush_task, listener_task):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await flush_answers(async_session_maker)
+    await wait_for_embeddings()
+    if shared_store is not None:
+        await shared_store.close()
 
-app = FastAPI(title="Language Learning API", lifespan=lifespan)
+app = FastAPI(title="Language Learning API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Include the router
 app.include_router(router, prefix="/api/v1", tags=["language"])
 
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    instrument_database()
+
 @app.get("/")
 async def root() -> Dict[str, str]:
     """Root endpoint."""
@@ -26,4 +78,43 @@ async def root() -> Dict[str, str]:
 @app.get("/health")
 async def health() -> Dict[str, str]:
     """Health check endpoint."""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+async def _collect_component_metrics() -> None:
+    """Copy cache and model client counters into gauges at scrape time, keeping them off the hot path."""
+    # Scraping does not create the model client; until something uses it there is nothing to report
+    llm = loaded_llm()
+    if llm is not None:
+        llm_stats = llm.stats()
+        for event in ("calls", "retries", "rejected"):
+            LLM_CLIENT_EVENTS.set(llm_stats[event], (event,))
+        LLM_CIRCUIT_OPEN.set(1 if llm_stats["circuit"] == "open" else 0)
+    
+    vocab_stats = vocab_cache.stats()
+    CACHE_EVENTS.set(vocab_stats["hits"], ("vocabulary", "hit"))
+    CACHE_EVENTS.set(vocab_stats["misses"], ("vocabulary", "miss"))
+    CACHE_ENTRIES.set(vocab_stats["entries"], ("vocabulary",))
+    if question_cache is not None:
+        question_stats = await question_cache.stats()
+        CACHE_EVENTS.set(float(question_stats["hits"]), ("questions", "hit"))
+        CACHE_EVENTS.set(float(question_stats["misses"]), ("questions", "miss"))
+        CACHE_ENTRIES.set(float(question_stats["entries"]), ("questions",))
+    CACHE_ENTRIES.set(len(quiz_sessions), ("quiz_sessions",))
+    QUIZ_ANSWERS.set(answer_buffer.pending, ("pending",))
+    QUIZ_ANSWERS.set(answer_buffer.flushed, ("written",))
+    QUIZ_ANSWERS.set(answer_buffer.dropped, ("dropped",))
+    coalescing = inflight.stats()
+    CACHE_EVENTS.set(coalescing["executed"], ("in_flight", "miss"))
+    CACHE_EVENTS.set(coalescing["coalesced"], ("in_flight", "hit"))
+    if shared_inflight is not None:
+        shared_coalescing = shared_inflight.stats()
+        CACHE_EVENTS.set(shared_coalescing["executed"], ("shared_in_flight", "miss"))
+        CACHE_EVENTS.set(shared_coalescing["waited"], ("shared_in_flight", "hit"))
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Prometheus metrics in the text exposition format."""
+    if not settings.metrics_enabled:
+        return PlainTextResponse("Metrics are disabled\n", status_code=404)
+    await _collect_component_metrics()
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
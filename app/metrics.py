@@ -0,0 +1,286 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+import logging
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from fast DB reads up to slow model calls
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """A named metric family with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, Labels, Labels, float]]:
+        """Yield (suffix, extra label names, label values, value) for every sample."""
+        return iter(())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, extra_names, values, value in self.samples():
+            labels = _format_labels(self.labelnames + extra_names, values)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """A monotonically increasing total."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterator[Tuple[str, Labels, Labels, float]]:
+        for labels, value in sorted(self._values.items()):
+            yield "", (), labels, value
+
+
+class Gauge(Metric):
+    """A value that is set, typically read from another component at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+    def samples(self) -> Iterator[Tuple[str, Labels, Labels, float]]:
+        for labels, value in sorted(self._values.items()):
+            yield "", (), labels, value
+
+
+class Histogram(Metric):
+    """
+    Observations counted into fixed buckets.
+
+    Each observation is a bisect and three additions; buckets are only made
+    cumulative when the metric is rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            # One slot per bucket plus the +Inf overflow
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def samples(self) -> Iterator[Tuple[str, Labels, Labels, float]]:
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield "_bucket", ("le",), labels + (bound,), cumulative
+            yield "_sum", (), labels, self._sums[labels]
+            yield "_count", (), labels, cumulative
+
+
+class Registry:
+    """The metrics exposed on /metrics, in registration order."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS: Histogram = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+))
+GENERATION_STAGE_SECONDS: Histogram = registry.register(Histogram(
+    "question_generation_stage_seconds",
+    "Time spent in each question generation stage (db_fetch, prompt_build, llm_call, validation)",
+    ("stage",)
+))
+DB_QUERY_SECONDS: Histogram = registry.register(Histogram(
+    "db_query_duration_seconds", "Database statement execution time", ("statement",)
+))
+LLM_TOKENS: Counter = registry.register(Counter(
+    "llm_tokens_total", "Tokens reported in model API usage", ("model", "kind")
+))
+LLM_CLIENT_EVENTS: Gauge = registry.register(Gauge(
+    "llm_client_events", "Model API calls, retries and rejections since startup", ("event",)
+))
+LLM_CIRCUIT_OPEN: Gauge = registry.register(Gauge(
+    "llm_circuit_open", "1 while the model API circuit breaker is open"
+))
+CACHE_EVENTS: Gauge = registry.register(Gauge(
+    "cache_events", "Cache hits and misses since startup", ("cache", "event")
+))
+CACHE_ENTRIES: Gauge = registry.register(Gauge(
+    "cache_entries", "Entries currently held by each cache", ("cache",)
+))
+QUIZ_ANSWERS: Gauge = registry.register(Gauge(
+    "quiz_answers", "Quiz answers waiting in the write buffer, and written or dropped since startup", ("state",)
+))
+
+
+# Optional OpenTelemetry spans around generation stages
+_tracer: Any = None
+if settings.otel_enabled:
+    try:
+        from opentelemetry import trace
+        _tracer = trace.get_tracer("language-learning-api")
+    except ImportError:
+        logger.warning("OTEL_ENABLED is set but opentelemetry-api is not installed; spans are disabled")
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a question generation stage, recording a histogram sample and an optional span."""
+    started = time.perf_counter()
+    span = _tracer.start_as_current_span(f"question_generation.{name}") if _tracer is not None else nullcontext()
+    try:
+        with span:
+            yield
+    finally:
+        GENERATION_STAGE_SECONDS.observe(time.perf_counter() - started, (name,))
+
+
+def record_usage(model: str, usage: Any) -> None:
+    """Count the prompt and completion tokens from an OpenAI `usage` object."""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if isinstance(prompt_tokens, int):
+        LLM_TOKENS.inc(prompt_tokens, (model, "prompt"))
+    if isinstance(completion_tokens, int):
+        LLM_TOKENS.inc(completion_tokens, (model, "completion"))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request.
+
+    Requests are labelled with the matched route template (not the raw path) so
+    the number of series stays bounded. Streaming responses are timed until
+    the last body chunk is sent.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                (scope["method"], getattr(route, "path", "unmatched"), str(status))
+            )
+
+
+_STATEMENT_KINDS = {"select", "insert", "update", "delete"}
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    started = conn.info["query_started"].pop()
+    kind = statement.lstrip()[:6].lower()
+    DB_QUERY_SECONDS.observe(time.perf_counter() - started, (kind if kind in _STATEMENT_KINDS else "other",))
+
+
+def _handle_error(context: Any) -> None:
+    # A failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+def instrument_database() -> None:
+    """Time every statement executed by any engine (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
@@ -0,0 +1,144 @@
+from typing import Any, Callable, List, Mapping, Optional, Tuple, Type
+from datetime import datetime, UTC
+import logging
+from sqlalchemy import Connection, bindparam, func, inspect, insert, select, update
+from app.database import Base, engine
+from app.languages import DEFAULT_LANGUAGE, LANGUAGE_MAX_LENGTH
+from app.models import Grammar, SchemaVersion, Word
+from app.prompt_lines import format_grammar_line, format_word_line
+from app.search import drop_search_index
+
+logger = logging.getLogger(__name__)
+
+# Tables that gained a language column, with the single-language indexes it replaces
+_LANGUAGE_TABLES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("words", ("ix_words_vietnamese_word",)),
+    ("grammar", ("ix_grammar_grammar_point",)),
+    ("questions", ("ix_questions_difficulty",)),
+    ("word_reviews", ("ix_word_reviews_user_due",)),
+    ("grammar_reviews", ("ix_grammar_reviews_user_due",)),
+)
+
+
+def _add_language(connection: Connection) -> None:
+    """
+    Partition vocabulary, reviews and the question pool by language.
+
+    Existing rows predate other languages, so they all become Vietnamese. The
+    unique and lookup indexes are rebuilt with language as their leading
+    column, and the search indexes are dropped so they are rebuilt with it.
+    """
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    for table, replaced in _LANGUAGE_TABLES:
+        if table not in tables:
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        if "language" not in columns:
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table} ADD COLUMN language VARCHAR({LANGUAGE_MAX_LENGTH}) "
+                f"NOT NULL DEFAULT '{DEFAULT_LANGUAGE}'"
+            )
+        for index_name in replaced:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
+        for index in Base.metadata.tables[table].indexes:
+            index.create(connection, checkfirst=True)
+    drop_search_index(connection)
+
+
+# Rows rendered per statement while backfilling prompt lines
+PROMPT_LINE_BATCH_SIZE: int = 10_000
+
+_PROMPT_LINE_TABLES: Tuple[Tuple[Type[Base], Callable[[Mapping[str, Any]], str]], ...] = (
+    (Word, format_word_line),
+    (Grammar, format_grammar_line),
+)
+
+
+def _add_prompt_lines(connection: Connection) -> None:
+    """
+    Store each word's and grammar point's line of the question prompt.
+
+    The lines are rendered in keyset-ordered batches. The search indexes are
+    dropped first, so the backfill does not re-index every row through the
+    update triggers; they are rebuilt once afterwards.
+    """
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    drop_search_index(connection)
+    for model, render in _PROMPT_LINE_TABLES:
+        table = Base.metadata.tables[model.__tablename__]
+        if table.name not in tables:
+            continue
+        if "prompt_line" not in {column["name"] for column in inspector.get_columns(table.name)}:
+            connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN prompt_line TEXT")
+        source = [column for column in table.columns if column.name not in ("prompt_line", "created_at")]
+        stmt = update(table).where(table.c.id == bindparam("row_id")).values(prompt_line=bindparam("line"))
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                select(*source).where(table.c.id > last_id).order_by(table.c.id).limit(PROMPT_LINE_BATCH_SIZE)
+            ).mappings().all()
+            if not rows:
+                break
+            connection.execute(stmt, [{"row_id": row["id"], "line": render(dict(row))} for row in rows])
+            last_id = rows[-1]["id"]
+
+
+# Schema versions in order; each step upgrades a database from the previous version
+MIGRATIONS: List[Tuple[int, Callable[[Connection], None]]] = [
+    (1, _add_language),
+    (2, _add_prompt_lines),
+]
+LATEST_VERSION: int = MIGRATIONS[-1][0]
+
+
+def schema_version(connection: Connection) -> Optional[int]:
+    """
+    Return the database's schema version.
+
+    Databases created before versioning have tables but no version table and
+    report 0; an empty database reports None.
+    """
+    tables = set(inspect(connection).get_table_names())
+    if SchemaVersion.__tablename__ in tables:
+        return connection.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+    return 0 if tables else None
+
+
+def migrate(connection: Connection) -> int:
+    """
+    Create or upgrade the schema, then create anything still missing.
+
+    An empty database is created at the latest version. Otherwise every step
+    newer than the database's version runs in order, in the caller's
+    transaction, and is recorded in the schema_version table. A database
+    already at the latest version with all its tables is left alone, so a
+    restart issues no DDL.
+
+    Returns:
+        The schema version the database is now at
+    """
+    current = schema_version(connection)
+    if current == LATEST_VERSION and set(Base.metadata.tables) <= set(inspect(connection).get_table_names()):
+        return LATEST_VERSION
+    if current is None:
+        applied = [LATEST_VERSION]
+    else:
+        applied = []
+        for version, step in MIGRATIONS:
+            if version > current:
+                logger.info("Migrating database schema to version %d", version)
+                step(connection)
+                applied.append(version)
+    Base.metadata.create_all(connection)
+    if applied:
+        now = datetime.now(UTC)
+        connection.execute(insert(SchemaVersion), [{"version": v, "applied_at": now} for v in applied])
+    return LATEST_VERSION
+
+
+async def init_db() -> None:
+    """Create or upgrade the database tables."""
+    async with engine.begin() as conn:
+        await conn.run_sync(migrate)
@@ -1,14 +1,36 @@
-from sqlalchemy import String, Text
+from typing import Any
+from sqlalchemy import JSON, ForeignKey, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime, UTC
 from app.database import Base
+from app.languages import DEFAULT_LANGUAGE, LANGUAGE_MAX_LENGTH
+from app.prompt_lines import format_grammar_line, format_word_line
+
+
+def _word_prompt_line(context: Any) -> str:
+    return format_word_line(context.get_current_parameters())
+
+
+def _grammar_prompt_line(context: Any) -> str:
+    return format_grammar_line(context.get_current_parameters())
+
 
 class Word(Base):
     __tablename__ = "words"
+    __table_args__ = (
+        # Terms are unique per language; (language, id) serves keyset pages and sampling
+        Index("uq_words_language_term", "language", "vietnamese_word", unique=True),
+        Index("ix_words_language_id", "language", "id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    vietnamese_word: Mapped[str] = mapped_column(String(100), unique=True, index=True)
+    language: Mapped[str] = mapped_column(
+        String(LANGUAGE_MAX_LENGTH), default=DEFAULT_LANGUAGE, server_default=DEFAULT_LANGUAGE
+    )
+    vietnamese_word: Mapped[str] = mapped_column(String(100))
     english_definition: Mapped[str] = mapped_column(Text)
+    # The row's line of the question prompt, rendered once when the row is written
+    prompt_line: Mapped[str | None] = mapped_column(Text, default=_word_prompt_line, info={"derived": True})
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(UTC))
     
     def __repr__(self) -> str:
@@ -17,12 +39,157 @@ class Word(Base):
 
 class Grammar(Base):
     __tablename__ = "grammar"
+    __table_args__ = (
+        Index("uq_grammar_language_term", "language", "grammar_point", unique=True),
+        Index("ix_grammar_language_id", "language", "id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    grammar_point: Mapped[str] = mapped_column(String(200), unique=True, index=True)
+    language: Mapped[str] = mapped_column(
+        String(LANGUAGE_MAX_LENGTH), default=DEFAULT_LANGUAGE, server_default=DEFAULT_LANGUAGE
+    )
+    grammar_point: Mapped[str] = mapped_column(String(200))
     english_explanation: Mapped[str] = mapped_column(Text)
     example_sentence: Mapped[str | None] = mapped_column(Text, nullable=True)
+    prompt_line: Mapped[str | None] = mapped_column(Text, default=_grammar_prompt_line, info={"derived": True})
+    created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(UTC))
+    
+    def __repr__(self) -> str:
+        return f"<Grammar {self.grammar_point}>"
+
+
+class QuestionCacheEntry(Base):
+    __tablename__ = "question_cache"
+    
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    payload: Mapped[str] = mapped_column(Text)
+    generation_seconds: Mapped[float] = mapped_column(default=0.0)
+    total_tokens: Mapped[int] = mapped_column(default=0)
+    expires_at: Mapped[datetime] = mapped_column(index=True)
+    last_used_at: Mapped[datetime] = mapped_column(index=True)
+    
+    def __repr__(self) -> str:
+        return f"<QuestionCacheEntry {self.key}>"
+
+
+class PooledQuestion(Base):
+    __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_language_difficulty", "language", "difficulty", "id"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    language: Mapped[str] = mapped_column(
+        String(LANGUAGE_MAX_LENGTH), default=DEFAULT_LANGUAGE, server_default=DEFAULT_LANGUAGE
+    )
+    difficulty: Mapped[str] = mapped_column(String(10))
+    question_type: Mapped[int]
+    question: Mapped[str] = mapped_column(Text)
+    answers: Mapped[list[str]] = mapped_column(JSON)
+    correct_idx: Mapped[int]
+    word_ids: Mapped[list[int]] = mapped_column(JSON, default=list)
+    grammar_ids: Mapped[list[int]] = mapped_column(JSON, default=list)
+    created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(UTC))
+    
+    def __repr__(self) -> str:
+        return f"<PooledQuestion {self.id} ({self.difficulty})>"
+
+
+class TableRevision(Base):
+    __tablename__ = "table_revisions"
+    
+    table_name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    revision: Mapped[int] = mapped_column(default=0)
+    updated_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(UTC))
+    
+    def __repr__(self) -> str:
+        return f"<TableRevision {self.table_name}={self.revision}>"
+
+
+class WordReview(Base):
+    __tablename__ = "word_reviews"
+    __table_args__ = (
+        # Serves the per-user, per-language due queue as an index range scan
+        Index("ix_word_reviews_user_language_due", "user_id", "language", "due_at"),
+    )
+    
+    user_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    word_id: Mapped[int] = mapped_column(ForeignKey("words.id", ondelete="CASCADE"), primary_key=True)
+    # Copied from the word so the due queue never has to join to filter by language
+    language: Mapped[str] = mapped_column(
+        String(LANGUAGE_MAX_LENGTH), default=DEFAULT_LANGUAGE, server_default=DEFAULT_LANGUAGE
+    )
+    ease_factor: Mapped[float] = mapped_column(default=2.5)
+    interval_days: Mapped[float] = mapped_column(default=0.0)
+    repetitions: Mapped[int] = mapped_column(default=0)
+    lapses: Mapped[int] = mapped_column(default=0)
+    due_at: Mapped[datetime]
+    last_reviewed_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<WordReview {self.user_id}:{self.word_id} due {self.due_at}>"
+
+
+class GrammarReview(Base):
+    __tablename__ = "grammar_reviews"
+    __table_args__ = (
+        Index("ix_grammar_reviews_user_language_due", "user_id", "language", "due_at"),
+    )
+    
+    user_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    grammar_id: Mapped[int] = mapped_column(ForeignKey("grammar.id", ondelete="CASCADE"), primary_key=True)
+    language: Mapped[str] = mapped_column(
+        String(LANGUAGE_MAX_LENGTH), default=DEFAULT_LANGUAGE, server_default=DEFAULT_LANGUAGE
+    )
+    ease_factor: Mapped[float] = mapped_column(default=2.5)
+    interval_days: Mapped[float] = mapped_column(default=0.0)
+    repetitions: Mapped[int] = mapped_column(default=0)
+    lapses: Mapped[int] = mapped_column(default=0)
+    due_at: Mapped[datetime]
+    last_reviewed_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<GrammarReview {self.user_id}:{self.grammar_id} due {self.due_at}>"
+
+
+class QuizSession(Base):
+    __tablename__ = "quiz_sessions"
+    
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    user_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    language: Mapped[str] = mapped_column(
+        String(LANGUAGE_MAX_LENGTH), default=DEFAULT_LANGUAGE, server_default=DEFAULT_LANGUAGE
+    )
+    # The questions as generated, correct answers included; clients only ever see them without
+    questions: Mapped[list[dict[str, Any]]] = mapped_column(JSON)
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(UTC))
+    expires_at: Mapped[datetime]
+    
+    def __repr__(self) -> str:
+        return f"<QuizSession {self.id} ({len(self.questions)} questions)>"
+
+
+class QuizAnswer(Base):
+    __tablename__ = "quiz_answers"
+    
+    # One answer per question; the first one submitted counts
+    session_id: Mapped[str] = mapped_column(
+        ForeignKey("quiz_sessions.id", ondelete="CASCADE"), primary_key=True
+    )
+    question_idx: Mapped[int] = mapped_column(primary_key=True)
+    answer_idx: Mapped[int]
+    correct: Mapped[bool]
+    answered_at: Mapped[datetime]
+    
+    def __repr__(self) -> str:
+        return f"<QuizAnswer {self.session_id}:{self.question_idx} {'correct' if self.correct else 'wrong'}>"
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+    
+    version: Mapped[int] = mapped_column(primary_key=True)
+    applied_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(UTC))
     
     def __repr__(self) -> str:
-        return f"<Grammar {self.grammar_point}>"
\ No newline at end of file
+        return f"<SchemaVersion {self.version}>"
@@ -1,87 +1,484 @@
-from typing import List, Dict, Optional
-from openai import AsyncOpenAI
+from typing import TYPE_CHECKING, Any, AsyncIterator, List, Dict, Optional, Tuple
+from contextlib import aclosing
+from functools import cache
 from app.config import settings
+from app.languages import DEFAULT_LANGUAGE, language_name
+from app.prompt_lines import grammar_line, word_line
 from app.schemas import Question
+from app.question_cache import question_cache, make_cache_key
+from app.json_stream import ArrayItemParser
+from app.metrics import record_usage, stage
+from app.question_parser import parse_questions, question_response_format, validate_item
+from app.singleflight import inflight, shared_inflight
+from app.llm_client import ResilientChatClient, UpstreamUnavailable, create_llm_client
+import asyncio
 import json
+import logging
+import re
+import time
 
-client: AsyncOpenAI = AsyncOpenAI(api_key=settings.openai_api_key)
+if TYPE_CHECKING:
+    # The SDK takes longer to import than the rest of the app; it is loaded with the first client
+    from openai import AsyncOpenAI
+    from openai.types.chat import ChatCompletionMessageParam
+
+logger = logging.getLogger(__name__)
+
+# Vocabulary slice and question count for one sub-request of a fanned-out generation
+Shard = Tuple[List[Dict[str, str]], List[Dict[str, Optional[str]]], int]
+
+@cache
+def get_openai_client() -> "AsyncOpenAI":
+    """
+    The OpenAI SDK client, created on first use.
+    
+    Importing the app neither loads the SDK nor needs an API key; both are
+    only required once something calls the OpenAI API.
+    
+    Raises:
+        UpstreamUnavailable: If no API key is configured
+    """
+    if not settings.openai_api_key:
+        raise UpstreamUnavailable("No OpenAI API key is configured (OPENAI_API_KEY)")
+    from openai import AsyncOpenAI
+    # Retries are handled by the resilient wrapper, not the SDK
+    return AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url, max_retries=0)
+
+@cache
+def get_llm() -> ResilientChatClient:
+    """The resilient client for OpenAI calls, created with the SDK client on first use."""
+    return create_llm_client(get_openai_client())
+
+def loaded_llm() -> Optional[ResilientChatClient]:
+    """The OpenAI client if anything has used it yet, without creating it."""
+    return get_llm() if get_llm.cache_info().currsize else None
+
+MODEL: str = "gpt-4o-mini"
+TEMPERATURE: float = 0.7
+SYSTEM_PROMPT: str = "You are a helpful {language} language teacher. You always respond with valid JSON."
+COMPLETION_TOKENS_PER_QUESTION: int = 80
+
+# The worked example in the prompt: question text and answers, with a neutral one for languages without their own
+EXAMPLE_QUESTIONS: Dict[str, Tuple[str, List[str]]] = {
+    "vi": ("What does 'xin chào' mean?", ["Hello", "Goodbye", "Thank you", "Please"]),
+}
+NEUTRAL_EXAMPLE: Tuple[str, List[str]] = (
+    "What does '<term>' mean?", ["<correct meaning>", "<wrong meaning>", "<wrong meaning>", "<wrong meaning>"]
+)
+
+# Answer format sections by language, rendered on first use
+_INSTRUCTIONS: Dict[str, str] = {}
+
+def system_prompt(language: str = DEFAULT_LANGUAGE) -> str:
+    """The system message for questions about one language."""
+    return SYSTEM_PROMPT.format(language=language_name(language))
+
+def _instructions(language: str) -> str:
+    """The answer format section of the prompt, the same for every prompt in a language."""
+    example_question, example_answers = EXAMPLE_QUESTIONS.get(language, NEUTRAL_EXAMPLE)
+    return f"""Each question should have 2-6 answer choices with exactly one correct answer.
+
+Return ONLY valid JSON in this exact format:
+[
+  {{
+    "question_type": 1,
+    "question": {json.dumps(example_question, ensure_ascii=False)},
+    "answers": {json.dumps(example_answers, ensure_ascii=False)},
+    "correct_idx": 0
+  }}
+]
+"""
+
+def build_prompt(
+    words: List[Dict[str, str]],
+    grammar: List[Dict[str, Optional[str]]],
+    num_questions: int = 5,
+    difficulty: Optional[str] = None,
+    language: str = DEFAULT_LANGUAGE
+) -> str:
+    """
+    Render the question generation prompt for the given words and grammar of one language.
+    
+    The prompt is joined from the rows' stored prompt lines and the language's
+    fixed sections. Everything that depends on the request alone, the difficulty
+    and question count, comes last, so prompts over the same vocabulary share
+    their whole prefix and hit the model provider's prompt cache.
+    """
+    if language not in _INSTRUCTIONS:
+        _INSTRUCTIONS[language] = _instructions(language)
+    difficulty_note: str = f"Difficulty level: {difficulty}\n" if difficulty else ""
+    return (
+        f"You are a {language_name(language)} language teacher creating quiz questions.\n\n"
+        "Known Words:\n" + "\n".join([word_line(w) for w in words]) +
+        "\n\nKnown Grammar:\n" + "\n".join([grammar_line(g) for g in grammar]) +
+        "\n\n" + _INSTRUCTIONS[language] +
+        f"\n{difficulty_note}Create {num_questions} multiple-choice questions that test the student's "
+        "understanding of these words and grammar points, in the format above.\n"
+    )
+
+def build_messages(prompt: str, language: str = DEFAULT_LANGUAGE) -> List["ChatCompletionMessageParam"]:
+    """Wrap a rendered prompt in the chat messages sent to the model."""
+    return [
+        {
+            "role": "system", 
+            "content": system_prompt(language)
+        },
+        {"role": "user", "content": prompt}
+    ]
+
+def estimate_call_tokens(prompt: str, num_questions: int) -> int:
+    """Roughly estimate the prompt plus completion tokens of one call, for rate limiting."""
+    return (len(SYSTEM_PROMPT) + len(prompt)) // 4 + num_questions * COMPLETION_TOKENS_PER_QUESTION
+
+def prompt_cache_key(
+    prompt: str,
+    seed: Optional[int] = None,
+    model: str = MODEL,
+    language: str = DEFAULT_LANGUAGE
+) -> str:
+    """Key a rendered prompt together with the model parameters used to answer it."""
+    return make_cache_key(prompt, model=model, temperature=TEMPERATURE, system=system_prompt(language), seed=seed)
 
 async def generate_questions(
     words: List[Dict[str, str]],
     grammar: List[Dict[str, Optional[str]]],
     num_questions: int = 5,
-    difficulty: Optional[str] = None
+    difficulty: Optional[str] = None,
+    seed: Optional[int] = None,
+    use_cache: bool = True,
+    llm_client: Optional[ResilientChatClient] = None,
+    model: str = MODEL,
+    structured_output: Optional[bool] = None,
+    language: str = DEFAULT_LANGUAGE
 ) -> List[Question]:
     """
     Generate language learning questions using OpenAI.
     
+    Requests larger than the shard size are split into smaller sub-requests, each
+    given its own slice of the vocabulary, and run concurrently. A failing shard is
+    retried on its own; the merged result is de-duplicated by question text.
+    
     Args:
         words: List of dictionaries containing vietnamese_word and english_definition
         grammar: List of dictionaries containing grammar_point, english_explanation, and example_sentence
         num_questions: Number of questions to generate
         difficulty: Optional difficulty level (easy, medium, hard)
+        seed: Optional sampling seed passed to the model for reproducible output
+        use_cache: Whether to read and write the question cache
+        llm_client: Client to call instead of the default OpenAI one (e.g. a local endpoint)
+        model: Model name sent with each call
+        structured_output: Ask for JSON matching the Question schema (defaults to settings)
+        language: Language code of the vocabulary, named in the prompts
     
     Returns:
         List of Question objects
     """
-    # Build the prompt
-    words_str: str = "\n".join([
-        f"- {w['vietnamese_word']}: {w['english_definition']}" 
-        for w in words
-    ])
-    grammar_str: str = "\n".join([
-        f"- {g['grammar_point']}: {g['english_explanation']}" + 
-        (f" (Example: {g['example_sentence']})" if g.get('example_sentence') else "")
-        for g in grammar
-    ])
+    shard_size: int = max(1, settings.generation_shard_size)
+    if num_questions <= shard_size:
+        return await _generate_batch(
+            words, grammar, num_questions, difficulty, seed, use_cache, llm_client, model, structured_output,
+            language
+        )
     
-    difficulty_note: str = f"\nDifficulty level: {difficulty}" if difficulty else ""
+    shards = _plan_shards(words, grammar, num_questions, shard_size)
+    semaphore = asyncio.Semaphore(max(1, settings.generation_max_concurrency))
     
-    prompt: str = f"""You are a Vietnamese language teacher creating quiz questions.
-
-Known Words:
-{words_str}
+    async def run_shard(index: int, shard: Shard) -> List[Question]:
+        shard_words, shard_grammar, shard_questions = shard
+        shard_seed = seed + index if seed is not None else None
+        attempts = max(0, settings.generation_shard_retries) + 1
+        async with semaphore:
+            for attempt in range(1, attempts + 1):
+                try:
+                    return await _generate_batch(
+                        shard_words, shard_grammar, shard_questions, difficulty, shard_seed, use_cache,
+                        llm_client, model, structured_output, language
+                    )
+                except UpstreamUnavailable:
+                    # The client has already retried; the upstream is not going to recover in time
+                    raise
+                except Exception:
+                    if attempt == attempts:
+                        raise
+                    logger.warning("Question shard %d failed (attempt %d/%d), retrying", index, attempt, attempts)
+        return []
+    
+    results = await asyncio.gather(
+        *(run_shard(i, shard) for i, shard in enumerate(shards)),
+        return_exceptions=True
+    )
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if len(failures) == len(results):
+        raise failures[0]
+    for failure in failures:
+        logger.error("Question shard failed after retries: %r", failure)
+    
+    # Merge shards, dropping questions another shard already asked
+    seen: set[str] = set()
+    questions: List[Question] = []
+    for result in results:
+        if isinstance(result, BaseException):
+            continue
+        for question in result:
+            key = _normalize_question_text(question.question)
+            if key not in seen:
+                seen.add(key)
+                questions.append(question)
+    return questions[:num_questions]
 
-Known Grammar:
-{grammar_str}
-{difficulty_note}
+def _plan_shards(
+    words: List[Dict[str, str]],
+    grammar: List[Dict[str, Optional[str]]],
+    num_questions: int,
+    shard_size: int
+) -> List[Shard]:
+    """Split a request into evenly sized shards, dealing the vocabulary out round-robin."""
+    count = -(-num_questions // shard_size)
+    base, extra = divmod(num_questions, count)
+    shards: List[Shard] = []
+    for i in range(count):
+        shard_words = words[i::count]
+        shard_grammar = grammar[i::count]
+        if not shard_words and not shard_grammar:
+            shard_words, shard_grammar = words, grammar
+        shards.append((shard_words, shard_grammar, base + (1 if i < extra else 0)))
+    return shards
 
-Create {num_questions} multiple-choice questions that test the student's understanding of these words and grammar points.
-Each question should have 2-6 answer choices with exactly one correct answer.
+def _normalize_question_text(text: str) -> str:
+    """Normalize question text for de-duplication."""
+    return re.sub(r"\s+", " ", text).strip().casefold()
 
-Return ONLY valid JSON in this exact format:
-[
-  {{
-    "question_type": 1,
-    "question": "What does 'xin chào' mean?",
-    "answers": ["Hello", "Goodbye", "Thank you", "Please"],
-    "correct_idx": 0
-  }}
-]
-"""
+async def _generate_batch(
+    words: List[Dict[str, str]],
+    grammar: List[Dict[str, Optional[str]]],
+    num_questions: int,
+    difficulty: Optional[str],
+    seed: Optional[int],
+    use_cache: bool,
+    llm_client: Optional[ResilientChatClient] = None,
+    model: str = MODEL,
+    structured_output: Optional[bool] = None,
+    language: str = DEFAULT_LANGUAGE
+) -> List[Question]:
+    """
+    Generate one batch of questions with a single completion call.
+    
+    Identical prompts are answered from the question cache when one is configured,
+    and concurrent identical prompts share a single in-flight call. Invalid items
+    are dropped and only the missing count is requested again.
+    
+    Args:
+        words: List of dictionaries containing vietnamese_word and english_definition
+        grammar: List of dictionaries containing grammar_point, english_explanation, and example_sentence
+        num_questions: Number of questions to generate
+        difficulty: Optional difficulty level (easy, medium, hard)
+        seed: Optional sampling seed passed to the model for reproducible output
+        use_cache: Whether to read and write the question cache and join in-flight calls
+        llm_client: Client to call instead of the default OpenAI one
+        model: Model name sent with the call
+        structured_output: Ask for JSON matching the Question schema (defaults to settings)
+        language: Language code of the vocabulary, named in the prompts
     
-    response = await client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "system", 
-                "content": "You are a helpful Vietnamese language teacher. You always respond with valid JSON."
-            },
-            {"role": "user", "content": prompt}
-        ],
-        response_format={"type": "json_object"},
-        temperature=0.7
+    Returns:
+        List of Question objects
+    """
+    with stage("prompt_build"):
+        prompt: str = build_prompt(words, grammar, num_questions, difficulty, language)
+        cache_key: str = prompt_cache_key(prompt, seed, model, language)
+    chat: ResilientChatClient = llm_client or get_llm()
+    response_format = _response_format(structured_output)
+    
+    if not use_cache:
+        return await _complete(
+            chat, model, response_format, prompt, cache_key, num_questions, seed, use_cache=False, language=language
+        )
+    return await inflight.do(
+        f"prompt:{cache_key}",
+        lambda: _complete(
+            chat, model, response_format, prompt, cache_key, num_questions, seed, use_cache=True, language=language
+        )
     )
+
+def _response_format(structured_output: Optional[bool]) -> Dict[str, Any]:
+    """Choose strict JSON-schema output or plain JSON mode."""
+    structured = settings.openai_structured_outputs if structured_output is None else structured_output
+    return question_response_format() if structured else {"type": "json_object"}
+
+def _top_up_message(missing: int, rejected: int) -> "ChatCompletionMessageParam":
+    """Ask the model for just the questions a previous answer failed to deliver."""
+    problem = f"{rejected} of those questions were invalid" if rejected else "That was not enough questions"
+    return {
+        "role": "user",
+        "content": (
+            f"{problem}. Create {missing} more different questions in the same JSON format. "
+            "Each needs 2-6 answers and a correct_idx that is a valid index into its answers."
+        )
+    }
+
+async def _complete(
+    chat: ResilientChatClient,
+    model: str,
+    response_format: Dict[str, Any],
+    prompt: str,
+    cache_key: str,
+    num_questions: int,
+    seed: Optional[int],
+    use_cache: bool,
+    language: str = DEFAULT_LANGUAGE
+) -> List[Question]:
+    """
+    Answer a rendered prompt from the cache, or with a completion call plus any top-ups.
+    
+    With a shared store and a cache every worker reads, one worker of the
+    deployment calls the model for a prompt; the others wait for its answer to
+    land in the cache.
+    """
+    async def call() -> List[Question]:
+        return await _call_model(
+            chat, model, response_format, prompt, cache_key, num_questions, seed, use_cache, language
+        )
+    
+    if use_cache and question_cache is not None:
+        cached = await question_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        if shared_inflight is not None and question_cache.shared:
+            cache = question_cache
+            # The lock outlives every attempt's deadline, so only a dead worker's lock expires
+            ttl = settings.llm_timeout_seconds * (max(0, settings.generation_max_topups) + 1) + 5
+            return await shared_inflight.do(f"prompt:{cache_key}", call, lambda: cache.get(cache_key), ttl)
+    return await call()
+
+async def _call_model(
+    chat: ResilientChatClient,
+    model: str,
+    response_format: Dict[str, Any],
+    prompt: str,
+    cache_key: str,
+    num_questions: int,
+    seed: Optional[int],
+    use_cache: bool,
+    language: str = DEFAULT_LANGUAGE
+) -> List[Question]:
+    """Make the completion call plus any top-ups, caching the result."""
+    started: float = time.perf_counter()
+    messages: List[ChatCompletionMessageParam] = build_messages(prompt, language)
+    questions: List[Question] = []
+    seen: set[str] = set()
+    total_tokens: int = 0
+    for attempt in range(max(0, settings.generation_max_topups) + 1):
+        missing = num_questions - len(questions)
+        with stage("llm_call"):
+            response = await chat.create(
+                estimated_tokens=estimate_call_tokens(prompt, missing),
+                model=model,
+                messages=messages,
+                response_format=response_format,
+                temperature=TEMPERATURE,
+                seed=seed
+            )
+        total_tokens += response.usage.total_tokens if response.usage else 0
+        record_usage(model, response.usage)
+        
+        # Keep every valid item; one bad item no longer discards the batch
+        content: str = response.choices[0].message.content or "[]"
+        with stage("validation"):
+            parsed = parse_questions(content)
+            for question in parsed.questions:
+                key = _normalize_question_text(question.question)
+                if key not in seen:
+                    seen.add(key)
+                    questions.append(question)
+        if parsed.rejected:
+            logger.warning("Dropped %d invalid question(s) from the model response", parsed.rejected)
+        if len(questions) >= num_questions:
+            break
+        
+        # Ask only for what is still missing, with the previous answer as context
+        messages = messages + [
+            {"role": "assistant", "content": content},
+            _top_up_message(num_questions - len(questions), parsed.rejected),
+        ]
+    elapsed: float = time.perf_counter() - started
+    questions = questions[:num_questions]
+    
+    # An empty answer is cached too, so workers waiting on this call read it rather than calling again
+    if use_cache and question_cache is not None:
+        await question_cache.set(cache_key, questions, generation_seconds=elapsed, total_tokens=total_tokens)
+    
+    return questions
+
+async def stream_questions(
+    words: List[Dict[str, str]],
+    grammar: List[Dict[str, Optional[str]]],
+    num_questions: int = 5,
+    difficulty: Optional[str] = None,
+    seed: Optional[int] = None,
+    llm_client: Optional[ResilientChatClient] = None,
+    model: str = MODEL,
+    structured_output: Optional[bool] = None,
+    language: str = DEFAULT_LANGUAGE
+) -> AsyncIterator[Question]:
+    """
+    Generate questions with a streaming completion, yielding each one as soon as it is complete.
     
-    # Parse the response
-    content: str = response.choices[0].message.content or "[]"
-    questions_data: List[Dict] | Dict = json.loads(content)
+    Items that fail validation are skipped rather than failing the whole stream.
+    Cached results are replayed, and a finished stream is written to the cache.
+    
+    Args:
+        words: List of dictionaries containing vietnamese_word and english_definition
+        grammar: List of dictionaries containing grammar_point, english_explanation, and example_sentence
+        num_questions: Number of questions to generate
+        difficulty: Optional difficulty level (easy, medium, hard)
+        seed: Optional sampling seed passed to the model for reproducible output
+        llm_client: Client to call instead of the default OpenAI one
+        model: Model name sent with the call
+        structured_output: Ask for JSON matching the Question schema (defaults to settings)
+        language: Language code of the vocabulary, named in the prompts
+    
+    Yields:
+        Question objects in the order the model writes them
+    """
+    with stage("prompt_build"):
+        prompt: str = build_prompt(words, grammar, num_questions, difficulty, language)
+        cache_key: str = prompt_cache_key(prompt, seed, model, language)
+    chat: ResilientChatClient = llm_client or get_llm()
     
-    # Handle both array and object responses
-    if isinstance(questions_data, dict) and "questions" in questions_data:
-        questions_data = questions_data["questions"]
+    if question_cache is not None:
+        cached = await question_cache.get(cache_key)
+        if cached is not None:
+            for question in cached:
+                yield question
+            return
     
-    # Validate with Pydantic
-    questions: List[Question] = [Question(**q) for q in questions_data]
+    started: float = time.perf_counter()
+    parser = ArrayItemParser()
+    questions: List[Question] = []
+    total_tokens: int = 0
+    # Closed even when our caller stops early, so the call's concurrency slot is freed
+    async with aclosing(chat.stream(
+        estimated_tokens=estimate_call_tokens(prompt, num_questions),
+        model=model,
+        messages=build_messages(prompt, language),
+        response_format=_response_format(structured_output),
+        temperature=TEMPERATURE,
+        seed=seed,
+        stream_options={"include_usage": True}
+    )) as chunks:
+        async for chunk in chunks:
+            if chunk.usage:
+                total_tokens = chunk.usage.total_tokens
+                record_usage(model, chunk.usage)
+            if not chunk.choices:
+                continue
+            for item in parser.feed(chunk.choices[0].delta.content or ""):
+                parsed = validate_item(item)
+                if parsed is None:
+                    logger.warning("Skipping invalid streamed question: %s", item)
+                    continue
+                questions.append(parsed)
+                yield parsed
     
-    return questions
\ No newline at end of file
+    if question_cache is not None and questions:
+        elapsed: float = time.perf_counter() - started
+        await question_cache.set(cache_key, questions, generation_seconds=elapsed, total_tokens=total_tokens)
\ No newline at end of file
@@ -0,0 +1,120 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+import orjson
+from sqlalchemy import Result, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from app.languages import DEFAULT_LANGUAGE
+from app.models import Word, Grammar
+from app.responses import ORJSON_OPTIONS
+
+DEFAULT_PAGE_SIZE: int = 100
+MAX_PAGE_SIZE: int = 1000
+STREAM_CHUNK_SIZE: int = 1000
+
+# Column projections used for read-only listing, in the field order of WordResponse and
+# GrammarResponse so rows can be encoded as responses without re-validation
+WORD_COLUMNS: Sequence[InstrumentedAttribute[Any]] = (
+    Word.vietnamese_word,
+    Word.english_definition,
+    Word.language,
+    Word.id,
+    Word.created_at,
+)
+
+GRAMMAR_COLUMNS: Sequence[InstrumentedAttribute[Any]] = (
+    Grammar.grammar_point,
+    Grammar.english_explanation,
+    Grammar.example_sentence,
+    Grammar.language,
+    Grammar.id,
+    Grammar.created_at,
+)
+
+
+def _column(columns: Sequence[InstrumentedAttribute[Any]], key: str) -> InstrumentedAttribute[Any]:
+    return next(column for column in columns if column.key == key)
+
+
+def _id_column(columns: Sequence[InstrumentedAttribute[Any]]) -> InstrumentedAttribute[Any]:
+    return _column(columns, "id")
+
+
+def row_dicts(result: Result[Any]) -> List[Dict[str, Any]]:
+    """Turn result row tuples into dicts in column order."""
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+async def fetch_page(
+    db: AsyncSession,
+    columns: Sequence[InstrumentedAttribute[Any]],
+    after: Optional[int],
+    limit: int,
+    language: str = DEFAULT_LANGUAGE
+) -> List[Dict[str, Any]]:
+    """
+    Fetch one keyset page of one language's rows as plain dicts, ordered by id.
+
+    The (language, id) index serves the page as a single range scan, however
+    many rows other languages have.
+
+    Args:
+        db: Database session
+        columns: Projected columns, including the id and language columns
+        after: Only return rows with an id greater than this cursor
+        limit: Maximum number of rows to return
+        language: Language code of the rows
+
+    Returns:
+        List of row dictionaries keyed by column name
+    """
+    id_column = _id_column(columns)
+    stmt = (
+        select(*columns)
+        .where(_column(columns, "language") == language)
+        .order_by(id_column)
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(id_column > after)
+    return row_dicts(await db.execute(stmt))
+
+
+async def fetch_row(
+    db: AsyncSession,
+    columns: Sequence[InstrumentedAttribute[Any]],
+    row_id: int
+) -> Optional[Dict[str, Any]]:
+    """Fetch a single row by id as a plain dict, or None if it does not exist."""
+    rows = row_dicts(await db.execute(select(*columns).where(_id_column(columns) == row_id)))
+    return rows[0] if rows else None
+
+
+async def fetch_rows(
+    db: AsyncSession,
+    columns: Sequence[InstrumentedAttribute[Any]],
+    row_ids: Sequence[int]
+) -> Dict[int, Dict[str, Any]]:
+    """Fetch rows by id as plain dicts keyed by id; ids that do not exist are left out."""
+    if not row_ids:
+        return {}
+    rows = row_dicts(await db.execute(select(*columns).where(_id_column(columns).in_(row_ids))))
+    return {row["id"]: row for row in rows}
+
+
+async def stream_ndjson(
+    db: AsyncSession,
+    columns: Sequence[InstrumentedAttribute[Any]],
+    after: Optional[int] = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    language: str = DEFAULT_LANGUAGE
+) -> AsyncIterator[bytes]:
+    """Yield every row of a language after the cursor as NDJSON, one keyset chunk at a time."""
+    while True:
+        rows = await fetch_page(db, columns, after, chunk_size, language)
+        if not rows:
+            return
+        yield b"".join(orjson.dumps(row, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE) for row in rows)
+        if len(rows) < chunk_size:
+            return
+        after = rows[-1]["id"]
@@ -0,0 +1,26 @@
+from typing import Any, Mapping
+
+
+def format_word_line(word: Mapping[str, Any]) -> str:
+    """Render a word as one line of the prompt."""
+    return f"- {word['vietnamese_word']}: {word['english_definition']}"
+
+
+def format_grammar_line(grammar: Mapping[str, Any]) -> str:
+    """Render a grammar point as one line of the prompt."""
+    return (
+        f"- {grammar['grammar_point']}: {grammar['english_explanation']}" +
+        (f" (Example: {grammar['example_sentence']})" if grammar.get('example_sentence') else "")
+    )
+
+
+def word_line(word: Mapping[str, Any]) -> str:
+    """The word's stored prompt line, rendered when the row has none."""
+    line: str | None = word.get("prompt_line")
+    return line if line is not None else format_word_line(word)
+
+
+def grammar_line(grammar: Mapping[str, Any]) -> str:
+    """The grammar point's stored prompt line, rendered when the row has none."""
+    line: str | None = grammar.get("prompt_line")
+    return line if line is not None else format_grammar_line(grammar)
@@ -0,0 +1,282 @@
+from typing import Dict, List, Optional, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+import hashlib
+import json
+import logging
+import time
+import orjson
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.config import settings
+from app.database import Base, async_session_maker
+from app.models import QuestionCacheEntry
+from app.schemas import Question
+from app.shared_store import SharedStore, shared_store
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedQuestions:
+    """A cached generation result and what it cost to produce."""
+    questions: List[Question]
+    generation_seconds: float = 0.0
+    total_tokens: int = 0
+
+
+def make_cache_key(prompt: str, **params: object) -> str:
+    """Hash a rendered prompt and the model parameters into a cache key."""
+    material = json.dumps({"prompt": prompt, "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class QuestionCache(ABC):
+    """Content-addressed cache of generated questions with TTL and LRU eviction."""
+
+    backend: str = "abstract"
+    # Whether every worker reads the same entries
+    shared: bool = False
+
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.saved_tokens = 0
+
+    async def get(self, key: str) -> Optional[List[Question]]:
+        """Return the cached questions for a key, counting the hit or miss."""
+        entry = await self._get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_seconds += entry.generation_seconds
+        self.saved_tokens += entry.total_tokens
+        return entry.questions
+
+    async def set(
+        self,
+        key: str,
+        questions: List[Question],
+        generation_seconds: float = 0.0,
+        total_tokens: int = 0
+    ) -> None:
+        """Store questions under a key, evicting the least recently used entries."""
+        await self._set(key, CachedQuestions(questions, generation_seconds, total_tokens))
+
+    async def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        await self._clear()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.saved_tokens = 0
+
+    async def stats(self) -> Dict[str, float | int | str]:
+        """Return hit/miss counters and the latency and tokens saved by hits."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "entries": await self._size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "saved_tokens": self.saved_tokens,
+        }
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[CachedQuestions]: ...
+
+    @abstractmethod
+    async def _set(self, key: str, entry: CachedQuestions) -> None: ...
+
+    @abstractmethod
+    async def _clear(self) -> None: ...
+
+    @abstractmethod
+    async def _size(self) -> int: ...
+
+
+class MemoryQuestionCache(QuestionCache):
+    """Process-local cache backed by an ordered dict."""
+
+    backend = "memory"
+
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        super().__init__(ttl_seconds, max_entries)
+        self._entries: OrderedDict[str, Tuple[float, CachedQuestions]] = OrderedDict()
+
+    async def _get(self, key: str) -> Optional[CachedQuestions]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def _set(self, key: str, entry: CachedQuestions) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _clear(self) -> None:
+        self._entries.clear()
+
+    async def _size(self) -> int:
+        return len(self._entries)
+
+
+class DatabaseQuestionCache(QuestionCache):
+    """
+    Persistent cache stored in the question_cache table.
+
+    Hits only read. The time each entry was last used is kept in memory and
+    written in one batch by the next `set`, just before it evicts the least
+    recently used rows.
+    """
+
+    backend = "database"
+    shared = True
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        max_entries: int,
+        session_maker: async_sessionmaker[AsyncSession] = async_session_maker
+    ) -> None:
+        super().__init__(ttl_seconds, max_entries)
+        self._session_maker = session_maker
+        self._last_used: Dict[str, datetime] = {}
+
+    async def _get(self, key: str) -> Optional[CachedQuestions]:
+        now = datetime.now(UTC)
+        async with self._session_maker() as session:
+            row = await session.get(QuestionCacheEntry, key)
+            if row is None:
+                return None
+            if row.expires_at <= now.replace(tzinfo=row.expires_at.tzinfo):
+                await session.delete(row)
+                await session.commit()
+                return None
+            self._last_used[key] = now
+            return CachedQuestions(
+                questions=[Question(**q) for q in json.loads(row.payload)],
+                generation_seconds=row.generation_seconds,
+                total_tokens=row.total_tokens,
+            )
+
+    async def _set(self, key: str, entry: CachedQuestions) -> None:
+        now = datetime.now(UTC)
+        last_used, self._last_used = self._last_used, {}
+        last_used.pop(key, None)
+        async with self._session_maker() as session:
+            if last_used:
+                table = Base.metadata.tables[QuestionCacheEntry.__tablename__]
+                stmt = update(table).where(table.c.key == bindparam("entry_key")).values(last_used_at=bindparam("used_at"))
+                await session.execute(stmt, [{"entry_key": k, "used_at": t} for k, t in last_used.items()])
+            await session.merge(QuestionCacheEntry(
+                key=key,
+                payload=json.dumps([q.model_dump() for q in entry.questions], ensure_ascii=False),
+                generation_seconds=entry.generation_seconds,
+                total_tokens=entry.total_tokens,
+                expires_at=now + timedelta(seconds=self.ttl_seconds),
+                last_used_at=now,
+            ))
+            await session.flush()
+
+            # Drop expired rows, then the least recently used beyond the size bound
+            await session.execute(
+                delete(QuestionCacheEntry).where(QuestionCacheEntry.expires_at <= now)
+            )
+            overflow = await session.scalar(select(func.count()).select_from(QuestionCacheEntry))
+            if overflow is not None and overflow > self.max_entries:
+                oldest = (
+                    select(QuestionCacheEntry.key)
+                    .order_by(QuestionCacheEntry.last_used_at)
+                    .limit(overflow - self.max_entries)
+                )
+                await session.execute(
+                    delete(QuestionCacheEntry).where(QuestionCacheEntry.key.in_(oldest))
+                )
+            await session.commit()
+
+    async def _clear(self) -> None:
+        self._last_used.clear()
+        async with self._session_maker() as session:
+            await session.execute(delete(QuestionCacheEntry))
+            await session.commit()
+
+    async def _size(self) -> int:
+        async with self._session_maker() as session:
+            count = await session.scalar(select(func.count()).select_from(QuestionCacheEntry))
+            return count or 0
+
+
+class SharedQuestionCache(QuestionCache):
+    """
+    Cache kept in the shared store, so every worker answers from the same entries.
+
+    Entries expire after the TTL. The size bound is left to the store's own
+    eviction policy (e.g. Redis `maxmemory-policy allkeys-lru`).
+    """
+
+    backend = "shared"
+    shared = True
+
+    def __init__(self, ttl_seconds: int, max_entries: int, store: SharedStore) -> None:
+        super().__init__(ttl_seconds, max_entries)
+        self._store = store
+
+    async def _get(self, key: str) -> Optional[CachedQuestions]:
+        payload = await self._store.get(f"questions:{key}")
+        if payload is None:
+            return None
+        entry = orjson.loads(payload)
+        return CachedQuestions(
+            questions=[Question.model_validate(q) for q in entry["questions"]],
+            generation_seconds=entry["generation_seconds"],
+            total_tokens=entry["total_tokens"],
+        )
+
+    async def _set(self, key: str, entry: CachedQuestions) -> None:
+        payload = orjson.dumps({
+            "questions": [q.model_dump() for q in entry.questions],
+            "generation_seconds": entry.generation_seconds,
+            "total_tokens": entry.total_tokens,
+        })
+        await self._store.set(f"questions:{key}", payload, self.ttl_seconds)
+
+    async def _clear(self) -> None:
+        await self._store.delete_prefix("questions:")
+
+    async def _size(self) -> int:
+        return await self._store.count_prefix("questions:")
+
+
+def create_question_cache() -> Optional[QuestionCache]:
+    """Build the cache backend selected in settings."""
+    if settings.question_cache_backend == "memory":
+        return MemoryQuestionCache(settings.question_cache_ttl_seconds, settings.question_cache_max_entries)
+    if settings.question_cache_backend == "database":
+        return DatabaseQuestionCache(settings.question_cache_ttl_seconds, settings.question_cache_max_entries)
+    if settings.question_cache_backend == "shared":
+        if shared_store is not None:
+            return SharedQuestionCache(
+                settings.question_cache_ttl_seconds, settings.question_cache_max_entries, shared_store
+            )
+        logger.warning("QUESTION_CACHE_BACKEND=shared needs a SHARED_STORE_BACKEND; using the memory cache")
+        return MemoryQuestionCache(settings.question_cache_ttl_seconds, settings.question_cache_max_entries)
+    return None
+
+
+question_cache: Optional[QuestionCache] = create_question_cache()
@@ -0,0 +1,90 @@
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+import json
+from pydantic import TypeAdapter, ValidationError
+from app.json_stream import ArrayItemParser
+from app.schemas import Question
+
+QUESTION_LIST_ADAPTER: TypeAdapter[List[Question]] = TypeAdapter(List[Question])
+QUESTION_ADAPTER: TypeAdapter[Question] = TypeAdapter(Question)
+
+# Schema keywords kept when deriving the strict structured-output schema
+_STRICT_KEYWORDS = {"type", "properties", "items", "required", "description", "enum"}
+
+
+@dataclass
+class ParsedQuestions:
+    """Questions salvaged from one model response."""
+    questions: List[Question]
+    rejected: int = 0
+
+
+def extract_items(content: str) -> List[Any]:
+    """
+    Pull the raw question items out of a model response.
+
+    Accepts a bare array, an object with a "questions" array or a single
+    question object. Truncated or otherwise broken JSON still yields every item
+    that was complete before the damage.
+    """
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return list(ArrayItemParser().feed(content))
+    if isinstance(data, dict):
+        data = data.get("questions", [data])
+    return data if isinstance(data, list) else []
+
+
+def parse_questions(content: str) -> ParsedQuestions:
+    """
+    Validate every item of a model response in one pass, keeping the valid ones.
+
+    The whole list is validated with a single TypeAdapter call. If any item
+    fails, the failing indexes are read from the error and only the rest are
+    validated again, so one bad item no longer costs the whole batch.
+    """
+    items = extract_items(content)
+    try:
+        return ParsedQuestions(QUESTION_LIST_ADAPTER.validate_python(items))
+    except ValidationError as exc:
+        bad = {error["loc"][0] for error in exc.errors() if error["loc"]}
+    valid = [item for index, item in enumerate(items) if index not in bad]
+    return ParsedQuestions(QUESTION_LIST_ADAPTER.validate_python(valid), rejected=len(items) - len(valid))
+
+
+def validate_item(item: Any) -> Optional[Question]:
+    """Validate one streamed item, returning None if it is not a valid question."""
+    try:
+        return QUESTION_ADAPTER.validate_python(item)
+    except ValidationError:
+        return None
+
+
+def _strict_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a JSON schema to what strict structured outputs accept: closed objects, all fields required."""
+    strict = {key: value for key, value in schema.items() if key in _STRICT_KEYWORDS}
+    if "properties" in strict:
+        strict["properties"] = {name: _strict_schema(prop) for name, prop in strict["properties"].items()}
+        strict["required"] = list(strict["properties"])
+        strict["additionalProperties"] = False
+    if "items" in strict:
+        strict["items"] = _strict_schema(strict["items"])
+    return strict
+
+
+def question_response_format() -> Dict[str, Any]:
+    """OpenAI `response_format` asking for {"questions": [...]} matching the Question schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "questions",
+            "strict": True,
+            "schema": _strict_schema({
+                "type": "object",
+                "properties": {
+                    "questions": {"type": "array", "items": Question.model_json_schema()},
+                },
+            }),
+        },
+    }
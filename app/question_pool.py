@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+import asyncio
+import logging
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.config import settings
+from app.languages import DEFAULT_LANGUAGE
+from app.models import PooledQuestion
+from app.openai_service import generate_questions
+from app.llm_client import UpstreamUnavailable
+from app.context_selector import select_context
+from app.schemas import Question
+from app.shared_store import hold_lock, shared_store
+
+logger = logging.getLogger(__name__)
+
+POOL_DIFFICULTIES: Tuple[str, ...] = ("easy", "medium", "hard")
+MAX_QUESTIONS_PER_CALL: int = 20
+# A refill pass holds this lock, so one worker of a deployment refills at a time.
+# It expires in case the holder dies mid-pass.
+REFILL_LOCK_TTL_SECONDS: float = 300.0
+
+
+@dataclass
+class PoolTake:
+    """Questions taken from the pool, with the rows needed to put them back."""
+    questions: List[Question] = field(default_factory=list)
+    # Column values of each question's row, in the same order, without the id
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+
+    def after(self, delivered: int) -> "PoolTake":
+        """The part of the take past its first `delivered` questions."""
+        return PoolTake(self.questions[delivered:], self.rows[delivered:])
+
+    def __add__(self, other: "PoolTake") -> "PoolTake":
+        return PoolTake(self.questions + other.questions, self.rows + other.rows)
+
+
+async def take_from_pool(
+    db: AsyncSession,
+    difficulty: Optional[str],
+    count: int,
+    language: str = DEFAULT_LANGUAGE
+) -> PoolTake:
+    """
+    Remove and return up to `count` pooled questions in one language.
+
+    The rows are deleted in the caller's transaction. Commit it before doing
+    anything slow: on SQLite an open write transaction locks every other
+    writer out. Questions that end up undelivered go back with return_to_pool.
+
+    Args:
+        db: Database session
+        difficulty: Difficulty to draw from, or None for any difficulty
+        count: Maximum number of questions to take
+        language: Language code the questions test
+
+    Returns:
+        The questions, oldest first, and their rows
+    """
+    ids = (
+        select(PooledQuestion.id)
+        .where(PooledQuestion.language == language)
+        .order_by(PooledQuestion.id)
+        .limit(count)
+    )
+    if difficulty is not None:
+        ids = ids.where(PooledQuestion.difficulty == difficulty)
+    result = await db.execute(
+        delete(PooledQuestion)
+        .where(PooledQuestion.id.in_(ids.scalar_subquery()))
+        .returning(*PooledQuestion.__table__.columns)
+    )
+    rows = sorted(result.mappings().all(), key=lambda row: row["id"])
+    return PoolTake(
+        questions=[
+            Question(
+                question_type=row["question_type"],
+                question=row["question"],
+                answers=row["answers"],
+                correct_idx=row["correct_idx"],
+            )
+            for row in rows
+        ],
+        rows=[{key: value for key, value in row.items() if key != "id"} for row in rows],
+    )
+
+
+def return_to_pool(db: AsyncSession, taken: PoolTake) -> None:
+    """Stage taken questions for insertion back into the pool, behind the questions already there."""
+    db.add_all([PooledQuestion(**row) for row in taken.rows])
+
+
+def add_to_pool(
+    db: AsyncSession,
+    questions: List[Question],
+    difficulty: str,
+    word_ids: List[int],
+    grammar_ids: List[int],
+    language: str = DEFAULT_LANGUAGE
+) -> None:
+    """Stage validated questions for insertion into the pool."""
+    db.add_all([
+        PooledQuestion(
+            language=language,
+            difficulty=difficulty,
+            word_ids=word_ids,
+            grammar_ids=grammar_ids,
+            **q.model_dump()
+        )
+        for q in questions
+    ])
+
+
+async def pool_counts(db: AsyncSession, language: str = DEFAULT_LANGUAGE) -> Dict[str, int]:
+    """Count one language's pooled questions per difficulty."""
+    result = await db.execute(
+        select(PooledQuestion.difficulty, func.count())
+        .where(PooledQuestion.language == language)
+        .group_by(PooledQuestion.difficulty)
+    )
+    counts = {difficulty: 0 for difficulty in POOL_DIFFICULTIES}
+    counts.update({difficulty: count for difficulty, count in result.tuples()})
+    return counts
+
+
+async def refill_pool(
+    session_maker: async_sessionmaker[AsyncSession],
+    language: str = DEFAULT_LANGUAGE
+) -> Dict[str, int]:
+    """
+    Top up every difficulty of one language's pool that has dropped below the low watermark.
+
+    Args:
+        session_maker: Factory for the sessions used to read vocabulary and write questions
+        language: Language whose vocabulary the questions are generated from
+
+    Returns:
+        Number of questions added per difficulty
+    """
+    added = {difficulty: 0 for difficulty in POOL_DIFFICULTIES}
+    async with session_maker() as db:
+        counts = await pool_counts(db, language)
+        low = [d for d in POOL_DIFFICULTIES if counts[d] < settings.question_pool_low_watermark]
+        if not low:
+            return added
+
+        for difficulty in low:
+            missing = settings.question_pool_target_size - counts[difficulty]
+            while missing > 0:
+                # A fresh sample per batch spreads the pool across the vocabulary
+                context = await select_context(db, language=language)
+                if context.is_empty:
+                    return added
+                questions = await generate_questions(
+                    words=context.words,
+                    grammar=context.grammar,
+                    num_questions=min(missing, MAX_QUESTIONS_PER_CALL),
+                    difficulty=difficulty,
+                    use_cache=False,
+                    language=language
+                )
+                if not questions:
+                    break
+                add_to_pool(db, questions, difficulty, context.word_ids, context.grammar_ids, language)
+                await db.commit()
+                added[difficulty] += len(questions)
+                missing -= len(questions)
+    return added
+
+
+async def run_refill_worker(
+    session_maker: async_sessionmaker[AsyncSession],
+    interval_seconds: float
+) -> None:
+    """
+    Refill each configured language's pool forever, sleeping between passes. Cancel the task to stop it.
+
+    With a shared store, a pass is skipped while another worker is running one.
+    """
+    while True:
+        try:
+            async with hold_lock(shared_store, "question-pool-refill", REFILL_LOCK_TTL_SECONDS) as leader:
+                if leader:
+                    for language in settings.question_pool_languages:
+                        added = await refill_pool(session_maker, language)
+                        if any(added.values()):
+                            logger.info("Refilled %s question pool: %s", language, added)
+        except asyncio.CancelledError:
+            raise
+        except UpstreamUnavailable as exc:
+            logger.warning("Question pool refill skipped, model API unavailable: %s", exc)
+        except Exception:
+            logger.exception("Question pool refill failed")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,305 @@
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, UTC
+import asyncio
+import logging
+import uuid
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.config import settings
+from app.languages import DEFAULT_LANGUAGE
+from app.models import QuizAnswer, QuizSession
+from app.schemas import Question
+
+logger = logging.getLogger(__name__)
+
+
+class AlreadyAnswered(Exception):
+    """The question was already answered in this session."""
+
+
+@dataclass
+class ActiveSession:
+    """A quiz session held in memory: its questions and the answers given so far."""
+    id: str
+    user_id: Optional[str]
+    language: str
+    questions: List[Question]
+    expires_at: datetime
+    # Chosen answer index by question index
+    answers: Dict[int, int] = field(default_factory=dict)
+    score: int = 0
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at <= datetime.now(UTC)
+
+
+class AnswerBuffer:
+    """
+    Answers waiting to be written, flushed to the database in batched inserts.
+
+    Submitting an answer only appends to a list. A background task writes the
+    list with one executemany statement every interval, or as soon as a batch
+    fills up. Answers whose write fails are kept for the next flush, up to
+    `max_pending`; beyond that the oldest are dropped, so an outage cannot
+    exhaust memory. A batch rejected by a constraint is written row by row,
+    and only the rows that still fail are dropped.
+    """
+
+    def __init__(self, batch_size: int, max_pending: int) -> None:
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.flushed = 0
+        self.dropped = 0
+        self._pending: List[Dict[str, Any]] = []
+        # Created by the flush worker, so it belongs to the worker's event loop
+        self._batch_ready: Optional[asyncio.Event] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Queue one quiz_answers row for the next flush."""
+        self._pending.append(row)
+        self._trim()
+        if len(self._pending) >= self.batch_size and self._batch_ready is not None:
+            self._batch_ready.set()
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        """Put rows back in front of anything queued meanwhile."""
+        self._pending[:0] = rows
+        self._trim()
+
+    def _trim(self) -> None:
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            del self._pending[:excess]
+            self.dropped += excess
+            logger.error("Quiz answer buffer is full; dropped the %d oldest answers", excess)
+
+    def pending_for(self, session_id: str) -> List[Dict[str, Any]]:
+        """The queued rows of one session."""
+        return [row for row in self._pending if row["session_id"] == session_id]
+
+    async def wait(self, timeout: float) -> None:
+        """Sleep until a batch is full or `timeout` seconds have passed."""
+        if self._batch_ready is None:
+            self._batch_ready = asyncio.Event()
+        with suppress(TimeoutError):
+            await asyncio.wait_for(self._batch_ready.wait(), timeout)
+        self._batch_ready.clear()
+
+    async def flush(self, db: AsyncSession) -> int:
+        """
+        Write every queued answer in one statement and transaction.
+
+        Answers already stored for their question are skipped, so a retried
+        flush never fails on its own earlier rows. If the batch breaks a
+        constraint, each row is retried in a transaction of its own and the
+        rows that still break it are dropped.
+
+        Returns:
+            Number of answers taken from the queue
+        """
+        rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        dialect = db.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(QuizAnswer).on_conflict_do_nothing(index_elements=["session_id", "question_idx"])
+
+        async def write(batch: List[Dict[str, Any]]) -> None:
+            connection = await db.connection()
+            await connection.execute(stmt, batch)
+            await db.commit()
+
+        try:
+            await write(rows)
+        except IntegrityError:
+            await db.rollback()
+        except BaseException:
+            # Cancellation included
+            self._requeue(rows)
+            raise
+        else:
+            self.flushed += len(rows)
+            return len(rows)
+
+        for index, row in enumerate(rows):
+            try:
+                await write([row])
+            except IntegrityError:
+                await db.rollback()
+                self.dropped += 1
+                logger.error("Dropped a quiz answer the database rejects: %s", row, exc_info=True)
+            except BaseException:
+                self._requeue(rows[index:])
+                raise
+            else:
+                self.flushed += 1
+        return len(rows)
+
+    def clear(self) -> None:
+        """Drop every queued answer and reset the counters."""
+        self._pending = []
+        self.flushed = 0
+        self.dropped = 0
+
+
+class SessionStore:
+    """
+    Quiz sessions by id: an LRU of active sessions in front of the quiz_sessions table.
+
+    A session is written once, when it is created, and then served from memory,
+    so grading an answer is a dict lookup. Sessions evicted from memory, or
+    created by another process, are reloaded with their answers, including the
+    ones still waiting in the answer buffer.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, buffer: AnswerBuffer) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.buffer = buffer
+        self._sessions: OrderedDict[str, ActiveSession] = OrderedDict()
+
+    def _remember(self, session: ActiveSession) -> None:
+        self._sessions[session.id] = session
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_entries:
+            self._sessions.popitem(last=False)
+
+    async def create(
+        self,
+        db: AsyncSession,
+        questions: List[Question],
+        user_id: Optional[str] = None,
+        language: str = DEFAULT_LANGUAGE
+    ) -> ActiveSession:
+        """Store a new session and commit it."""
+        session = ActiveSession(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            language=language,
+            questions=questions,
+            expires_at=datetime.now(UTC) + timedelta(seconds=self.ttl_seconds),
+        )
+        db.add(QuizSession(
+            id=session.id,
+            user_id=user_id,
+            language=language,
+            questions=[question.model_dump() for question in questions],
+            expires_at=session.expires_at,
+        ))
+        await db.commit()
+        self._remember(session)
+        return session
+
+    async def get(self, db: AsyncSession, session_id: str) -> Optional[ActiveSession]:
+        """Return a session that has not expired, loading it from the database if needed."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = await self._load(db, session_id)
+            if session is None:
+                return None
+            self._remember(session)
+        else:
+            self._sessions.move_to_end(session_id)
+        if session.expired:
+            self._sessions.pop(session_id, None)
+            return None
+        return session
+
+    async def _load(self, db: AsyncSession, session_id: str) -> Optional[ActiveSession]:
+        row = await db.get(QuizSession, session_id)
+        if row is None:
+            return None
+        expires_at = row.expires_at
+        if expires_at.tzinfo is None:
+            # SQLite hands datetimes back without their zone; they were stored as UTC
+            expires_at = expires_at.replace(tzinfo=UTC)
+        session = ActiveSession(
+            id=row.id,
+            user_id=row.user_id,
+            language=row.language,
+            questions=[Question.model_validate(question) for question in row.questions],
+            expires_at=expires_at,
+        )
+        stored = await db.execute(
+            select(QuizAnswer.question_idx, QuizAnswer.answer_idx, QuizAnswer.correct)
+            .where(QuizAnswer.session_id == session_id)
+        )
+        answers = [
+            (question_idx, answer_idx, correct) for question_idx, answer_idx, correct in stored
+        ] + [
+            (queued["question_idx"], queued["answer_idx"], queued["correct"])
+            for queued in self.buffer.pending_for(session_id)
+        ]
+        for question_idx, answer_idx, correct in answers:
+            if question_idx not in session.answers:
+                session.answers[question_idx] = answer_idx
+                session.score += int(correct)
+        return session
+
+    def answer(self, session: ActiveSession, question_idx: int, answer_idx: int) -> bool:
+        """
+        Grade an answer and queue it for writing.
+
+        Returns:
+            Whether the answer is correct
+
+        Raises:
+            AlreadyAnswered: If the question was answered before in this session
+        """
+        if question_idx in session.answers:
+            raise AlreadyAnswered(f"Question {question_idx} was already answered")
+        correct = session.questions[question_idx].correct_idx == answer_idx
+        session.answers[question_idx] = answer_idx
+        session.score += int(correct)
+        self.buffer.add({
+            "session_id": session.id,
+            "question_idx": question_idx,
+            "answer_idx": answer_idx,
+            "correct": correct,
+            "answered_at": datetime.now(UTC),
+        })
+        return correct
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def clear(self) -> None:
+        """Forget every session held in memory; stored sessions can still be reloaded."""
+        self._sessions.clear()
+
+
+answer_buffer = AnswerBuffer(settings.quiz_answer_flush_batch_size, settings.quiz_answer_buffer_max_entries)
+quiz_sessions = SessionStore(
+    settings.quiz_session_ttl_seconds, settings.quiz_session_cache_max_entries, answer_buffer
+)
+
+
+async def flush_answers(session_maker: async_sessionmaker[AsyncSession]) -> int:
+    """Write the buffered answers in a session of their own."""
+    async with session_maker() as db:
+        return await answer_buffer.flush(db)
+
+
+async def run_answer_flusher(
+    session_maker: async_sessionmaker[AsyncSession],
+    interval_seconds: float
+) -> None:
+    """Flush buffered answers forever, every interval or whenever a batch fills. Cancel the task to stop it."""
+    while True:
+        await answer_buffer.wait(interval_seconds)
+        try:
+            await flush_answers(session_maker)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Writing quiz answers failed; keeping %d for the next flush", answer_buffer.pending)
@@ -0,0 +1,41 @@
+from typing import Any, Optional
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# UTC datetimes end in "Z" and int keys become strings, as pydantic serializes them
+ORJSON_OPTIONS: int = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON compactly with orjson, matching pydantic's JSON output for plain data."""
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson; the app's default response class."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted_json(content: Any, response: Optional[Response] = None, status_code: int = 200) -> ORJSONResponse:
+    """
+    Encode database rows straight to JSON, skipping response_model validation.
+
+    Returning a Response bypasses FastAPI's validate-then-serialize pass, so this
+    is only for content that already has the response model's shape, such as
+    rows projected with the model's columns in the model's field order. Headers
+    set on the injected `response` (ETag, cursors) are carried over, as FastAPI
+    would do for a returned value.
+    """
+    json_response = ORJSONResponse(content, status_code=status_code)
+    if response is not None:
+        json_response.headers.raw.extend(response.headers.raw)
+    return json_response
+
+
+def model_json(model: BaseModel, status_code: int = 200) -> Response:
+    """Serialize an already validated model in one pass, without re-validating it."""
+    return Response(model.model_dump_json(), status_code=status_code, media_type="application/json")
@@ -0,0 +1,64 @@
+from typing import Iterable, List, Optional
+from datetime import datetime, UTC
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.languages import partition
+from app.models import TableRevision
+
+
+async def bump_revision(db: AsyncSession, table: str) -> None:
+    """
+    Increment a table's revision counter in the caller's transaction.
+
+    Call this alongside every write to the table, before committing, so the
+    revision changes atomically with the rows it describes.
+    """
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    now = datetime.now(UTC)
+    stmt = insert(TableRevision).values(table_name=table, revision=1, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TableRevision.table_name],
+        set_={"revision": TableRevision.revision + 1, "updated_at": now}
+    )
+    connection = await db.connection()
+    await connection.execute(stmt)
+
+
+async def bump_vocabulary_revisions(db: AsyncSession, table: str, languages: Iterable[str]) -> List[str]:
+    """
+    Bump a vocabulary table's revision and those of the language partitions written.
+
+    Lists and deltas are versioned per language, so a write only changes the
+    ETags of its own language; single-row reads follow the table-wide revision.
+
+    Returns:
+        The revision names bumped, which are also the vocabulary cache namespaces to invalidate
+    """
+    names = [table, *(partition(table, language) for language in sorted(set(languages)))]
+    for name in names:
+        await bump_revision(db, name)
+    return names
+
+
+async def get_revision(db: AsyncSession, table: str) -> int:
+    """Return a table's current revision (0 if it has never been written)."""
+    revision = await db.scalar(
+        select(TableRevision.revision).where(TableRevision.table_name == table)
+    )
+    return revision or 0
+
+
+def make_etag(table: str, revision: int, *variant: object) -> str:
+    """Build a strong ETag for a representation of a table at a revision."""
+    parts = [table, str(revision), *("" if v is None else str(v) for v in variant)]
+    return '"' + "-".join(parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag.removeprefix("W/") for tag in candidates]
@@ -1,18 +1,73 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.database import get_db
+from typing import Annotated, Any, AsyncGenerator, AsyncIterator, Dict, List, Optional, Set, Tuple
+from contextlib import aclosing
+import asyncio
+import logging
+import math
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.config import settings
+from app.database import get_db, get_session_maker
+from app.languages import DEFAULT_LANGUAGE, LANGUAGE_MAX_LENGTH, LANGUAGE_PATTERN, partition
 from app.models import Word, Grammar
 from app.schemas import (
-    WordCreate, WordResponse,
-    GrammarCreate, GrammarResponse,
-    QuestionGenerationRequest, QuestionGenerationResponse
+    WordCreate, WordResponse, WordDelta, SimilarWord,
+    GrammarCreate, GrammarResponse, GrammarDelta,
+    BulkImportResponse,
+    Question, QuestionGenerationRequest, QuestionGenerationResponse,
+    QuestionCacheStats, VocabularyCacheStats, InFlightStats, CacheStatsResponse,
+    SearchResponse, SearchResult,
+    ReviewCreate, ReviewResponse, DueItem, DueQueueResponse,
+    QuizQuestion, QuizSessionResponse, AnswerCreate, AnswerResult
 )
-from app.openai_service import generate_questions
+from app.embeddings import Neighbours, embed_written_rows, embedding_index
+from app.generators import GeneratorUnavailable, QuestionGenerator, TemplateGenerator, get_generator
+from app.llm_client import UpstreamUnavailable
+from app.metrics import stage
+from app.question_cache import question_cache
+from app.singleflight import inflight
+from app.question_pool import PoolTake, return_to_pool, take_from_pool
+from app.quiz_sessions import ActiveSession, AlreadyAnswered, quiz_sessions
+from app.context_selector import PromptContext, select_context, select_due_context
+from app.bulk import import_rows, iter_request_items
+from app.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE,
+    WORD_COLUMNS, GRAMMAR_COLUMNS,
+    fetch_page, fetch_row, fetch_rows, stream_ndjson
+)
+from app.vocab_cache import invalidate_vocabulary, vocab_cache
+from app.search import SearchKind, ensure_language_indexed, search_vocabulary
+from app.scheduler import ReviewKind, record_review, fetch_due_queue
+from app.revisions import bump_vocabulary_revisions, get_revision, make_etag, etag_matches
+from app.responses import dumps, model_json, trusted_json
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Similar items ranked per context item for hard template questions; a few spare cover duplicate answers
+NEIGHBOURS_PER_ITEM: int = 8
+
+# Selects one language's vocabulary; lists, deltas, search and reviews are all scoped by it
+LanguageQuery = Annotated[str, Query(
+    max_length=LANGUAGE_MAX_LENGTH, pattern=LANGUAGE_PATTERN, description="Language code of the vocabulary"
+)]
+
+def _not_modified(
+    table: str,
+    revision: int,
+    if_none_match: Optional[str],
+    response: Response,
+    *variant: object
+) -> Optional[Response]:
+    """Return a 304 if the client's ETag is current, otherwise set the ETag on the response."""
+    etag = make_etag(table, revision, *variant)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return None
+
 # Word endpoints
 @router.post("/words", response_model=WordResponse, status_code=201)
 async def create_word(
@@ -20,32 +75,145 @@ async def create_word(
     db: AsyncSession = Depends(get_db)
 ) -> Word:
     """Create a new word."""
+    await ensure_language_indexed(db, word.language)
     db_word = Word(**word.model_dump())
     db.add(db_word)
+    names = await bump_vocabulary_revisions(db, "words", [db_word.language])
     await db.commit()
+    await invalidate_vocabulary(names)
     await db.refresh(db_word)
+    embed_written_rows(db, "words", [db_word.language])
     return db_word
 
+BULK_REQUEST_BODY: Dict[str, Any] = {
+    "requestBody": {
+        "description": "A JSON array of items, or one JSON object per line with Content-Type: application/x-ndjson",
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {}}},
+            "application/x-ndjson": {"schema": {"type": "string"}},
+        },
+    }
+}
+
+@router.post("/words/bulk", response_model=BulkImportResponse, openapi_extra=BULK_REQUEST_BODY)
+async def bulk_import_words(
+    request: Request,
+    upsert: bool = Query(default=False, description="Update existing words instead of skipping them"),
+    db: AsyncSession = Depends(get_db)
+) -> BulkImportResponse:
+    """Import many words from a JSON array or NDJSON stream."""
+    return await import_rows(
+        db, iter_request_items(request), WordCreate, Word, "vietnamese_word", upsert=upsert
+    )
+
 @router.get("/words", response_model=List[WordResponse])
 async def list_words(
+    response: Response,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = Query(default=None, ge=0, description="Return words with an id greater than this cursor"),
+    stream: bool = Query(default=False, description="Stream every word after the cursor as NDJSON"),
+    language: LanguageQuery = DEFAULT_LANGUAGE,
+    if_none_match: Optional[str] = Header(default=None),
     db: AsyncSession = Depends(get_db)
-) -> List[Word]:
-    """List all words."""
-    result = await db.execute(select(Word))
-    words = result.scalars().all()
-    return list(words)
+) -> Response:
+    """List one language's words one keyset page at a time, or stream them as NDJSON."""
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(db, WORD_COLUMNS, after, language=language),
+            media_type="application/x-ndjson"
+        )
+    # Only the revision is read before we know the rows are needed
+    name = partition("words", language)
+    revision = await get_revision(db, name)
+    not_modified = _not_modified(name, revision, if_none_match, response, "page", after, limit)
+    if not_modified:
+        return not_modified
+    # The revision is part of the key, so rows cached before another process wrote are never sent under its ETag
+    words = await vocab_cache.get_or_load(
+        name, ("page", revision, after, limit),
+        lambda: fetch_page(db, WORD_COLUMNS, after, limit, language)
+    )
+    if len(words) == limit:
+        response.headers["X-Next-Cursor"] = str(words[-1]["id"])
+    return trusted_json(words, response)
+
+@router.get("/words/delta", response_model=WordDelta)
+async def words_delta(
+    response: Response,
+    since: int = Query(default=0, ge=0, description="Cursor returned by the previous delta (0 for everything)"),
+    limit: int = Query(default=MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    language: LanguageQuery = DEFAULT_LANGUAGE,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    """Return one language's words created since a cursor, so clients can sync without a full re-download."""
+    name = partition("words", language)
+    revision = await get_revision(db, name)
+    not_modified = _not_modified(name, revision, if_none_match, response, "delta", since, limit)
+    if not_modified:
+        return not_modified
+    rows = await vocab_cache.get_or_load(
+        name, ("page", revision, since, limit),
+        lambda: fetch_page(db, WORD_COLUMNS, since, limit, language)
+    )
+    # Keys in WordDelta/GrammarDelta field order; the rows are already response-shaped
+    return trusted_json({
+        "items": rows,
+        "cursor": rows[-1]["id"] if rows else since,
+        "revision": revision,
+        "has_more": len(rows) == limit,
+    }, response)
 
 @router.get("/words/{word_id}", response_model=WordResponse)
 async def get_word(
     word_id: int, 
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
     db: AsyncSession = Depends(get_db)
-) -> Word:
+) -> Response:
     """Get a specific word by ID."""
-    result = await db.execute(select(Word).where(Word.id == word_id))
-    word = result.scalar_one_or_none()
+    revision = await get_revision(db, "words")
+    not_modified = _not_modified("words", revision, if_none_match, response, "row", word_id)
+    if not_modified:
+        return not_modified
+    word = await vocab_cache.get_or_load(
+        "words", ("row", revision, word_id),
+        lambda: fetch_row(db, WORD_COLUMNS, word_id)
+    )
+    if not word:
+        raise HTTPException(status_code=404, detail="Word not found")
+    return trusted_json(word, response)
+
+@router.get("/words/{word_id}/similar", response_model=List[SimilarWord])
+async def similar_words(
+    word_id: int,
+    response: Response,
+    limit: int = Query(default=10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    """List the words of the same language closest in meaning to a word, most similar first."""
+    if embedding_index is None:
+        raise HTTPException(status_code=404, detail="Word embeddings are disabled")
+    word = await vocab_cache.get_or_load(
+        "words", ("row", word_id),
+        lambda: fetch_row(db, WORD_COLUMNS, word_id)
+    )
     if not word:
         raise HTTPException(status_code=404, detail="Word not found")
-    return word
+    index = embedding_index
+
+    async def load_similar() -> List[Dict[str, Any]]:
+        ranked = await index.similar("words", word["language"], word_id, limit)
+        rows = await fetch_rows(db, WORD_COLUMNS, [item_id for item_id, _ in ranked])
+        # Rows deleted since they were embedded drop out here
+        return [{**rows[item_id], "similarity": round(score, 4)} for item_id, score in ranked if item_id in rows]
+
+    # Keyed by the stored row count too, so a lookup made before new rows were embedded is not reused
+    embedded = index.stored("words", word["language"])
+    similar = await vocab_cache.get_or_load(
+        partition("words", word["language"]), ("similar", word_id, limit, embedded), load_similar
+    )
+    return trusted_json(similar, response)
 
 # Grammar endpoints
 @router.post("/grammar", response_model=GrammarResponse, status_code=201)
@@ -54,79 +222,549 @@ async def create_grammar(
     db: AsyncSession = Depends(get_db)
 ) -> Grammar:
     """Create a new grammar point."""
+    await ensure_language_indexed(db, grammar.language)
     db_grammar = Grammar(**grammar.model_dump())
     db.add(db_grammar)
+    names = await bump_vocabulary_revisions(db, "grammar", [db_grammar.language])
     await db.commit()
+    await invalidate_vocabulary(names)
     await db.refresh(db_grammar)
+    embed_written_rows(db, "grammar", [db_grammar.language])
     return db_grammar
 
+@router.post("/grammar/bulk", response_model=BulkImportResponse, openapi_extra=BULK_REQUEST_BODY)
+async def bulk_import_grammar(
+    request: Request,
+    upsert: bool = Query(default=False, description="Update existing grammar points instead of skipping them"),
+    db: AsyncSession = Depends(get_db)
+) -> BulkImportResponse:
+    """Import many grammar points from a JSON array or NDJSON stream."""
+    return await import_rows(
+        db, iter_request_items(request), GrammarCreate, Grammar, "grammar_point", upsert=upsert
+    )
+
 @router.get("/grammar", response_model=List[GrammarResponse])
 async def list_grammar(
+    response: Response,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = Query(default=None, ge=0, description="Return grammar points with an id greater than this cursor"),
+    stream: bool = Query(default=False, description="Stream every grammar point after the cursor as NDJSON"),
+    language: LanguageQuery = DEFAULT_LANGUAGE,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    """List one language's grammar points one keyset page at a time, or stream them as NDJSON."""
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(db, GRAMMAR_COLUMNS, after, language=language),
+            media_type="application/x-ndjson"
+        )
+    # Only the revision is read before we know the rows are needed
+    name = partition("grammar", language)
+    revision = await get_revision(db, name)
+    not_modified = _not_modified(name, revision, if_none_match, response, "page", after, limit)
+    if not_modified:
+        return not_modified
+    grammar = await vocab_cache.get_or_load(
+        name, ("page", revision, after, limit),
+        lambda: fetch_page(db, GRAMMAR_COLUMNS, after, limit, language)
+    )
+    if len(grammar) == limit:
+        response.headers["X-Next-Cursor"] = str(grammar[-1]["id"])
+    return trusted_json(grammar, response)
+
+@router.get("/grammar/delta", response_model=GrammarDelta)
+async def grammar_delta(
+    response: Response,
+    since: int = Query(default=0, ge=0, description="Cursor returned by the previous delta (0 for everything)"),
+    limit: int = Query(default=MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    language: LanguageQuery = DEFAULT_LANGUAGE,
+    if_none_match: Optional[str] = Header(default=None),
     db: AsyncSession = Depends(get_db)
-) -> List[Grammar]:
-    """List all grammar points."""
-    result = await db.execute(select(Grammar))
-    grammar = result.scalars().all()
-    return list(grammar)
+) -> Response:
+    """Return one language's grammar points created since a cursor, so clients can sync without a full re-download."""
+    name = partition("grammar", language)
+    revision = await get_revision(db, name)
+    not_modified = _not_modified(name, revision, if_none_match, response, "delta", since, limit)
+    if not_modified:
+        return not_modified
+    rows = await vocab_cache.get_or_load(
+        name, ("page", revision, since, limit),
+        lambda: fetch_page(db, GRAMMAR_COLUMNS, since, limit, language)
+    )
+    # Keys in WordDelta/GrammarDelta field order; the rows are already response-shaped
+    return trusted_json({
+        "items": rows,
+        "cursor": rows[-1]["id"] if rows else since,
+        "revision": revision,
+        "has_more": len(rows) == limit,
+    }, response)
 
 @router.get("/grammar/{grammar_id}", response_model=GrammarResponse)
 async def get_grammar(
     grammar_id: int, 
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
     db: AsyncSession = Depends(get_db)
-) -> Grammar:
+) -> Response:
     """Get a specific grammar point by ID."""
-    result = await db.execute(select(Grammar).where(Grammar.id == grammar_id))
-    grammar = result.scalar_one_or_none()
+    revision = await get_revision(db, "grammar")
+    not_modified = _not_modified("grammar", revision, if_none_match, response, "row", grammar_id)
+    if not_modified:
+        return not_modified
+    grammar = await vocab_cache.get_or_load(
+        "grammar", ("row", revision, grammar_id),
+        lambda: fetch_row(db, GRAMMAR_COLUMNS, grammar_id)
+    )
     if not grammar:
         raise HTTPException(status_code=404, detail="Grammar not found")
-    return grammar
+    return trusted_json(grammar, response)
+
+# Search endpoint
+@router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(min_length=1, max_length=200, description="Words to search for; diacritics are optional"),
+    type: SearchKind = Query(default="all", description="Search words, grammar or both"),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=10_000),
+    language: LanguageQuery = DEFAULT_LANGUAGE,
+    db: AsyncSession = Depends(get_db)
+) -> SearchResponse:
+    """Search one language's words and grammar by term or English text, best matches first."""
+    rows = await search_vocabulary(db, q, type, limit, offset, language)
+    return SearchResponse(
+        results=[SearchResult.model_validate(row) for row in rows],
+        next_offset=offset + limit if len(rows) == limit else None
+    )
+
+# Review endpoints
+@router.post("/review/words/{word_id}", response_model=ReviewResponse)
+async def review_word(
+    word_id: int,
+    review: ReviewCreate,
+    db: AsyncSession = Depends(get_db)
+) -> ReviewResponse:
+    """Record how well a learner recalled a word and schedule its next review."""
+    item = await db.get(Word, word_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Word not found")
+    state = await record_review(db, "words", review.user_id, word_id, review.grade, language=item.language)
+    await db.commit()
+    return ReviewResponse(
+        user_id=state.user_id, item_id=word_id,
+        ease_factor=state.ease_factor, interval_days=state.interval_days,
+        repetitions=state.repetitions, lapses=state.lapses,
+        due_at=state.due_at, last_reviewed_at=state.last_reviewed_at
+    )
+
+@router.post("/review/grammar/{grammar_id}", response_model=ReviewResponse)
+async def review_grammar(
+    grammar_id: int,
+    review: ReviewCreate,
+    db: AsyncSession = Depends(get_db)
+) -> ReviewResponse:
+    """Record how well a learner recalled a grammar point and schedule its next review."""
+    item = await db.get(Grammar, grammar_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Grammar not found")
+    state = await record_review(db, "grammar", review.user_id, grammar_id, review.grade, language=item.language)
+    await db.commit()
+    return ReviewResponse(
+        user_id=state.user_id, item_id=grammar_id,
+        ease_factor=state.ease_factor, interval_days=state.interval_days,
+        repetitions=state.repetitions, lapses=state.lapses,
+        due_at=state.due_at, last_reviewed_at=state.last_reviewed_at
+    )
+
+@router.get("/review/due", response_model=DueQueueResponse)
+async def review_due(
+    user_id: str = Query(min_length=1, max_length=64),
+    type: Optional[ReviewKind] = Query(default=None, description="Only return due words or due grammar"),
+    limit: int = Query(default=50, ge=1, le=500),
+    language: LanguageQuery = DEFAULT_LANGUAGE,
+    db: AsyncSession = Depends(get_db)
+) -> DueQueueResponse:
+    """List a learner's words and grammar in one language due for review, most overdue first."""
+    items = await fetch_due_queue(db, user_id, type, limit, language=language)
+    return DueQueueResponse(items=[DueItem.model_validate(item) for item in items])
 
 # Question generation endpoint
 @router.post("/generate-questions", response_model=QuestionGenerationResponse)
 async def generate_questions_endpoint(
     request: QuestionGenerationRequest,
-    db: AsyncSession = Depends(get_db)
-) -> QuestionGenerationResponse:
-    """Generate language learning questions based on known words and grammar."""
-    # Fetch all words
-    words_result = await db.execute(select(Word))
-    words = words_result.scalars().all()
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker)
+) -> Response:
+    """Generate language learning questions, serving from the pre-generated pool first."""
+    questions = await _coalesced_generation(request, session_maker)
+    # The questions were validated when they were parsed; serialize them without a second pass
+    return model_json(QuestionGenerationResponse(questions=questions))
+
+async def _coalesced_generation(
+    request: QuestionGenerationRequest,
+    session_maker: async_sessionmaker[AsyncSession]
+) -> List[Question]:
+    """
+    Generate for a request, sharing one pool read and model call with identical requests in flight.
+    
+    The shared call opens its own session rather than borrowing the first
+    caller's, which closes if that client disconnects and whose transaction
+    is not the other callers' to commit.
+    """
+    async def generate() -> List[Question]:
+        async with session_maker() as db:
+            return await _generate_for_request(request, db)
+    
+    return await inflight.do(f"request:{request.model_dump_json()}", generate)
+
+async def _generate_for_request(
+    request: QuestionGenerationRequest,
+    db: AsyncSession
+) -> List[Question]:
+    """Take questions from the pool and generate whatever it could not cover."""
+    generator = _request_generator(request)
+    
+    taken = PoolTake()
+    try:
+        with stage("db_fetch"):
+            # Serve what we can from the pool
+            if _uses_pool(request):
+                taken = await take_from_pool(db, request.difficulty, request.num_questions, request.language)
+                # Commit the take before the model call; an open write transaction would lock other SQLite writers out
+                await db.commit()
+                if len(taken.questions) == request.num_questions:
+                    return taken.questions
+            
+            # Pick a bounded sample of vocabulary that fits the prompt budget
+            context = await _select_request_context(request, db)
+        
+        # Generate the questions the pool could not cover
+        neighbours = (
+            _context_neighbours(request, context) if generator.name == TemplateGenerator.name else None
+        )
+        remaining = request.num_questions - len(taken.questions)
+        try:
+            questions = await generator.generate(
+                words=context.words,
+                grammar=context.grammar,
+                num_questions=remaining,
+                difficulty=request.difficulty,
+                seed=request.seed,
+                language=request.language,
+                neighbours=neighbours
+            )
+        except UpstreamUnavailable as exc:
+            # Serve pooled or template questions rather than failing outright
+            fallback, templated = await _fallback_questions(request, db, context, remaining, exc)
+            await db.commit()
+            return taken.questions + fallback.questions + templated
+        await db.commit()
+    except BaseException:
+        await _return_to_pool(db, taken)
+        raise
+    
+    return taken.questions + questions
+
+async def _return_to_pool(db: AsyncSession, taken: PoolTake) -> None:
+    """Put back pooled questions a failed request took but did not deliver."""
+    if not taken.rows:
+        return
+    try:
+        await db.rollback()
+        return_to_pool(db, taken)
+        await db.commit()
+    except Exception:
+        logger.exception("Could not return %d questions to the pool", len(taken.rows))
+
+def _request_generator(request: QuestionGenerationRequest) -> QuestionGenerator:
+    """Resolve the generator a request asked for, raising 400 if it is not configured."""
+    try:
+        return get_generator(request.generator)
+    except GeneratorUnavailable as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+def _uses_pool(request: QuestionGenerationRequest) -> bool:
+    """
+    Pooled questions target no learner or generator, so requests naming either skip the pool.
+    
+    Seeded requests skip it too: what the pool holds depends on earlier traffic, so
+    it would make their output irreproducible.
+    """
+    return not request.due_only and request.generator is None and request.seed is None
+
+async def _fallback_questions(
+    request: QuestionGenerationRequest,
+    db: AsyncSession,
+    context: PromptContext,
+    count: int,
+    exc: UpstreamUnavailable
+) -> Tuple[PoolTake, List[Question]]:
+    """
+    Find questions while the model API is down, or raise 503.
+    
+    Pooled questions of any difficulty come first, then, if configured, template
+    questions built from the request's vocabulary.
+    
+    Returns:
+        The pooled questions taken, and the template questions built
+    """
+    logger.warning("Model API unavailable, falling back: %s", exc)
+    taken = PoolTake()
+    templated: List[Question] = []
+    if not request.due_only:
+        taken = await take_from_pool(db, None, count, request.language)
+    if len(taken.questions) < count and settings.question_generator_fallback == "template":
+        templated = TemplateGenerator().build(
+            context.words, context.grammar, count - len(taken.questions), request.difficulty, request.seed,
+            request.language, _context_neighbours(request, context)
+        )
+    if not taken.questions and not templated:
+        retry_after = math.ceil(exc.retry_after) if exc.retry_after else 1
+        raise HTTPException(
+            status_code=503,
+            detail="Question generation is temporarily unavailable. Please try again shortly.",
+            headers={"Retry-After": str(retry_after)}
+        )
+    return taken, templated
+
+def _context_neighbours(request: QuestionGenerationRequest, context: PromptContext) -> Optional[Neighbours]:
+    """Rank a context's items by similarity for hard template questions, if embeddings are enabled."""
+    if embedding_index is None or request.difficulty != "hard":
+        return None
+    return embedding_index.neighbours(
+        request.language, context.word_ids, context.grammar_ids, NEIGHBOURS_PER_ITEM
+    )
+
+async def _select_request_context(
+    request: QuestionGenerationRequest,
+    db: AsyncSession
+) -> PromptContext:
+    """Pick the prompt vocabulary for a request, raising 400 if there is none."""
+    if request.due_only and request.user_id is not None:
+        context = await select_due_context(db, request.user_id, language=request.language)
+        if context.is_empty:
+            raise HTTPException(
+                status_code=400,
+                detail="No words or grammar are due for review."
+            )
+        return context
     
-    # Fetch all grammar
-    grammar_result = await db.execute(select(Grammar))
-    grammar = grammar_result.scalars().all()
+    context = await select_context(db, seed=request.seed, language=request.language)
     
     # Check if we have enough data
-    if not words and not grammar:
+    if context.is_empty:
         raise HTTPException(
             status_code=400,
-            detail="No words or grammar found. Please add some first."
+            detail=f"No words or grammar found for language '{request.language}'. Please add some first."
         )
+    return context
+
+def _stream_error(exc: Exception) -> str:
+    """Log a generation failure that cut a stream short and describe it for the client."""
+    if isinstance(exc, UpstreamUnavailable):
+        logger.warning("Model API unavailable while streaming questions: %s", exc)
+        return "Question generation is temporarily unavailable. Please try again shortly."
+    logger.exception("Streaming questions failed")
+    return "Question generation failed."
+
+async def _ndjson_lines(questions: AsyncGenerator[Question, None]) -> AsyncIterator[str]:
+    """Format each question as one line of NDJSON, ending with an error line if generation fails part-way."""
+    count = 0
+    try:
+        # Closing the response closes the questions too, so their cleanup runs at once
+        async with aclosing(questions):
+            async for question in questions:
+                count += 1
+                yield question.model_dump_json() + "\n"
+    except Exception as exc:
+        yield dumps({"error": _stream_error(exc), "count": count}).decode() + "\n"
+
+async def _sse_events(questions: AsyncGenerator[Question, None]) -> AsyncIterator[str]:
+    """Format each question as a server-sent event, followed by a final done event, or an error event on failure."""
+    count = 0
+    try:
+        async with aclosing(questions):
+            async for question in questions:
+                count += 1
+                yield f"event: question\ndata: {question.model_dump_json()}\n\n"
+    except Exception as exc:
+        error = dumps({"detail": _stream_error(exc), "count": count}).decode()
+        yield f"event: error\ndata: {error}\n\n"
+        return
+    yield f"event: done\ndata: {{\"count\": {count}}}\n\n"
+
+# Tasks putting back pooled questions a stream did not deliver, kept until they finish
+_returns: Set[asyncio.Task[None]] = set()
+
+def _return_undelivered(session_maker: async_sessionmaker[AsyncSession], taken: PoolTake) -> None:
+    """
+    Put pooled questions a stream did not deliver back in the pool.
     
-    # Convert to dicts for the service
-    words_dict: List[dict[str, str]] = [
-        {
-            "vietnamese_word": w.vietnamese_word,
-            "english_definition": w.english_definition
-        }
-        for w in words
-    ]
+    This runs as a task of its own with its own session: the stream may be
+    ending because the client went away, and its cancellation must not cut
+    the write short.
+    """
+    async def put_back() -> None:
+        async with session_maker() as db:
+            await _return_to_pool(db, taken)
     
-    grammar_dict: List[dict[str, str | None]] = [
-        {
-            "grammar_point": g.grammar_point,
-            "english_explanation": g.english_explanation,
-            "example_sentence": g.example_sentence
-        }
-        for g in grammar
-    ]
+    task = asyncio.create_task(put_back())
+    _returns.add(task)
+    task.add_done_callback(_returns.discard)
+
+@router.post(
+    "/generate-questions/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/event-stream": {}}}}
+)
+async def stream_questions_endpoint(
+    request: QuestionGenerationRequest,
+    accept: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker)
+) -> StreamingResponse:
+    """
+    Stream questions as they are generated, as NDJSON or server-sent events (Accept: text/event-stream).
     
-    # Generate questions
-    questions = await generate_questions(
-        words=words_dict,
-        grammar=grammar_dict,
-        num_questions=request.num_questions,
-        difficulty=request.difficulty
-    )
+    If generation fails part-way, the stream ends with an error line or event
+    instead of a normal end. Pooled questions the client never received are
+    put back in the pool.
+    """
+    generator = _request_generator(request)
+    
+    # Pooled questions go out first; only the shortfall is generated
+    taken = PoolTake()
+    templated: List[Question] = []
+    try:
+        if _uses_pool(request):
+            taken = await take_from_pool(db, request.difficulty, request.num_questions, request.language)
+            # Commit the take now; an open write transaction would lock other SQLite writers out for the whole stream
+            await db.commit()
+        remaining = request.num_questions - len(taken.questions)
+        context = None
+        neighbours = None
+        if remaining:
+            context = await _select_request_context(request, db)
+            if generator.name == TemplateGenerator.name:
+                neighbours = _context_neighbours(request, context)
+        if context is not None and not generator.available:
+            # Fail fast (or fall back) before the response starts, while the status can still change
+            fallback, templated = await _fallback_questions(
+                request, db, context, remaining,
+                UpstreamUnavailable("Model API circuit is open", retry_after=generator.retry_after())
+            )
+            taken += fallback
+            context = None
+        await db.commit()
+    except BaseException:
+        await _return_to_pool(db, taken)
+        raise
+    
+    async def questions() -> AsyncGenerator[Question, None]:
+        delivered = 0
+        try:
+            for question in taken.questions:
+                yield question
+                # Asked for the next one, so the previous one was sent
+                delivered += 1
+            for question in templated:
+                yield question
+            if context is not None:
+                async for question in generator.stream(
+                    words=context.words,
+                    grammar=context.grammar,
+                    num_questions=remaining,
+                    difficulty=request.difficulty,
+                    seed=request.seed,
+                    language=request.language,
+                    neighbours=neighbours
+                ):
+                    yield question
+        finally:
+            if delivered < len(taken.questions):
+                _return_undelivered(session_maker, taken.after(delivered))
     
-    return QuestionGenerationResponse(questions=questions)
\ No newline at end of file
+    if accept and "text/event-stream" in accept:
+        return StreamingResponse(
+            _sse_events(questions()),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"}
+        )
+    return StreamingResponse(_ndjson_lines(questions()), media_type="application/x-ndjson")
+
+# Quiz session endpoints
+def _session_response(session: ActiveSession) -> QuizSessionResponse:
+    return QuizSessionResponse(
+        session_id=session.id,
+        user_id=session.user_id,
+        language=session.language,
+        questions=[
+            QuizQuestion(question_type=q.question_type, question=q.question, answers=q.answers)
+            for q in session.questions
+        ],
+        answered=len(session.answers),
+        score=session.score,
+        expires_at=session.expires_at
+    )
+
+async def _get_session(db: AsyncSession, session_id: str) -> ActiveSession:
+    session = await quiz_sessions.get(db, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Quiz session not found or expired")
+    return session
+
+@router.post("/sessions", response_model=QuizSessionResponse, status_code=201)
+async def create_session(
+    request: QuestionGenerationRequest,
+    db: AsyncSession = Depends(get_db),
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker)
+) -> QuizSessionResponse:
+    """Start a quiz session: questions are generated as for /generate-questions, but answers are checked here."""
+    questions = await _coalesced_generation(request, session_maker)
+    session = await quiz_sessions.create(db, questions, request.user_id, request.language)
+    return _session_response(session)
+
+@router.get("/sessions/{session_id}", response_model=QuizSessionResponse)
+async def get_session(
+    session_id: str,
+    db: AsyncSession = Depends(get_db)
+) -> QuizSessionResponse:
+    """Get a quiz session's questions and progress."""
+    return _session_response(await _get_session(db, session_id))
+
+@router.post("/sessions/{session_id}/answers", response_model=AnswerResult)
+async def answer_question(
+    session_id: str,
+    answer: AnswerCreate,
+    db: AsyncSession = Depends(get_db)
+) -> AnswerResult:
+    """Check an answer; it is written to the database with the next batch."""
+    session = await _get_session(db, session_id)
+    if answer.question_idx >= len(session.questions):
+        raise HTTPException(status_code=400, detail=f"The session has {len(session.questions)} questions")
+    question = session.questions[answer.question_idx]
+    if answer.answer_idx >= len(question.answers):
+        raise HTTPException(status_code=400, detail=f"The question has {len(question.answers)} answers")
+    try:
+        correct = quiz_sessions.answer(session, answer.question_idx, answer.answer_idx)
+    except AlreadyAnswered as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return AnswerResult(
+        question_idx=answer.question_idx,
+        correct=correct,
+        correct_idx=question.correct_idx,
+        answered=len(session.answers),
+        score=session.score
+    )
+
+# Cache statistics endpoint
+@router.get("/cache/stats", response_model=CacheStatsResponse)
+async def cache_stats() -> CacheStatsResponse:
+    """Report hit/miss counters for the question and vocabulary caches and request coalescing."""
+    questions = None
+    if question_cache is not None:
+        questions = QuestionCacheStats.model_validate(await question_cache.stats())
+    return CacheStatsResponse(
+        questions=questions,
+        vocabulary=VocabularyCacheStats.model_validate(vocab_cache.stats()),
+        in_flight=InFlightStats.model_validate(inflight.stats())
+    )
\ No newline at end of file
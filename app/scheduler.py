@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Literal, Optional, Sequence, Type
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from app.languages import DEFAULT_LANGUAGE
+from app.models import Word, Grammar, WordReview, GrammarReview
+
+ReviewKind = Literal["words", "grammar"]
+ReviewModel = Type[WordReview] | Type[GrammarReview]
+
+MIN_EASE_FACTOR: float = 1.3
+PASSING_GRADE: int = 3
+
+
+@dataclass
+class ReviewState:
+    """SM-2 scheduling state of one item for one learner."""
+    ease_factor: float = 2.5
+    interval_days: float = 0.0
+    repetitions: int = 0
+    lapses: int = 0
+
+
+def schedule(state: ReviewState, grade: int) -> ReviewState:
+    """
+    Apply one graded review to an item's state using the SM-2 algorithm.
+
+    Grades run from 0 (complete blackout) to 5 (perfect recall). A grade below 3
+    is a lapse: the item starts over with a one-day interval. Otherwise the
+    interval grows from 1 day to 6 days and then by the ease factor, which
+    itself moves with how easy the recall was.
+
+    Args:
+        state: The item's state before this review
+        grade: Recall quality from 0 to 5
+
+    Returns:
+        The item's new state
+    """
+    if not 0 <= grade <= 5:
+        raise ValueError(f"grade must be between 0 and 5, got {grade}")
+
+    ease_factor = max(
+        MIN_EASE_FACTOR,
+        state.ease_factor + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02)
+    )
+    if grade < PASSING_GRADE:
+        return ReviewState(ease_factor, 1.0, 0, state.lapses + 1)
+    if state.repetitions == 0:
+        interval = 1.0
+    elif state.repetitions == 1:
+        interval = 6.0
+    else:
+        interval = round(state.interval_days * state.ease_factor, 2)
+    return ReviewState(ease_factor, interval, state.repetitions + 1, state.lapses)
+
+
+def _review_model(kind: ReviewKind) -> ReviewModel:
+    return WordReview if kind == "words" else GrammarReview
+
+
+def _item_column(model: ReviewModel) -> InstrumentedAttribute[int]:
+    return WordReview.word_id if model is WordReview else GrammarReview.grammar_id
+
+
+async def record_review(
+    db: AsyncSession,
+    kind: ReviewKind,
+    user_id: str,
+    item_id: int,
+    grade: int,
+    now: Optional[datetime] = None,
+    language: str = DEFAULT_LANGUAGE
+) -> WordReview | GrammarReview:
+    """
+    Record a learner's review of a word or grammar point and reschedule it.
+
+    The first review of an item creates its state. The caller commits.
+
+    Args:
+        db: Database session
+        kind: Whether `item_id` is a word or a grammar point
+        user_id: The learner
+        item_id: Id of the reviewed word or grammar point
+        grade: Recall quality from 0 to 5
+        now: Review time (defaults to the current time)
+        language: Language of the reviewed item, kept on the review for the due queue
+
+    Returns:
+        The updated review row
+    """
+    now = now or datetime.now(UTC)
+    review: WordReview | GrammarReview | None
+    if kind == "words":
+        review = await db.get(WordReview, (user_id, item_id))
+    else:
+        review = await db.get(GrammarReview, (user_id, item_id))
+
+    if review is None:
+        # First review of this item by this learner
+        if kind == "words":
+            review = WordReview(user_id=user_id, word_id=item_id, language=language)
+        else:
+            review = GrammarReview(user_id=user_id, grammar_id=item_id, language=language)
+        db.add(review)
+        state = ReviewState()
+    else:
+        state = ReviewState(review.ease_factor, review.interval_days, review.repetitions, review.lapses)
+
+    state = schedule(state, grade)
+    review.ease_factor = state.ease_factor
+    review.interval_days = state.interval_days
+    review.repetitions = state.repetitions
+    review.lapses = state.lapses
+    review.last_reviewed_at = now
+    review.due_at = now + timedelta(days=state.interval_days)
+    await db.flush()
+    return review
+
+
+async def fetch_due(
+    db: AsyncSession,
+    kind: ReviewKind,
+    columns: Sequence[InstrumentedAttribute[Any]],
+    user_id: str,
+    limit: int,
+    now: Optional[datetime] = None,
+    language: str = DEFAULT_LANGUAGE
+) -> List[Dict[str, Any]]:
+    """
+    Fetch a learner's due items in one language, most overdue first.
+
+    The query is a range scan of the (user_id, language, due_at) index followed
+    by primary key lookups, so its cost depends on `limit`, not on how many
+    items, learners or languages there are.
+
+    Args:
+        db: Database session
+        kind: Fetch due words or due grammar points
+        columns: Projected item columns, id column first
+        user_id: The learner
+        limit: Maximum number of items to return
+        now: Items due at or before this time are returned (defaults to now)
+        language: Language code of the items
+
+    Returns:
+        List of row dictionaries with the item columns plus the review state
+    """
+    now = now or datetime.now(UTC)
+    model = _review_model(kind)
+    stmt = (
+        select(
+            *columns,
+            model.due_at, model.repetitions, model.ease_factor, model.interval_days, model.lapses
+        )
+        .join(model, _item_column(model) == columns[0])
+        .where(model.user_id == user_id, model.language == language, model.due_at <= now)
+        .order_by(model.due_at)
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
+
+
+async def fetch_due_queue(
+    db: AsyncSession,
+    user_id: str,
+    kind: Optional[ReviewKind] = None,
+    limit: int = 50,
+    now: Optional[datetime] = None,
+    language: str = DEFAULT_LANGUAGE
+) -> List[Dict[str, Any]]:
+    """Merge due words and grammar points of one language into one queue ordered by due time."""
+    queue: List[Dict[str, Any]] = []
+    if kind in (None, "words"):
+        rows = await fetch_due(
+            db, "words", (Word.id, Word.vietnamese_word, Word.english_definition), user_id, limit, now,
+            language=language
+        )
+        queue += [
+            {**row, "type": "word", "text": row["vietnamese_word"], "meaning": row["english_definition"]}
+            for row in rows
+        ]
+    if kind in (None, "grammar"):
+        rows = await fetch_due(
+            db, "grammar", (Grammar.id, Grammar.grammar_point, Grammar.english_explanation), user_id, limit, now,
+            language=language
+        )
+        queue += [
+            {**row, "type": "grammar", "text": row["grammar_point"], "meaning": row["english_explanation"]}
+            for row in rows
+        ]
+    queue.sort(key=lambda item: item["due_at"])
+    return queue[:limit]
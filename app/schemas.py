@@ -1,10 +1,17 @@
-from pydantic import BaseModel, Field, ConfigDict
+from typing import Literal
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from datetime import datetime
+from app.languages import DEFAULT_LANGUAGE, LANGUAGE_MAX_LENGTH, LANGUAGE_PATTERN
 
 # Word Schemas
 class WordBase(BaseModel):
+    # vietnamese_word keeps its name for API compatibility; it holds the term in `language`
     vietnamese_word: str = Field(min_length=1, max_length=100)
     english_definition: str = Field(min_length=1)
+    language: str = Field(
+        default=DEFAULT_LANGUAGE, max_length=LANGUAGE_MAX_LENGTH, pattern=LANGUAGE_PATTERN,
+        description="Language code of the term"
+    )
 
 class WordCreate(WordBase):
     pass
@@ -16,11 +23,19 @@ class WordResponse(WordBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class SimilarWord(WordResponse):
+    similarity: float = Field(description="Cosine similarity to the queried word, from -1 to 1")
+
+
 # Grammar Schemas
 class GrammarBase(BaseModel):
     grammar_point: str = Field(min_length=1, max_length=200)
     english_explanation: str = Field(min_length=1)
     example_sentence: str | None = None
+    language: str = Field(
+        default=DEFAULT_LANGUAGE, max_length=LANGUAGE_MAX_LENGTH, pattern=LANGUAGE_PATTERN,
+        description="Language code of the grammar point"
+    )
 
 class GrammarCreate(GrammarBase):
     pass
@@ -32,6 +47,28 @@ class GrammarResponse(GrammarBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Delta Schemas
+class WordDelta(BaseModel):
+    items: list[WordResponse]
+    cursor: int = Field(description="Pass as `since` to fetch the next changes")
+    revision: int = Field(description="Revision of this language's words when this delta was read")
+    has_more: bool = Field(description="More rows are waiting after `cursor`")
+
+
+class GrammarDelta(BaseModel):
+    items: list[GrammarResponse]
+    cursor: int = Field(description="Pass as `since` to fetch the next changes")
+    revision: int = Field(description="Revision of this language's grammar when this delta was read")
+    has_more: bool = Field(description="More rows are waiting after `cursor`")
+
+
+# Bulk import Schemas
+class BulkImportResponse(BaseModel):
+    received: int = Field(description="Items validated and submitted for writing")
+    written: int = Field(description="Rows inserted or updated")
+    batches: int = Field(description="Chunks written, each in its own transaction")
+
+
 # Question Schemas (for LLM output)
 class Question(BaseModel):
     question_type: int = Field(ge=1, description="Type of question")
@@ -40,10 +77,135 @@ class Question(BaseModel):
     correct_idx: int = Field(ge=0, description="Index of correct answer")
     
     model_config = ConfigDict(populate_by_name=True)
+    
+    @model_validator(mode="after")
+    def check_correct_idx_in_range(self) -> "Question":
+        if self.correct_idx >= len(self.answers):
+            raise ValueError("correct_idx must index one of the answers")
+        return self
         
 class QuestionGenerationRequest(BaseModel):
     num_questions: int = Field(default=5, ge=1, le=20)
     difficulty: str | None = Field(default=None, pattern="^(easy|medium|hard)$")
+    seed: int | None = Field(default=None, description="Makes the vocabulary sample and model output reproducible")
+    user_id: str | None = Field(default=None, min_length=1, max_length=64)
+    due_only: bool = Field(default=False, description="Only use the learner's words and grammar that are due for review")
+    generator: Literal["openai", "local", "template"] | None = Field(
+        default=None, description="Question generator to use (defaults to the server's configured one)"
+    )
+    language: str = Field(
+        default=DEFAULT_LANGUAGE, max_length=LANGUAGE_MAX_LENGTH, pattern=LANGUAGE_PATTERN,
+        description="Language whose vocabulary the questions test"
+    )
+    
+    @model_validator(mode="after")
+    def check_due_only_has_user(self) -> "QuestionGenerationRequest":
+        if self.due_only and self.user_id is None:
+            raise ValueError("due_only requires a user_id")
+        return self
 
 class QuestionGenerationResponse(BaseModel):
-    questions: list[Question]
\ No newline at end of file
+    questions: list[Question]
+
+
+# Quiz session Schemas
+class QuizQuestion(BaseModel):
+    """A question as a quiz taker sees it: the correct answer stays on the server."""
+    question_type: int
+    question: str
+    answers: list[str]
+
+
+class QuizSessionResponse(BaseModel):
+    session_id: str
+    user_id: str | None
+    language: str
+    questions: list[QuizQuestion]
+    answered: int = Field(description="Questions answered so far")
+    score: int = Field(description="Questions answered correctly so far")
+    expires_at: datetime
+
+
+class AnswerCreate(BaseModel):
+    question_idx: int = Field(ge=0, description="Position of the question in the session")
+    answer_idx: int = Field(ge=0, description="Position of the chosen answer")
+
+
+class AnswerResult(BaseModel):
+    question_idx: int
+    correct: bool
+    correct_idx: int
+    answered: int = Field(description="Questions answered so far")
+    score: int = Field(description="Questions answered correctly so far")
+
+
+# Cache Schemas
+class QuestionCacheStats(BaseModel):
+    backend: str
+    entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+    saved_seconds: float
+    saved_tokens: int
+
+class VocabularyCacheStats(BaseModel):
+    entries: int
+    rows: int
+    hits: int
+    misses: int
+    hit_rate: float
+    generations: dict[str, int]
+
+class InFlightStats(BaseModel):
+    in_flight: int
+    executed: int
+    coalesced: int
+
+class CacheStatsResponse(BaseModel):
+    questions: QuestionCacheStats | None
+    vocabulary: VocabularyCacheStats
+    in_flight: InFlightStats
+
+
+# Review Schemas
+class ReviewCreate(BaseModel):
+    user_id: str = Field(min_length=1, max_length=64)
+    grade: int = Field(ge=0, le=5, description="Recall quality, from 0 (forgotten) to 5 (perfect)")
+
+class ReviewResponse(BaseModel):
+    user_id: str
+    item_id: int
+    ease_factor: float
+    interval_days: float
+    repetitions: int
+    lapses: int
+    due_at: datetime
+    last_reviewed_at: datetime | None
+
+class DueItem(BaseModel):
+    type: Literal["word", "grammar"]
+    id: int
+    text: str
+    meaning: str
+    due_at: datetime
+    repetitions: int
+    ease_factor: float
+    interval_days: float
+    lapses: int
+
+class DueQueueResponse(BaseModel):
+    items: list[DueItem]
+
+
+# Search Schemas
+class SearchResult(BaseModel):
+    type: Literal["word", "grammar"]
+    id: int
+    text: str = Field(description="The Vietnamese word or grammar point")
+    meaning: str = Field(description="The English definition or explanation")
+    score: float = Field(description="bm25 relevance; lower is a better match")
+
+class SearchResponse(BaseModel):
+    results: list[SearchResult]
+    next_offset: int | None = Field(description="Pass as `offset` for the next page, or null on the last page")
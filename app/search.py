@@ -0,0 +1,286 @@
+from typing import Any, Dict, List, Literal, Optional
+import re
+from sqlalchemy import Connection, MetaData, bindparam, event, literal, or_, select, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Base
+from app.languages import DEFAULT_LANGUAGE, stored_languages
+from app.models import Word, Grammar
+
+SearchKind = Literal["all", "words", "grammar"]
+
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Indexed columns per table, highest-weighted first; bm25 weights follow the same order
+SEARCH_COLUMNS: Dict[str, tuple[str, ...]] = {
+    "words": ("vietnamese_word", "english_definition"),
+    "grammar": ("grammar_point", "english_explanation", "example_sentence"),
+}
+SEARCH_WEIGHTS: Dict[str, tuple[float, ...]] = {
+    "words": (10.0, 1.0),
+    "grammar": (10.0, 1.0, 2.0),
+}
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def fold_sql(expression: str) -> str:
+    """
+    Wrap a SQL expression so đ/Đ index as d/D.
+
+    The unicode61 tokenizer strips tone marks and vowel diacritics but treats đ as
+    its own letter, so it is folded explicitly on both the index and query side.
+    """
+    return f"replace(replace({expression}, 'đ', 'd'), 'Đ', 'D')"
+
+
+def fold_text(value: str) -> str:
+    """Python counterpart of `fold_sql`, applied to search queries."""
+    return value.replace("đ", "d").replace("Đ", "D")
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word must match, as a prefix, so partially typed words still find
+    results. Tokens are quoted, so FTS5 operators in user input are never
+    interpreted. Returns None if the query has no searchable words.
+    """
+    tokens = _TOKEN_PATTERN.findall(fold_text(query))
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def index_name(table: str, language: str) -> str:
+    """Name of one language's FTS5 index of a table, e.g. words_fts_zh_hant."""
+    return f"{table}_fts_{language.lower().replace('-', '_')}"
+
+
+def _index_ddl(table: str, language: str) -> List[str]:
+    """DDL for one language's search source view, FTS5 index and sync triggers."""
+    index = index_name(table, language)
+    source = f"{table}_search_source_{index.removeprefix(f'{table}_fts_')}"
+    # Language codes are validated against LANGUAGE_PATTERN, so they are safe to inline
+    code = f"'{language}'"
+    columns = SEARCH_COLUMNS[table]
+    column_list = ", ".join(columns)
+    folded = ", ".join(f"{fold_sql(column)} AS {column}" for column in columns)
+    new_values = ", ".join(fold_sql(f"new.{column}") for column in columns)
+    old_values = ", ".join(fold_sql(f"old.{column}") for column in columns)
+    delete_old = (
+        f"INSERT INTO {index}({index}, rowid, {column_list}) "
+        f"SELECT 'delete', old.id, {old_values} WHERE old.language = {code};"
+    )
+    insert_new = (
+        f"INSERT INTO {index}(rowid, {column_list}) "
+        f"SELECT new.id, {new_values} WHERE new.language = {code};"
+    )
+    return [
+        # The index reads folded text of its language's rows from this view when it is rebuilt
+        f"CREATE VIEW IF NOT EXISTS {source} AS SELECT id, {folded} FROM {table} WHERE language = {code}",
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5("
+        f"{column_list}, content='{source}', content_rowid='id', "
+        f"tokenize='{TOKENIZER}', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} "
+        f"WHEN new.language = {code} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} "
+        f"WHEN old.language = {code} BEGIN {delete_old} END",
+        # An update may move a row into or out of this language; each statement checks its own side.
+        # Updates that leave the searched columns alone, like prompt line backfills, skip the index.
+        f"CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF language, {column_list} ON {table} "
+        f"WHEN old.language = {code} OR new.language = {code} BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def _index_exists(connection: Connection, name: str) -> bool:
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": name}
+    ).first() is not None
+
+
+def ensure_search_index(connection: Connection, language: str) -> None:
+    """
+    Create one language's FTS5 indexes and triggers if they do not exist yet.
+
+    Each language has its own index, so a search only ever reads and scores
+    its own language's postings. Call this before writing rows in a language;
+    a newly created index is backfilled from rows written before it existed.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for table in SEARCH_COLUMNS:
+        index = index_name(table, language)
+        if _index_exists(connection, index):
+            continue
+        for statement in _index_ddl(table, language):
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+
+
+async def ensure_language_indexed(db: AsyncSession, language: str) -> None:
+    """Async counterpart of `ensure_search_index`, run in the session's transaction."""
+    connection = await db.connection()
+    await connection.run_sync(ensure_search_index, language)
+
+
+def create_search_index(connection: Connection) -> None:
+    """
+    Create the FTS5 indexes of the default language and every stored language.
+
+    Safe to run on every startup; existing indexes are left alone, while a newly
+    created one is backfilled from rows written before it existed.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    languages = {DEFAULT_LANGUAGE}
+    for table in SEARCH_COLUMNS:
+        languages.update(stored_languages(connection, table))
+    for language in sorted(languages):
+        ensure_search_index(connection, language)
+
+
+def drop_search_index(connection: Connection) -> None:
+    """Drop every language's FTS5 index with its source view and triggers."""
+    if connection.dialect.name != "sqlite":
+        return
+    for table in SEARCH_COLUMNS:
+        # Also matches the single, language-less index of older schemas
+        for kind, pattern in (
+            ("trigger", f"{table}_fts_*"),
+            ("table", f"{table}_fts*"),
+            ("view", f"{table}_search_source*"),
+        ):
+            names = connection.execute(
+                text(
+                    "SELECT name FROM sqlite_master WHERE type = :kind AND name GLOB :pattern "
+                    "AND (type != 'table' OR sql LIKE 'CREATE VIRTUAL TABLE%')"
+                ),
+                {"kind": kind, "pattern": pattern}
+            ).scalars().all()
+            for name in names:
+                connection.exec_driver_sql(f"DROP {kind.upper()} IF EXISTS {name}")
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target: MetaData, connection: Connection, **kw: Any) -> None:
+    create_search_index(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _before_drop(target: MetaData, connection: Connection, **kw: Any) -> None:
+    drop_search_index(connection)
+
+
+def _fts_statement(table: str, index: str, kind: str, title: str, meaning: str, top: int) -> str:
+    """Ranked matches from one index, joined back to their rows after the top-k cut."""
+    weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS[table])
+    # Every match is scored, and only the best `top` are kept by the sort and joined
+    return (
+        f"SELECT '{kind}' AS type, t.id AS id, t.{title} AS text, t.{meaning} AS meaning, m.score AS score "
+        f"FROM (SELECT rowid AS id, bm25({index}, {weights}) AS score "
+        f"FROM {index} WHERE {index} MATCH :query ORDER BY score LIMIT {top}) AS m "
+        f"JOIN {table} AS t ON t.id = m.id"
+    )
+
+
+async def search_vocabulary(
+    db: AsyncSession,
+    query: str,
+    kind: SearchKind = "all",
+    limit: int = 20,
+    offset: int = 0,
+    language: str = DEFAULT_LANGUAGE
+) -> List[Dict[str, Any]]:
+    """
+    Search one language's words and grammar, best matches first.
+
+    On SQLite this uses the language's own FTS5 indexes: matching ignores case
+    and diacritics, every query word matches as a prefix, and results are
+    ranked by bm25 with the term column weighted highest. Every match is
+    scored, and each index only hands the best `offset + limit` on to the
+    join. Other databases fall back to a case-insensitive substring match
+    ordered by id.
+
+    Args:
+        db: Database session
+        query: Free-text search query
+        kind: Search words, grammar or both
+        limit: Maximum number of results to return
+        offset: Number of ranked results to skip
+        language: Language code of the vocabulary to search
+
+    Returns:
+        List of result dictionaries with type, id, text, meaning and score
+    """
+    tables: List[str] = ["words", "grammar"] if kind == "all" else [kind]
+    if db.get_bind().dialect.name != "sqlite":
+        return await _search_like(db, query, tables, limit, offset, language)
+
+    match = build_match_query(query)
+    if match is None:
+        return []
+    # Each index only has to produce enough rows to cover the requested page
+    top = offset + limit
+    # A language nobody has written to has no index yet, and nothing to find
+    indexes = {index_name(table, language): table for table in tables}
+    existing = await db.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN :names")
+        .bindparams(bindparam("names", expanding=True)),
+        {"names": list(indexes)}
+    )
+    tables = [indexes[name] for name in existing.scalars()]
+    if not tables:
+        return []
+    statements = []
+    if "words" in tables:
+        statements.append(_fts_statement(
+            "words", index_name("words", language), "word", "vietnamese_word", "english_definition", top
+        ))
+    if "grammar" in tables:
+        statements.append(_fts_statement(
+            "grammar", index_name("grammar", language), "grammar", "grammar_point", "english_explanation", top
+        ))
+    sql = " UNION ALL ".join(statements) + f" ORDER BY score, type, id LIMIT {limit} OFFSET {offset}"
+    result = await db.execute(text(sql), {"query": match})
+    return [dict(row) for row in result.mappings()]
+
+
+async def _search_like(
+    db: AsyncSession,
+    query: str,
+    tables: List[str],
+    limit: int,
+    offset: int,
+    language: str
+) -> List[Dict[str, Any]]:
+    """Substring search for databases without an FTS5 index."""
+    pattern = f"%{query.strip()}%"
+    statements = []
+    if "words" in tables:
+        statements.append(
+            select(
+                literal("word").label("type"), Word.id,
+                Word.vietnamese_word.label("text"), Word.english_definition.label("meaning"),
+                literal(0.0).label("score")
+            ).where(
+                Word.language == language,
+                or_(Word.vietnamese_word.ilike(pattern), Word.english_definition.ilike(pattern))
+            )
+        )
+    if "grammar" in tables:
+        statements.append(
+            select(
+                literal("grammar").label("type"), Grammar.id,
+                Grammar.grammar_point.label("text"), Grammar.english_explanation.label("meaning"),
+                literal(0.0).label("score")
+            ).where(
+                Grammar.language == language,
+                or_(Grammar.grammar_point.ilike(pattern), Grammar.english_explanation.ilike(pattern))
+            )
+        )
+    combined = union_all(*statements).subquery()
+    stmt = select(combined).order_by(combined.c.type, combined.c.id).limit(limit).offset(offset)
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
@@ -0,0 +1,291 @@
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+import asyncio
+import math
+import time
+import uuid
+from app.config import settings
+
+# Refill the bucket for the time since its last update, then take `amount` (negative to give back).
+# The server clock is used, so every worker sees the same time.
+_TAKE_TOKENS = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local amount, capacity, rate = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate - amount)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(tokens)
+"""
+
+# Delete a lock only while it still holds the caller's token
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SharedStore(ABC):
+    """
+    Key-value store shared by every worker of a deployment.
+
+    It holds shared cache entries, token-bucket rate limits and locks, and
+    carries broadcast messages between workers. Keys and channels are
+    namespaced with the store's prefix, so several deployments can share one
+    server.
+    """
+
+    backend: str = "abstract"
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return a key's value, or None if it is missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value, expiring it after `ttl_seconds` if given."""
+
+    @abstractmethod
+    async def set_if_absent(self, key: str, value: bytes, ttl_seconds: float) -> bool:
+        """Store a value only if the key does not exist, returning whether it was stored."""
+
+    @abstractmethod
+    async def delete_if_equal(self, key: str, value: bytes) -> bool:
+        """Delete a key only if it still holds `value`, returning whether it was deleted."""
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every key starting with `prefix`, returning how many were deleted."""
+
+    @abstractmethod
+    async def count_prefix(self, prefix: str) -> int:
+        """Count the keys starting with `prefix`. This scans the keyspace; keep it off hot paths."""
+
+    @abstractmethod
+    async def take_tokens(self, key: str, amount: float, capacity: float, rate: float) -> float:
+        """
+        Take `amount` tokens from a bucket refilled at `rate` tokens per second, up to `capacity`.
+
+        A negative amount gives tokens back. The balance may go negative, which
+        is capacity taken on credit.
+
+        Returns:
+            The bucket's balance after the change
+        """
+
+    @abstractmethod
+    async def publish(self, channel: str, message: bytes) -> None:
+        """Send a message to every current subscriber of a channel."""
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        """Yield the messages published to a channel from now on."""
+
+    async def close(self) -> None:
+        """Release connections held by the store."""
+
+
+class MemoryStore(SharedStore):
+    """
+    In-process store with the same behaviour as the Redis one.
+
+    It is only shared by the tasks of one process, so it stands in for Redis
+    in tests and single-worker development.
+    """
+
+    backend = "memory"
+
+    def __init__(self, prefix: str = "", clock: Callable[[], float] = time.monotonic) -> None:
+        super().__init__(prefix)
+        self._clock = clock
+        self._values: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue[bytes]]] = {}
+
+    def _live(self, key: str) -> Optional[bytes]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= self._clock():
+            del self._values[key]
+            return None
+        return value
+
+    def _expiry(self, ttl_seconds: Optional[float]) -> Optional[float]:
+        return None if ttl_seconds is None else self._clock() + ttl_seconds
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._live(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        self._values[self.prefix + key] = (value, self._expiry(ttl_seconds))
+
+    async def set_if_absent(self, key: str, value: bytes, ttl_seconds: float) -> bool:
+        if self._live(self.prefix + key) is not None:
+            return False
+        self._values[self.prefix + key] = (value, self._expiry(ttl_seconds))
+        return True
+
+    async def delete_if_equal(self, key: str, value: bytes) -> bool:
+        if self._live(self.prefix + key) != value:
+            return False
+        del self._values[self.prefix + key]
+        return True
+
+    async def delete_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._values if key.startswith(self.prefix + prefix)]
+        for key in keys:
+            del self._values[key]
+        return len(keys)
+
+    async def count_prefix(self, prefix: str) -> int:
+        return sum(1 for key in list(self._values) if key.startswith(self.prefix + prefix) and self._live(key))
+
+    async def take_tokens(self, key: str, amount: float, capacity: float, rate: float) -> float:
+        now = self._clock()
+        tokens, updated = self._buckets.get(self.prefix + key, (capacity, now))
+        tokens = min(capacity, tokens + max(0.0, now - updated) * rate - amount)
+        self._buckets[self.prefix + key] = (tokens, now)
+        return tokens
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        for queue in self._subscribers.get(self.prefix + channel, []):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        queue: asyncio.Queue[bytes] = asyncio.Queue()
+        subscribers = self._subscribers.setdefault(self.prefix + channel, [])
+        subscribers.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            subscribers.remove(queue)
+
+
+class RedisStore(SharedStore):
+    """Store on a Redis-protocol server (Redis, Valkey, KeyDB, ...), using the `redis` extra."""
+
+    backend = "redis"
+
+    def __init__(self, url: str, prefix: str = "") -> None:
+        super().__init__(prefix)
+        try:
+            from redis.asyncio import Redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "SHARED_STORE_BACKEND=redis needs the redis client: poetry install --extras redis"
+            ) from exc
+        self._redis: Any = Redis.from_url(url)
+        self._take_tokens = self._redis.register_script(_TAKE_TOKENS)
+        self._release = self._redis.register_script(_RELEASE)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value: Optional[bytes] = await self._redis.get(self.prefix + key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        milliseconds = None if ttl_seconds is None else max(1, math.ceil(ttl_seconds * 1000))
+        await self._redis.set(self.prefix + key, value, px=milliseconds)
+
+    async def set_if_absent(self, key: str, value: bytes, ttl_seconds: float) -> bool:
+        stored = await self._redis.set(self.prefix + key, value, px=max(1, math.ceil(ttl_seconds * 1000)), nx=True)
+        return bool(stored)
+
+    async def delete_if_equal(self, key: str, value: bytes) -> bool:
+        return bool(await self._release(keys=[self.prefix + key], args=[value]))
+
+    async def _keys(self, prefix: str) -> AsyncIterator[bytes]:
+        async for key in self._redis.scan_iter(match=_glob_escape(self.prefix + prefix) + "*", count=1000):
+            yield key
+
+    async def delete_prefix(self, prefix: str) -> int:
+        deleted = 0
+        batch: List[bytes] = []
+        async for key in self._keys(prefix):
+            batch.append(key)
+            if len(batch) == 1000:
+                deleted += await self._redis.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += await self._redis.unlink(*batch)
+        return deleted
+
+    async def count_prefix(self, prefix: str) -> int:
+        return sum([1 async for _ in self._keys(prefix)])
+
+    async def take_tokens(self, key: str, amount: float, capacity: float, rate: float) -> float:
+        # Floats travel as strings; Lua numbers returned as replies would be truncated to integers
+        balance = await self._take_tokens(keys=[self.prefix + key], args=[repr(amount), repr(capacity), repr(rate)])
+        return float(balance)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self._redis.publish(self.prefix + channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.prefix + channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def _glob_escape(text: str) -> str:
+    """Escape the glob characters of a key prefix for SCAN MATCH."""
+    return "".join(f"\\{char}" if char in "*?[]\\" else char for char in text)
+
+
+@asynccontextmanager
+async def hold_lock(store: Optional[SharedStore], name: str, ttl_seconds: float) -> AsyncIterator[bool]:
+    """
+    Hold a named lock shared by every worker, if it is free.
+
+    Yields whether this worker got the lock. The lock expires after
+    `ttl_seconds` in case its holder dies, and is released on exit only if
+    it is still ours. Without a store there is one worker, which always gets it.
+    """
+    if store is None:
+        yield True
+        return
+    token = uuid.uuid4().hex.encode()
+    key = f"lock:{name}"
+    acquired = await store.set_if_absent(key, token, ttl_seconds)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            await store.delete_if_equal(key, token)
+
+
+async def lock_held(store: SharedStore, name: str) -> bool:
+    """Whether some worker holds the named lock."""
+    return await store.get(f"lock:{name}") is not None
+
+
+def create_shared_store() -> Optional[SharedStore]:
+    """Build the shared store selected in settings, or None when every worker keeps its own state."""
+    if settings.shared_store_backend == "redis":
+        return RedisStore(settings.shared_store_url, settings.shared_store_prefix)
+    if settings.shared_store_backend == "memory":
+        return MemoryStore(settings.shared_store_prefix)
+    return None
+
+
+shared_store: Optional[SharedStore] = create_shared_store()
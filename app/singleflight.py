@@ -0,0 +1,133 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+from app.config import settings
+from app.shared_store import SharedStore, hold_lock, lock_held, shared_store
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one in-flight call.
+
+    The first caller for a key starts the work; callers arriving while it is still
+    running await the same future instead of repeating it. The call runs as its own
+    task, so one caller being cancelled does not cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, asyncio.Future[Any]] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn` for `key`, or join the call already in flight for it."""
+        existing = self._calls.get(key)
+        if existing is not None:
+            self.coalesced += 1
+            result: T = await asyncio.shield(existing)
+            return result
+
+        future: asyncio.Future[T] = asyncio.ensure_future(fn())
+        self._calls[key] = future
+        self.executed += 1
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    def _forget(self, key: str, future: asyncio.Future[Any]) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Mark the exception as retrieved when every caller has gone away
+        if not future.cancelled():
+            future.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many calls ran and how many joined a call already in flight."""
+        return {
+            "in_flight": self.in_flight,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
+
+    def reset(self) -> None:
+        """Reset the counters (in-flight calls are left alone)."""
+        self.executed = 0
+        self.coalesced = 0
+
+
+# Shared by every request handled on this worker's event loop
+inflight = SingleFlight()
+
+
+class SharedSingleFlight:
+    """
+    Collapse identical calls across every worker of a deployment.
+
+    The worker that takes a key's lock in the shared store runs the call, which
+    must leave its result where every worker can read it, such as a shared
+    question cache. Workers finding the lock taken poll until it is released
+    and then read that result. A worker that takes the lock reads first too,
+    since another may have finished the call just before. If there is no
+    result because the call failed, the next worker to take the lock runs it
+    again. Each call counts once, as executed or as waited.
+    """
+
+    def __init__(self, store: SharedStore, poll_interval_seconds: float) -> None:
+        self.store = store
+        self.poll_interval_seconds = poll_interval_seconds
+        self.executed = 0
+        self.waited = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        load: Callable[[], Awaitable[Optional[T]]],
+        ttl_seconds: float
+    ) -> T:
+        """
+        Run `fn` for `key` on one worker and return what `load` reads back on the others.
+
+        Args:
+            key: Identity of the call
+            fn: The call; it must store every result, empty ones included, for `load` to find
+            load: Read the stored result, or None only if nothing is stored
+            ttl_seconds: Lock lifetime; longer than `fn` can run, so a dead worker's lock expires
+
+        Returns:
+            The call's result
+        """
+        while True:
+            async with hold_lock(self.store, f"flight:{key}", ttl_seconds) as acquired:
+                if acquired:
+                    # The previous holder may have stored the result after our caller last looked
+                    result = await load()
+                    if result is not None:
+                        self.waited += 1
+                        return result
+                    self.executed += 1
+                    return await fn()
+            while await lock_held(self.store, f"flight:{key}"):
+                await asyncio.sleep(self.poll_interval_seconds)
+            result = await load()
+            if result is not None:
+                self.waited += 1
+                return result
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many calls this worker ran and how many it waited for on another worker."""
+        return {"executed": self.executed, "waited": self.waited}
+
+    def reset(self) -> None:
+        self.executed = 0
+        self.waited = 0
+
+
+# Only with a shared store; otherwise each worker coalesces on its own
+shared_inflight: Optional[SharedSingleFlight] = (
+    SharedSingleFlight(shared_store, settings.shared_store_poll_interval_seconds) if shared_store is not None else None
+)
@@ -0,0 +1,166 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple, TypeVar
+from collections import OrderedDict
+import asyncio
+import logging
+import time
+import uuid
+import orjson
+from app.config import settings
+from app.shared_store import SharedStore, shared_store
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+VOCABULARY_TABLES: Tuple[str, ...] = ("words", "grammar")
+
+# Workers tell each other about writes on this shared store channel
+INVALIDATION_CHANNEL: str = "vocabulary-invalidations"
+# Tells this worker's own messages apart from the others'
+WORKER_ID: str = uuid.uuid4().hex
+# Seconds between attempts to resubscribe after the store connection is lost
+RESUBSCRIBE_DELAY_SECONDS: float = 1.0
+
+
+class VocabularyCache:
+    """
+    Read-through, in-process cache of word and grammar reads.
+
+    Every entry is keyed by its table's generation counter. Writes bump the
+    counter, so entries read before the write can no longer be hit and are
+    dropped. Only writes made through this process bump it, so entries also
+    expire after `ttl_seconds`: that bounds how long a write from another
+    worker or process goes unseen. Memory is bounded by both entry count and
+    total cached rows, and the least recently used entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_rows: int,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # Value, row weight and expiry time (None for never) by key
+        self._entries: OrderedDict[Tuple[str, int, Hashable], Tuple[Any, int, Optional[float]]] = OrderedDict()
+        self._generations: Dict[str, int] = {table: 0 for table in VOCABULARY_TABLES}
+        self._rows = 0
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, table: str) -> int:
+        return self._generations.get(table, 0)
+
+    async def get_or_load(
+        self,
+        table: str,
+        key: Hashable,
+        loader: Callable[[], Awaitable[T]]
+    ) -> T:
+        """
+        Return the cached value for `key`, calling `loader` on a miss.
+
+        A value loaded while a write bumped the generation is returned but not
+        stored, so a slow read can never repopulate the cache with stale rows.
+        """
+        generation = self.generation(table)
+        full_key = (table, generation, key)
+        entry = self._entries.get(full_key)
+        if entry is not None and entry[2] is not None and entry[2] <= self._clock():
+            self._rows -= self._entries.pop(full_key)[1]
+            entry = None
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(full_key)
+            value: T = entry[0]
+            return value
+
+        self.misses += 1
+        value = await loader()
+        if self.generation(table) == generation:
+            self._store(full_key, value)
+        return value
+
+    def _store(self, full_key: Tuple[str, int, Hashable], value: Any) -> None:
+        weight = len(value) if isinstance(value, list) else 1
+        if weight > self.max_rows or self.max_entries <= 0:
+            return
+        previous = self._entries.pop(full_key, None)
+        if previous is not None:
+            self._rows -= previous[1]
+        expires_at = None if self.ttl_seconds is None else self._clock() + self.ttl_seconds
+        self._entries[full_key] = (value, weight, expires_at)
+        self._rows += weight
+        while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+            _, (_, evicted_weight, _) = self._entries.popitem(last=False)
+            self._rows -= evicted_weight
+
+    def invalidate(self, table: str) -> None:
+        """Bump a table's generation and drop everything cached for it."""
+        self._generations[table] = self.generation(table) + 1
+        for full_key in [k for k in self._entries if k[0] == table]:
+            self._rows -= self._entries.pop(full_key)[1]
+
+    def invalidate_all(self) -> None:
+        """Bump every known generation and drop every entry."""
+        for table in {*self._generations, *(full_key[0] for full_key in self._entries)}:
+            self.invalidate(table)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        self._entries.clear()
+        self._rows = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit-rate metrics, current size and table generations."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "rows": self._rows,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "generations": dict(self._generations),
+        }
+
+
+vocab_cache = VocabularyCache(
+    settings.vocab_cache_max_entries, settings.vocab_cache_max_rows, settings.vocab_cache_ttl_seconds
+)
+
+
+async def invalidate_vocabulary(names: Iterable[str]) -> None:
+    """Invalidate cache namespaces on this worker and, with a shared store, on every other worker."""
+    names = list(names)
+    for name in names:
+        vocab_cache.invalidate(name)
+    if shared_store is not None:
+        await shared_store.publish(INVALIDATION_CHANNEL, orjson.dumps({"worker": WORKER_ID, "names": names}))
+
+
+async def run_invalidation_listener(store: SharedStore) -> None:
+    """
+    Apply the invalidations other workers publish, forever. Cancel the task to stop it.
+
+    Messages sent while the subscription is down are lost, so everything cached
+    is dropped each time it is re-established.
+    """
+    while True:
+        try:
+            async for message in store.subscribe(INVALIDATION_CHANNEL):
+                event = orjson.loads(message)
+                if event["worker"] != WORKER_ID:
+                    for name in event["names"]:
+                        vocab_cache.invalidate(name)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Lost the vocabulary invalidation subscription; resubscribing")
+        await asyncio.sleep(RESUBSCRIBE_DELAY_SECONDS)
+        vocab_cache.invalidate_all()
@@ -0,0 +1 @@
+"""Load and micro-benchmarks for the API and the question pipeline (run with `python -m benchmarks`)."""
@@ -0,0 +1,203 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from datetime import datetime, UTC
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_db, get_session_maker
+from app.embeddings import embedding_index, wait_for_embeddings
+from app.main import app
+from app.openai_service import get_llm, loaded_llm
+from app.question_cache import question_cache
+from app.singleflight import inflight
+from app.vocab_cache import vocab_cache
+from benchmarks.cold_start import measure_cold_start
+from benchmarks.dataset import create_engine, prepare_dataset, session_maker
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.load import build_scenarios, run_scenario
+from benchmarks.micro import run_micro_benchmarks
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+
+
+def _git_revision() -> Dict[str, Any]:
+    """The commit being measured, and whether the tree had local changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+async def _reset_caches() -> None:
+    if question_cache is not None:
+        await question_cache.clear()
+    vocab_cache.clear()
+    inflight.reset()
+    llm = loaded_llm()
+    if llm is not None:
+        llm.reset()
+
+
+async def benchmark_dataset(
+    size: int,
+    fake: FakeOpenAI,
+    requests: int,
+    concurrency: int,
+    only: Optional[Sequence[str]] = None,
+    rebuild: bool = False
+) -> Dict[str, Any]:
+    """Run every route scenario against a seeded database of `size` words."""
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset = await prepare_dataset(size, Path(workdir), rebuild)
+        engine = create_engine(dataset["path"])
+        maker = session_maker(engine)
+
+        async def override_get_db() -> AsyncIterator[AsyncSession]:
+            async with maker() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_session_maker] = lambda: maker
+        if embedding_index is not None:
+            embedding_index.reset(dataset["embeddings"])
+        await _reset_caches()
+        endpoints: Dict[str, Any] = {}
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+                for scenario in build_scenarios(dataset["counts"]):
+                    if only and not any(term in scenario.name for term in only):
+                        continue
+                    count = max(10, int(requests * scenario.weight))
+                    endpoints[scenario.name] = await run_scenario(client, scenario, count, concurrency)
+                    print(f"  {scenario.name:<40} {_format_line(endpoints[scenario.name])}", file=sys.stderr)
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            app.dependency_overrides.pop(get_session_maker, None)
+            await wait_for_embeddings()
+            if embedding_index is not None:
+                embedding_index.reset()
+            await engine.dispose()
+    return {
+        "rows": dataset["counts"],
+        "seed_seconds": dataset["seed_seconds"],
+        "reused_seed": dataset["reused"],
+        "endpoints": endpoints,
+    }
+
+
+def _format_line(result: Dict[str, Any]) -> str:
+    return (
+        f"p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+        f"p99 {result['p99_ms']:>9.2f}ms  {result['rps']:>9.1f} req/s  errors {result['errors']}"
+    )
+
+
+async def run_benchmarks(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    requests: int = 200,
+    concurrency: int = 10,
+    llm_latency: float = 0.05,
+    llm_jitter: float = 0.0,
+    only: Optional[Sequence[str]] = None,
+    micro: bool = True,
+    micro_seconds: float = 0.2,
+    rebuild: bool = False,
+    cold_start_runs: int = 5
+) -> Dict[str, Any]:
+    """
+    Run the load and micro-benchmarks and return the results document.
+
+    The app runs in-process behind ASGITransport with model calls answered by
+    FakeOpenAI. Client-side rate limits are lifted for the run so they do not
+    cap throughput; retries, the circuit breaker and the concurrency limit stay
+    as configured. Worker start-up is timed in `cold_start_runs` fresh processes
+    (0 to skip).
+    """
+    fake = FakeOpenAI(latency=llm_latency, jitter=llm_jitter)
+    # The fake answers every call, so any key will do
+    settings.openai_api_key = settings.openai_api_key or "benchmark"
+    llm = get_llm()
+    saved = (llm.client, llm.request_bucket, llm.token_bucket)
+    llm.client, llm.request_bucket, llm.token_bucket = fake.client(), None, None
+    datasets: Dict[str, Any] = {}
+    try:
+        for size in sizes:
+            print(f"Dataset: {size} words", file=sys.stderr)
+            datasets[str(size)] = await benchmark_dataset(size, fake, requests, concurrency, only, rebuild)
+    finally:
+        llm.client, llm.request_bucket, llm.token_bucket = saved
+        await _reset_caches()
+
+    return {
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        **_git_revision(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {
+            "sizes": list(sizes),
+            "requests": requests,
+            "concurrency": concurrency,
+            "llm_latency_seconds": llm_latency,
+            "llm_jitter_seconds": llm_jitter,
+        },
+        "datasets": datasets,
+        "micro": run_micro_benchmarks(micro_seconds) if micro else {},
+        "cold_start": measure_cold_start(cold_start_runs) if cold_start_runs > 0 else {},
+        "fake_llm_calls": fake.calls,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark every API route and the question pipeline, writing the results as JSON."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Dataset sizes in words (default: 1000 100000 1000000)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario (scaled by its weight)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients per scenario")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds the fake model takes per call")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="Extra random seconds per model call")
+    parser.add_argument("--only", nargs="+", help="Only run scenarios whose name contains one of these strings")
+    parser.add_argument("--no-micro", action="store_true", help="Skip the micro-benchmarks")
+    parser.add_argument("--cold-start-runs", type=int, default=5,
+                        help="Worker restarts to time in fresh processes (0 to skip)")
+    parser.add_argument("--rebuild", action="store_true", help="Re-seed cached datasets in benchmarks/.data")
+    parser.add_argument("--output", type=Path, help="Result file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_benchmarks(
+        sizes=args.sizes,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        llm_latency=args.llm_latency,
+        llm_jitter=args.llm_jitter,
+        only=args.only,
+        micro=not args.no_micro,
+        rebuild=args.rebuild,
+        cold_start_runs=args.cold_start_runs,
+    ))
+    output = args.output
+    if output is None:
+        stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"{stamp}-{results['commit'] or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n")
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
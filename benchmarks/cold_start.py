@@ -0,0 +1,98 @@
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Median milliseconds from starting a worker process to a migrated database, on an already-current schema
+COLD_START_BUDGET_MS: float = 750.0
+
+# Run in a fresh interpreter: import the app, then run the startup migration check
+_CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from app.migrations import init_db
+asyncio.run(init_db())
+ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "sdk_loaded": "openai" in sys.modules,
+}))
+"""
+
+
+def _boot(database: Path, workdir: Path) -> Dict[str, Any]:
+    """Start one worker process against `database` and return its timings."""
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{database}",
+        "EMBEDDING_DIR": str(workdir / "embeddings"),
+    }
+    # A worker that never calls the model must start without a key
+    env.pop("OPENAI_API_KEY", None)
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    total_ms = (time.perf_counter() - started) * 1000
+    timings: Dict[str, Any] = json.loads(output.strip().splitlines()[-1])
+    return {"total_ms": total_ms, **timings}
+
+
+def measure_cold_start(runs: int = 5, budget_ms: float = COLD_START_BUDGET_MS) -> Dict[str, Any]:
+    """
+    Time worker start-up in fresh processes: interpreter, app import and schema check.
+
+    The first boot creates the database; the following `runs` restart against
+    it, as an autoscaled container does. Medians of the restarts are reported
+    and checked against `budget_ms`.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        database = workdir / "cold-start.db"
+        first = _boot(database, workdir)
+        restarts = [_boot(database, workdir) for _ in range(max(1, runs))]
+    result: Dict[str, Any] = {
+        "runs": len(restarts),
+        "first_boot_ms": first["total_ms"],
+        "first_boot_startup_ms": first["startup_ms"],
+    }
+    for metric in ("total_ms", "import_ms", "startup_ms"):
+        result[metric] = statistics.median(run[metric] for run in restarts)
+    result["sdk_loaded"] = any(run["sdk_loaded"] for run in restarts)
+    result["budget_ms"] = budget_ms
+    result["within_budget"] = result["total_ms"] <= budget_ms
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.cold_start",
+        description="Time worker start-up; exits with status 1 if the median restart is over budget."
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Restarts to time after the first boot")
+    parser.add_argument("--budget-ms", type=float, default=COLD_START_BUDGET_MS,
+                        help=f"Allowed median restart time (default {COLD_START_BUDGET_MS:.0f})")
+    args = parser.parse_args(argv)
+
+    result = measure_cold_start(args.runs, args.budget_ms)
+    print(
+        f"first boot {result['first_boot_ms']:.0f}ms, restart {result['total_ms']:.0f}ms "
+        f"(import {result['import_ms']:.0f}ms, startup {result['startup_ms']:.0f}ms), "
+        f"budget {result['budget_ms']:.0f}ms, SDK loaded: {result['sdk_loaded']}"
+    )
+    sys.exit(0 if result["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
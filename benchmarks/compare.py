@@ -0,0 +1,72 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from pathlib import Path
+import argparse
+import json
+import sys
+
+# Metric name, and whether a higher value is better
+LOAD_METRICS: Tuple[Tuple[str, bool], ...] = (("p50_ms", False), ("p95_ms", False), ("p99_ms", False), ("rps", True))
+COLD_START_METRICS: Tuple[str, ...] = ("total_ms", "import_ms", "startup_ms")
+
+
+def _change(old: float, new: float) -> Optional[float]:
+    return (new - old) / old if old else None
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float) -> Iterator[Tuple[str, str, float, float, float, bool]]:
+    """
+    Yield (benchmark, metric, old, new, relative change, regressed) for every result in both files.
+
+    A change counts as a regression when it is worse than `threshold` (0.1 = 10%).
+    """
+    for size, dataset in new.get("datasets", {}).items():
+        previous = old.get("datasets", {}).get(size, {}).get("endpoints", {})
+        for name, result in dataset["endpoints"].items():
+            if name not in previous:
+                continue
+            for metric, higher_is_better in LOAD_METRICS:
+                change = _change(previous[name][metric], result[metric])
+                if change is None:
+                    continue
+                worse = -change if higher_is_better else change
+                yield f"{size} {name}", metric, previous[name][metric], result[metric], change, worse > threshold
+    for name, result in new.get("micro", {}).items():
+        before = old.get("micro", {}).get(name)
+        if before is None:
+            continue
+        change = _change(before["us_per_op"], result["us_per_op"])
+        if change is not None:
+            yield f"micro {name}", "us_per_op", before["us_per_op"], result["us_per_op"], change, change > threshold
+    previous_start = old.get("cold_start") or {}
+    for metric in COLD_START_METRICS:
+        if metric not in previous_start or metric not in (new.get("cold_start") or {}):
+            continue
+        change = _change(previous_start[metric], new["cold_start"][metric])
+        if change is not None:
+            yield "cold start", metric, previous_start[metric], new["cold_start"][metric], change, change > threshold
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.compare",
+        description="Compare two benchmark result files; exits with status 1 if anything regressed."
+    )
+    parser.add_argument("old", type=Path, help="Baseline result file")
+    parser.add_argument("new", type=Path, help="Result file to check")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change that counts (default 0.10)")
+    args = parser.parse_args(argv)
+
+    old = json.loads(args.old.read_text())
+    new = json.loads(args.new.read_text())
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    regressions = 0
+    for benchmark, metric, before, after, change, regressed in compare(old, new, args.threshold):
+        regressions += regressed
+        marker = "REGRESSION" if regressed else ""
+        print(f"{benchmark:<60} {metric:<10} {before:>12.3f} {after:>12.3f} {change:>+8.1%} {marker}")
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+import shutil
+import time
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from app.config import settings
+from app.database import Base, create_engine_from_settings
+from app.db_seeder import WORDS, GRAMMAR
+from app.embeddings import embedding_index, run_backfill
+from app.migrations import LATEST_VERSION, migrate
+from app.models import Word, Grammar, WordReview
+
+DATA_DIR = Path(__file__).parent / ".data"
+INSERT_CHUNK_SIZE = 10_000
+REVIEW_USER_ID = "bench"
+REVIEWED_ITEMS = 5_000
+
+
+def dataset_counts(size: int) -> Dict[str, int]:
+    """Row counts for a dataset of `size` words: one grammar point per 20 words (at least the seed set)."""
+    return {
+        "words": size,
+        "grammar": max(len(GRAMMAR), size // 20),
+        "reviews": min(size, REVIEWED_ITEMS),
+    }
+
+
+def _word_rows(count: int) -> Iterator[Dict[str, Any]]:
+    # Seed words with a numeric suffix keep realistic text while staying unique
+    for i in range(count):
+        base = WORDS[i % len(WORDS)]
+        yield {
+            "vietnamese_word": f"{base['vietnamese_word']} {i}",
+            "english_definition": f"{base['english_definition']} ({i})",
+        }
+
+
+def _grammar_rows(count: int) -> Iterator[Dict[str, Any]]:
+    for i in range(count):
+        base = GRAMMAR[i % len(GRAMMAR)]
+        yield {
+            "grammar_point": f"{base['grammar_point']} {i}",
+            "english_explanation": base["english_explanation"],
+            "example_sentence": base.get("example_sentence"),
+        }
+
+
+def _review_rows(count: int) -> Iterator[Dict[str, Any]]:
+    # Spread due dates over the past day so the due queue has a real ordering to do
+    now = datetime.now(UTC)
+    for i in range(count):
+        yield {
+            "user_id": REVIEW_USER_ID,
+            "word_id": i + 1,
+            "due_at": now - timedelta(seconds=(i * 7919) % 86_400),
+        }
+
+
+def _chunks(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def create_engine(path: Path) -> AsyncEngine:
+    """An engine on a benchmark database file, configured exactly like the app's."""
+    return create_engine_from_settings(settings.model_copy(update={"database_url": f"sqlite+aiosqlite:///{path}"}))
+
+
+async def _seed(path: Path, size: int) -> None:
+    engine = create_engine(path)
+    counts = dataset_counts(size)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(migrate)
+        # Core executemany in large chunks; the search triggers index every row as it lands
+        tables: List[Tuple[Type[Base], Iterator[Dict[str, Any]]]] = [
+            (Word, _word_rows(counts["words"])),
+            (Grammar, _grammar_rows(counts["grammar"])),
+            (WordReview, _review_rows(counts["reviews"])),
+        ]
+        for model, rows in tables:
+            for chunk in _chunks(rows, INSERT_CHUNK_SIZE):
+                async with engine.begin() as conn:
+                    await conn.execute(insert(model), chunk)
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("PRAGMA optimize")
+    finally:
+        await engine.dispose()
+
+
+async def prepare_dataset(size: int, workdir: Path, rebuild: bool = False) -> Dict[str, Any]:
+    """
+    Copy a seeded database of `size` words and its embeddings into `workdir`, building them first if needed.
+
+    Seeded files are kept in benchmarks/.data and reused across runs, since the
+    1M-row dataset takes a while to build; the schema version is part of the
+    file name, so a schema change builds a new file. Each run works on a fresh
+    copy so write benchmarks never change the cached file.
+
+    Returns:
+        Dataset description with the working file paths, row counts and seed time
+    """
+    DATA_DIR.mkdir(exist_ok=True)
+    cached = DATA_DIR / f"vocab-{size}-v{LATEST_VERSION}.db"
+    seed_seconds = 0.0
+    if rebuild or not cached.exists():
+        partial = cached.with_suffix(".partial")
+        partial.unlink(missing_ok=True)
+        started = time.perf_counter()
+        await _seed(partial, size)
+        seed_seconds = time.perf_counter() - started
+        partial.replace(cached)
+    working = workdir / cached.name
+    shutil.copyfile(cached, working)
+    # As at app startup: tables added since the file was seeded are created on the copy
+    engine = create_engine(working)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(migrate)
+    finally:
+        await engine.dispose()
+    embeddings = await _prepare_embeddings(cached, workdir, rebuild)
+    return {
+        "path": working,
+        "embeddings": embeddings,
+        "counts": dataset_counts(size),
+        "seed_seconds": round(seed_seconds, 3),
+        "reused": seed_seconds == 0.0,
+    }
+
+
+async def _prepare_embeddings(cached: Path, workdir: Path, rebuild: bool) -> Optional[Path]:
+    """
+    Copy the embedding stores of a cached database into `workdir`, building them first if needed.
+
+    The stores are cached next to the database they were built from, so a run
+    never spends its first requests embedding the whole vocabulary.
+    """
+    if embedding_index is None:
+        return None
+    stores = cached.with_name(f"{cached.stem}-{embedding_index.embedder.signature}.embeddings")
+    if rebuild or not stores.exists():
+        shutil.rmtree(stores, ignore_errors=True)
+        engine = create_engine(cached)
+        embedding_index.reset(stores)
+        try:
+            await run_backfill(session_maker(engine))
+        finally:
+            embedding_index.reset()
+            await engine.dispose()
+    working = workdir / "embeddings"
+    shutil.copytree(stores, working)
+    return working
+
+
+def session_maker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -0,0 +1,91 @@
+from typing import Any, Dict, List
+import asyncio
+import itertools
+import json
+import random
+import re
+import httpx
+from openai import AsyncOpenAI
+
+# Matches both the generation prompt and the top-up follow-up
+_COUNT_PATTERN = re.compile(r"Create (\d+) ")
+
+
+class FakeOpenAI:
+    """
+    In-process stand-in for the chat completions API.
+
+    Every call waits `latency` seconds (plus up to `jitter` more) and answers with
+    as many valid, unique questions as the prompt asks for, as a plain or a
+    streamed completion. Nothing leaves the process, so results measure the app,
+    not the network.
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, seed: int = 0) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._ids = itertools.count()
+
+    def client(self) -> AsyncOpenAI:
+        """An SDK client whose requests are answered by this fake."""
+        return AsyncOpenAI(
+            api_key="benchmark",
+            base_url="http://fake-openai/v1",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+        )
+
+    def questions(self, count: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "question_type": 1,
+                "question": f"What does 'từ {n}' mean?",
+                "answers": [f"meaning {n}", "water", "house", "to eat"],
+                "correct_idx": 0,
+            }
+            for n in itertools.islice(self._ids, count)
+        ]
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        body = json.loads(request.content)
+        prompt = body["messages"][-1]["content"]
+        match = _COUNT_PATTERN.search(prompt)
+        count = int(match.group(1)) if match else 5
+        await asyncio.sleep(self.latency + self._rng.uniform(0, self.jitter))
+
+        questions = self.questions(count)
+        structured = body.get("response_format", {}).get("type") == "json_schema"
+        content = json.dumps({"questions": questions} if structured else questions, ensure_ascii=False)
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        if body.get("stream"):
+            return httpx.Response(
+                200, content=self._sse(body["model"], content, usage),
+                headers={"content-type": "text/event-stream"}
+            )
+        return httpx.Response(200, json={
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": usage,
+        })
+
+    def _sse(self, model: str, content: str, usage: Dict[str, int], chunk_size: int = 48) -> bytes:
+        """Split a completion into server-sent chunks the way the API streams it."""
+        base = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": 0, "model": model}
+        events = [
+            {**base, "choices": [{"index": 0, "delta": {"content": content[i:i + chunk_size]}, "finish_reason": None}]}
+            for i in range(0, len(content), chunk_size)
+        ]
+        events.append({**base, "choices": [], "usage": usage})
+        lines = [f"data: {json.dumps(event)}\n\n" for event in events] + ["data: [DONE]\n\n"]
+        return "".join(lines).encode()
@@ -0,0 +1,193 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from dataclasses import dataclass, field
+import asyncio
+import math
+import time
+import uuid
+from httpx import AsyncClient
+
+# Queries rotated through by the search benchmark: common, rare, multi-word and unaccented
+SEARCH_QUERIES = ("chào", "nguoi", "văn phòng", "hoc", "xin", "muoi ngan")
+
+# Questions per quiz session in the answer benchmark, the most a session can hold
+QUESTIONS_PER_SESSION = 20
+
+PathFn = Callable[[int], str]
+BodyFn = Callable[[int], Any]
+
+
+@dataclass
+class Scenario:
+    """One endpoint (or one variant of it) driven with generated requests."""
+    name: str
+    method: str
+    path: PathFn
+    body: Optional[BodyFn] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    # Fetch this path once before the run and send its ETag as If-None-Match
+    etag_from: Optional[str] = None
+    # Called once before the run with the client and the number of requests it will send
+    setup: Optional[Callable[[AsyncClient, int], Awaitable[None]]] = None
+    expected: Sequence[int] = (200,)
+    # Requests that call the model are fewer, since each waits on the fake latency
+    weight: float = 1.0
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds and throughput for one scenario."""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": round(count / wall_seconds, 2) if wall_seconds else 0.0,
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def build_scenarios(counts: Dict[str, int]) -> List[Scenario]:
+    """Scenarios covering every route in app/routes.py for a dataset with the given row counts."""
+    words, grammar = counts["words"], counts["grammar"]
+    run = uuid.uuid4().hex[:8]
+
+    def word_id(i: int) -> int:
+        # A fixed stride visits ids all over the table instead of one hot range
+        return (i * 7919) % words + 1
+
+    def grammar_id(i: int) -> int:
+        return (i * 7919) % grammar + 1
+
+    def new_words(i: int, n: int = 100) -> List[Dict[str, str]]:
+        return [
+            {"vietnamese_word": f"bench {run} {i} {k}", "english_definition": "benchmark word"}
+            for k in range(n)
+        ]
+
+    def new_grammar(i: int, n: int = 100) -> List[Dict[str, str]]:
+        return [
+            {"grammar_point": f"bench {run} {i} {k}", "english_explanation": "benchmark grammar"}
+            for k in range(n)
+        ]
+
+    def generation(generator: str, seed_offset: int = 0) -> BodyFn:
+        # A fresh seed per request (and per scenario) so every call misses the question cache
+        return lambda i: {"num_questions": 5, "seed": seed_offset + i, "generator": generator}
+
+    # Quiz sessions for the answer benchmark, each answered once per question
+    sessions: List[str] = []
+
+    async def create_sessions(client: AsyncClient, answers: int) -> None:
+        sessions.clear()
+        for k in range(math.ceil(answers / QUESTIONS_PER_SESSION)):
+            response = await client.post("/api/v1/sessions", json={
+                "num_questions": QUESTIONS_PER_SESSION, "generator": "template", "seed": 3_000_000 + k
+            })
+            sessions.append(response.json()["session_id"])
+
+    def answer_path(i: int) -> str:
+        return f"/api/v1/sessions/{sessions[i // QUESTIONS_PER_SESSION]}/answers"
+
+    return [
+        Scenario("GET /words", "GET", lambda i: f"/api/v1/words?limit=50&after={word_id(i)}"),
+        Scenario("GET /words (If-None-Match)", "GET", lambda i: "/api/v1/words?limit=50",
+                 etag_from="/api/v1/words?limit=50", expected=(304,)),
+        Scenario("GET /words?stream (1k rows)", "GET",
+                 lambda i: f"/api/v1/words?stream=true&after={max(0, words - 1000)}", weight=0.2),
+        Scenario("GET /words/delta", "GET", lambda i: f"/api/v1/words/delta?since={max(0, words - 500)}&limit=500"),
+        Scenario("GET /words/{id}", "GET", lambda i: f"/api/v1/words/{word_id(i)}"),
+        Scenario("GET /words/{id}/similar", "GET", lambda i: f"/api/v1/words/{word_id(i)}/similar?limit=10"),
+        Scenario("POST /words", "POST", lambda i: "/api/v1/words",
+                 body=lambda i: new_words(i, 1)[0], expected=(201,)),
+        Scenario("POST /words/bulk (100 rows)", "POST", lambda i: "/api/v1/words/bulk",
+                 body=new_words, weight=0.2),
+        Scenario("GET /grammar", "GET", lambda i: f"/api/v1/grammar?limit=50&after={grammar_id(i)}"),
+        Scenario("GET /grammar/delta", "GET", lambda i: f"/api/v1/grammar/delta?since={max(0, grammar - 500)}&limit=500"),
+        Scenario("GET /grammar/{id}", "GET", lambda i: f"/api/v1/grammar/{grammar_id(i)}"),
+        Scenario("POST /grammar", "POST", lambda i: "/api/v1/grammar",
+                 body=lambda i: new_grammar(i, 1)[0], expected=(201,)),
+        Scenario("POST /grammar/bulk (100 rows)", "POST", lambda i: "/api/v1/grammar/bulk",
+                 body=new_grammar, weight=0.2),
+        Scenario("GET /search", "GET", lambda i: f"/api/v1/search?q={SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}"),
+        Scenario("POST /review/words/{id}", "POST", lambda i: f"/api/v1/review/words/{word_id(i)}",
+                 body=lambda i: {"user_id": f"bench-{i % 100}", "grade": i % 6}),
+        Scenario("POST /review/grammar/{id}", "POST", lambda i: f"/api/v1/review/grammar/{grammar_id(i)}",
+                 body=lambda i: {"user_id": f"bench-{i % 100}", "grade": i % 6}),
+        Scenario("GET /review/due", "GET", lambda i: "/api/v1/review/due?user_id=bench&limit=50"),
+        Scenario("POST /generate-questions (openai)", "POST", lambda i: "/api/v1/generate-questions",
+                 body=generation("openai"), weight=0.25),
+        Scenario("POST /generate-questions (template)", "POST", lambda i: "/api/v1/generate-questions",
+                 body=generation("template")),
+        Scenario("POST /generate-questions (template, hard)", "POST", lambda i: "/api/v1/generate-questions",
+                 body=lambda i: {**generation("template", seed_offset=2_000_000)(i), "difficulty": "hard"}),
+        Scenario("POST /generate-questions/stream", "POST", lambda i: "/api/v1/generate-questions/stream",
+                 body=generation("openai", seed_offset=1_000_000), weight=0.25),
+        Scenario("POST /sessions (template)", "POST", lambda i: "/api/v1/sessions",
+                 body=generation("template", seed_offset=4_000_000), expected=(201,)),
+        Scenario("POST /sessions/{id}/answers", "POST", answer_path,
+                 body=lambda i: {"question_idx": i % QUESTIONS_PER_SESSION, "answer_idx": 0},
+                 setup=create_sessions),
+        Scenario("GET /cache/stats", "GET", lambda i: "/api/v1/cache/stats"),
+    ]
+
+
+async def run_scenario(
+    client: AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    warmup: int = 5
+) -> Dict[str, Any]:
+    """
+    Send `requests` requests for a scenario from `concurrency` concurrent workers.
+
+    A few warm-up requests run first and are not counted. A response with an
+    unexpected status counts as an error and its latency is not recorded.
+    """
+    headers = dict(scenario.headers)
+    if scenario.setup is not None:
+        await scenario.setup(client, requests + warmup)
+    if scenario.etag_from is not None:
+        headers["If-None-Match"] = (await client.get(scenario.etag_from)).headers["etag"]
+
+    async def send(i: int) -> int:
+        body = scenario.body(i) if scenario.body is not None else None
+        response = await client.request(scenario.method, scenario.path(i), json=body, headers=headers)
+        return response.status_code
+
+    # Warm-up indexes come after the measured ones so generated names never collide
+    for i in range(requests, requests + warmup):
+        await send(i)
+
+    latencies: List[float] = []
+    errors = 0
+    statuses: Dict[int, int] = {}
+    next_index = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in next_index:
+            started = time.perf_counter()
+            status = await send(i)
+            elapsed = time.perf_counter() - started
+            statuses[status] = statuses.get(status, 0) + 1
+            if status in scenario.expected:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    wall_seconds = time.perf_counter() - started
+    return {**summarize(latencies, errors, wall_seconds), "statuses": {str(k): v for k, v in sorted(statuses.items())}}
@@ -0,0 +1,103 @@
+from typing import Any, Callable, Dict, List
+from datetime import datetime
+import json
+import time
+from pydantic import TypeAdapter
+from app.db_seeder import WORDS, GRAMMAR
+from app.json_stream import ArrayItemParser
+from app.openai_service import build_prompt
+from app.prompt_lines import format_grammar_line, format_word_line
+from app.question_parser import parse_questions
+from app.responses import dumps
+from app.schemas import WordResponse
+from benchmarks.fake_openai import FakeOpenAI
+
+
+def measure(fn: Callable[[], Any], min_seconds: float = 0.2) -> Dict[str, Any]:
+    """
+    Time a callable, repeating it until at least `min_seconds` have passed.
+
+    The loop count doubles each round, so very fast functions are timed over
+    enough calls for the clock overhead to vanish.
+    """
+    fn()
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            break
+        loops *= 2
+    per_call = elapsed / loops
+    return {"loops": loops, "us_per_op": round(per_call * 1e6, 3), "ops_per_second": round(1 / per_call, 1)}
+
+
+def _vocabulary(words: int, grammar: int) -> tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+    # Shaped like a selected context: each row carries its stored prompt line
+    word_rows = [
+        {"vietnamese_word": f"{w['vietnamese_word']} {i}", "english_definition": w["english_definition"]}
+        for i, w in ((i, WORDS[i % len(WORDS)]) for i in range(words))
+    ]
+    grammar_rows = [dict(GRAMMAR[i % len(GRAMMAR)]) for i in range(grammar)]
+    for word in word_rows:
+        word["prompt_line"] = format_word_line(word)
+    for point in grammar_rows:
+        point["prompt_line"] = format_grammar_line(point)
+    return word_rows, grammar_rows
+
+
+def run_micro_benchmarks(min_seconds: float = 0.2) -> Dict[str, Dict[str, Any]]:
+    """Micro-benchmarks of prompt building and model response parsing."""
+    results: Dict[str, Dict[str, Any]] = {}
+
+    # Prompt building at the default context budget and at a small context
+    for words, grammar in ((300, 60), (30, 6)):
+        word_rows, grammar_rows = _vocabulary(words, grammar)
+        results[f"build_prompt ({words} words, {grammar} grammar)"] = measure(
+            lambda: build_prompt(word_rows, grammar_rows, 5, "medium"), min_seconds
+        )
+
+    fake = FakeOpenAI()
+    for count in (5, 20):
+        questions = fake.questions(count)
+        content = json.dumps({"questions": questions}, ensure_ascii=False)
+        results[f"parse_questions ({count} valid)"] = measure(lambda: parse_questions(content), min_seconds)
+
+    # The salvage paths: one invalid item, and a response cut off mid-item
+    questions = fake.questions(20)
+    questions[7] = {**questions[7], "correct_idx": 9}
+    with_invalid = json.dumps({"questions": questions}, ensure_ascii=False)
+    results["parse_questions (20, one invalid)"] = measure(lambda: parse_questions(with_invalid), min_seconds)
+    truncated = with_invalid[: len(with_invalid) * 3 // 4]
+    results["parse_questions (20, truncated)"] = measure(lambda: parse_questions(truncated), min_seconds)
+
+    # Incremental parsing of a streamed response in API-sized chunks
+    streamed = json.dumps(fake.questions(20), ensure_ascii=False)
+    chunks = [streamed[i:i + 48] for i in range(0, len(streamed), 48)]
+
+    def parse_stream() -> None:
+        parser = ArrayItemParser()
+        for chunk in chunks:
+            for _ in parser.feed(chunk):
+                pass
+
+    results["ArrayItemParser (20 items, 48-char chunks)"] = measure(parse_stream, min_seconds)
+
+    # A 1000-row /words page: response_model validation plus stdlib encoding, against orjson on the rows
+    created = datetime(2025, 1, 1, 12, 30, 15, 123456)
+    page = [
+        {"vietnamese_word": f"{w['vietnamese_word']} {i}", "english_definition": w["english_definition"],
+         "language": "vi", "id": i + 1, "created_at": created}
+        for i, w in ((i, WORDS[i % len(WORDS)]) for i in range(1000))
+    ]
+    adapter: TypeAdapter[List[WordResponse]] = TypeAdapter(List[WordResponse])
+
+    def validate_and_encode() -> bytes:
+        data = adapter.dump_python(adapter.validate_python(page), mode="json")
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+    results["serialize 1000 words (validate + json)"] = measure(validate_and_encode, min_seconds)
+    results["serialize 1000 words (orjson rows)"] = measure(lambda: dumps(page), min_seconds)
+    return results
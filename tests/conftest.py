@@ -1,13 +1,26 @@
 import pytest
+import tempfile
+from pathlib import Path
 from typing import AsyncGenerator, Generator
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from app.config import settings
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_session_maker
+from app.embeddings import embedding_index, wait_for_embeddings
 from app.models import Word, Grammar
+from app.question_cache import question_cache
+from app.quiz_sessions import answer_buffer, quiz_sessions
+from app.singleflight import inflight
+from app.vocab_cache import vocab_cache
+from app.openai_service import loaded_llm
 
-# Use in-memory SQLite for tests
-TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+# Model calls are mocked, so any key will do; the app itself imports without one
+settings.openai_api_key = settings.openai_api_key or "test"
+
+# Use a throwaway SQLite file for tests: an in-memory database is one connection shared by every
+# session, so a background embedding session's rollback could undo a request's uncommitted writes
+TEST_DATABASE_URL = f"sqlite+aiosqlite:///{Path(tempfile.mkdtemp()) / 'test.db'}"
 
 test_engine = create_async_engine(TEST_DATABASE_URL, echo=True)
 test_async_session = async_sessionmaker(
@@ -21,6 +34,11 @@ async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+def override_get_session_maker() -> async_sessionmaker[AsyncSession]:
+    """Override the get_session_maker dependency for tests."""
+    return test_async_session
+
+
 @pytest.fixture(scope="function")
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     """Create a fresh database for each test."""
@@ -30,14 +48,34 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async with test_async_session() as session:
         yield session
     
+    # Background embeddings of the test's writes must not outlive its tables
+    await wait_for_embeddings()
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest.fixture(autouse=True)
+async def clear_caches(tmp_path: Path) -> AsyncGenerator[None, None]:
+    """Start every test with empty caches, embeddings and quiz sessions, fresh coalescing counters and a closed circuit."""
+    if question_cache is not None:
+        await question_cache.clear()
+    if embedding_index is not None:
+        embedding_index.reset(tmp_path / "embeddings")
+    vocab_cache.clear()
+    quiz_sessions.clear()
+    answer_buffer.clear()
+    inflight.reset()
+    llm = loaded_llm()
+    if llm is not None:
+        llm.reset()
+    yield
+
+
 @pytest.fixture(scope="function")
 async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     """Create a test client with database dependency override."""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_maker] = override_get_session_maker
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -0,0 +1,40 @@
+import pytest
+from pathlib import Path
+from benchmarks import dataset
+from benchmarks.__main__ import run_benchmarks
+from benchmarks.compare import compare
+from benchmarks.load import percentile
+
+
+def test_percentile_nearest_rank() -> None:
+    """Test nearest-rank percentiles on a small sample."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.95) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_benchmark_suite_smoke(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that every scenario runs without errors on a tiny dataset and the results compare."""
+    monkeypatch.setattr(dataset, "DATA_DIR", tmp_path)
+    results = await run_benchmarks(
+        sizes=[200], requests=10, concurrency=2, llm_latency=0.0, micro_seconds=0.001, cold_start_runs=1
+    )
+
+    endpoints = results["datasets"]["200"]["endpoints"]
+    assert len(endpoints) >= 15
+    for name, result in endpoints.items():
+        assert result["errors"] == 0, (name, result["statuses"])
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+    assert results["fake_llm_calls"] > 0
+    assert "parse_questions (20 valid)" in results["micro"]
+    # Workers start without an API key and without loading the OpenAI SDK
+    assert results["cold_start"]["runs"] == 1
+    assert not results["cold_start"]["sdk_loaded"]
+
+    slower = {**results, "micro": {
+        name: {**value, "us_per_op": value["us_per_op"] * 2} for name, value in results["micro"].items()
+    }}
+    regressed = [row for row in compare(results, slower, threshold=0.1) if row[-1]]
+    assert len(regressed) == len(results["micro"])
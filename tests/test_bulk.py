@@ -0,0 +1,92 @@
+import json
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.bulk import import_rows
+from app.models import Word, Grammar
+from app.schemas import WordCreate
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_words_json(client: AsyncClient, db_session: AsyncSession) -> None:
+    """Test importing a JSON array of words."""
+    words = [{"vietnamese_word": f"từ {i}", "english_definition": f"word {i}"} for i in range(25)]
+    
+    response = await client.post("/api/v1/words/bulk", json=words)
+    
+    assert response.status_code == 200
+    assert response.json() == {"received": 25, "written": 25, "batches": 1}
+    assert await db_session.scalar(select(func.count()).select_from(Word)) == 25
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_grammar_ndjson(client: AsyncClient, db_session: AsyncSession) -> None:
+    """Test importing grammar points from an NDJSON body."""
+    body = "\n".join(
+        json.dumps({"grammar_point": f"mẫu {i}", "english_explanation": f"pattern {i}"}, ensure_ascii=False)
+        for i in range(3)
+    ) + "\n"
+    
+    response = await client.post(
+        "/api/v1/grammar/bulk",
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["received"] == 3
+    assert await db_session.scalar(select(func.count()).select_from(Grammar)) == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_skips_or_upserts_existing(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_word: Word
+) -> None:
+    """Test that existing keys are skipped by default and updated with upsert."""
+    payload = [{"vietnamese_word": "xin chào", "english_definition": "hi there"}]
+    
+    skipped = await client.post("/api/v1/words/bulk", json=payload)
+    assert skipped.json()["written"] == 0
+    
+    updated = await client.post("/api/v1/words/bulk", params={"upsert": True}, json=payload)
+    assert updated.json()["written"] == 1
+    
+    word = (await client.get(f"/api/v1/words/{sample_word.id}")).json()
+    assert word["english_definition"] == "hi there"
+    assert await db_session.scalar(select(func.count()).select_from(Word)) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_validation_error(client: AsyncClient) -> None:
+    """Test that an invalid item is reported with its position in the body."""
+    words = [
+        {"vietnamese_word": "một", "english_definition": "one"},
+        {"vietnamese_word": "", "english_definition": "nothing"},
+    ]
+    
+    response = await client.post("/api/v1/words/bulk", json=words)
+    
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", 1, "vietnamese_word"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_rejects_non_array(client: AsyncClient) -> None:
+    """Test that a JSON body that is not an array is rejected."""
+    response = await client.post("/api/v1/words/bulk", json={"vietnamese_word": "một"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_import_rows_commits_in_chunks(db_session: AsyncSession) -> None:
+    """Test that rows are written in chunks of the requested size."""
+    rows = [{"vietnamese_word": f"từ {i}", "english_definition": "x"} for i in range(10)]
+    
+    result = await import_rows(db_session, rows, WordCreate, Word, "vietnamese_word", chunk_size=4)
+    
+    assert result.batches == 3
+    assert result.received == 10
+    assert await db_session.scalar(select(func.count()).select_from(Word)) == 10
@@ -0,0 +1,98 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.context_selector import select_context, estimate_tokens
+from app.models import Word, Grammar
+from app.openai_service import build_prompt
+
+
+async def add_words(db_session: AsyncSession, count: int) -> None:
+    db_session.add_all([
+        Word(vietnamese_word=f"từ {i}", english_definition=f"definition {i}")
+        for i in range(count)
+    ])
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_small_vocabulary_is_used_whole(
+    db_session: AsyncSession,
+    sample_word: Word,
+    sample_grammar: Grammar
+) -> None:
+    """Test that a vocabulary within the budget is returned in full."""
+    context = await select_context(db_session, token_budget=1000)
+    assert context.word_ids == [sample_word.id]
+    assert context.grammar_ids == [sample_grammar.id]
+    assert context.words == [
+        {"vietnamese_word": "xin chào", "english_definition": "hello", "prompt_line": "- xin chào: hello"}
+    ]
+    assert context.estimated_tokens > 0
+
+
+@pytest.mark.asyncio
+async def test_large_vocabulary_is_sampled_within_budget(db_session: AsyncSession) -> None:
+    """Test that a large vocabulary is cut to the budget and spread across the table."""
+    await add_words(db_session, 2000)
+    
+    context = await select_context(db_session, token_budget=200, seed=1)
+    
+    line_tokens = sum(
+        estimate_tokens(f"- {w['vietnamese_word']}: {w['english_definition']}")
+        for w in context.words
+    )
+    assert 0 < line_tokens <= 200
+    assert context.estimated_tokens == line_tokens
+    assert len(set(context.word_ids)) == len(context.word_ids)
+    assert max(context.word_ids) - min(context.word_ids) > 1000
+
+
+@pytest.mark.asyncio
+async def test_seed_makes_selection_reproducible(db_session: AsyncSession) -> None:
+    """Test that the same seed selects the same rows and another seed differs."""
+    await add_words(db_session, 2000)
+    
+    first = await select_context(db_session, token_budget=500, seed=42)
+    second = await select_context(db_session, token_budget=500, seed=42)
+    other = await select_context(db_session, token_budget=500, seed=7)
+    
+    assert first.word_ids == second.word_ids
+    assert first.word_ids != other.word_ids
+
+
+@pytest.mark.asyncio
+async def test_empty_vocabulary(db_session: AsyncSession) -> None:
+    """Test that an empty database produces an empty context."""
+    context = await select_context(db_session)
+    assert context.is_empty
+
+
+@pytest.mark.asyncio
+async def test_prompt_lines_are_stored_on_write(client: AsyncClient, db_session: AsyncSession) -> None:
+    """Test that rows store their prompt lines when written and prompts are joined from them."""
+    await client.post("/api/v1/words", json={"vietnamese_word": "phở", "english_definition": "noodle soup"})
+    await client.post("/api/v1/words/bulk", json=[{"vietnamese_word": "cơm", "english_definition": "rice"}])
+    await client.post("/api/v1/words/bulk", params={"upsert": "true"}, json=[
+        {"vietnamese_word": "cơm", "english_definition": "cooked rice"},
+    ])
+    await client.post("/api/v1/grammar", json={
+        "grammar_point": "đã", "english_explanation": "Past tense marker", "example_sentence": "Tôi đã ăn."
+    })
+
+    lines = (await db_session.execute(select(Word.prompt_line).order_by(Word.id))).scalars().all()
+    assert lines == ["- phở: noodle soup", "- cơm: cooked rice"]
+    grammar_line = (await db_session.execute(select(Grammar.prompt_line))).scalar()
+    assert grammar_line == "- đã: Past tense marker (Example: Tôi đã ăn.)"
+
+    # Prompts over the same vocabulary differ only after the shared prefix
+    context = await select_context(db_session)
+    easy = build_prompt(context.words, context.grammar, 2, "easy")
+    hard = build_prompt(context.words, context.grammar, 7, "hard")
+    prefix = easy[:easy.index("Difficulty level: easy")]
+    assert hard.startswith(prefix)
+    assert "- cơm: cooked rice" in prefix and grammar_line in prefix
+
+    # The stored line is used as is, not rendered again
+    stored = [{**context.words[0], "prompt_line": "- stored line"}]
+    assert "- stored line" in build_prompt(stored, [])
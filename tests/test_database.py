@@ -0,0 +1,47 @@
+import pytest
+from pathlib import Path
+from sqlalchemy import text
+from app.config import Settings
+from app.database import create_engine_from_settings, normalize_database_url
+
+
+def test_postgres_urls_use_asyncpg() -> None:
+    """Test that plain Postgres URLs are pointed at the asyncpg driver."""
+    for raw in ("postgres://u:p@db/app", "postgresql://u:p@db/app"):
+        assert normalize_database_url(raw).drivername == "postgresql+asyncpg"
+    url = normalize_database_url("sqlite+aiosqlite:///./app.db")
+    assert url.drivername == "sqlite+aiosqlite"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_file_engine_applies_pragmas(tmp_path: Path) -> None:
+    """Test that file-backed SQLite connections use WAL, NORMAL sync and mmap."""
+    config = Settings(
+        openai_api_key="test",
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'test.db'}",
+        db_pool_size=3,
+        sqlite_mmap_size=1048576
+    )
+    engine = create_engine_from_settings(config)
+    try:
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1
+            assert (await conn.execute(text("PRAGMA mmap_size"))).scalar() == 1048576
+        assert engine.pool.size() == 3  # type: ignore[attr-defined]
+        assert engine.echo is False
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_memory_engine_skips_pool_options() -> None:
+    """Test that an in-memory database still gets an engine without pool sizing."""
+    config = Settings(openai_api_key="test", database_url="sqlite+aiosqlite:///:memory:", db_echo=True)
+    engine = create_engine_from_settings(config)
+    try:
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1
+        assert engine.echo is True
+    finally:
+        await engine.dispose()
@@ -0,0 +1,164 @@
+import pytest
+import numpy as np
+from pathlib import Path
+from unittest.mock import patch
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.embeddings import (
+    EmbeddingIndex, HashingEmbedder, Neighbours, VectorStore, embed_written_rows, embedding_index,
+    wait_for_embeddings
+)
+from app.models import Word
+from app.shared_store import MemoryStore, hold_lock
+from app.generators import TemplateGenerator
+
+
+@pytest.mark.asyncio
+async def test_similar_words(client: AsyncClient, db_session: AsyncSession) -> None:
+    """Test that similar words rank related meanings first, stay in one language and follow upserts."""
+    await client.post("/api/v1/words/bulk", json=[
+        {"vietnamese_word": "ba", "english_definition": "three (number 3)"},
+        {"vietnamese_word": "cơm", "english_definition": "rice (cooked)"},
+        {"vietnamese_word": "bốn", "english_definition": "four (number 4)"},
+        {"vietnamese_word": "phở", "english_definition": "noodle soup"},
+        {"vietnamese_word": "san", "english_definition": "three (number 3)", "language": "ja"},
+    ])
+    await client.post("/api/v1/words", json={"vietnamese_word": "tám", "english_definition": "eight (number 8)"})
+    # Rows are embedded after the response, and reads never embed
+    await wait_for_embeddings()
+
+    response = await client.get("/api/v1/words/1/similar", params={"limit": 3})
+    assert response.status_code == 200
+    similar = response.json()
+    assert {w["vietnamese_word"] for w in similar[:2]} == {"bốn", "tám"}
+    assert all(w["language"] == "vi" and w["id"] != 1 for w in similar)
+    assert similar[0]["similarity"] >= similar[1]["similarity"] >= similar[2]["similarity"]
+
+    # An upsert re-embeds the changed row
+    await client.post("/api/v1/words/bulk", params={"upsert": "true"}, json=[
+        {"vietnamese_word": "phở", "english_definition": "nine (number 9)"},
+    ])
+    await wait_for_embeddings()
+    updated = await client.get("/api/v1/words/1/similar", params={"limit": 3})
+    assert "phở" in [w["vietnamese_word"] for w in updated.json()]
+
+    assert (await client.get("/api/v1/words/99/similar")).status_code == 404
+
+    # Reads never embed: a row written by another process waits for the next write or backfill
+    assert embedding_index is not None
+    stored = embedding_index.stored("words", "vi")
+    word = Word(vietnamese_word="năm", english_definition="five (number 5)")
+    db_session.add(word)
+    await db_session.commit()
+    assert (await client.get(f"/api/v1/words/{word.id}/similar")).json() == []
+    assert embedding_index.stored("words", "vi") == stored
+
+
+def test_vector_store_persists(tmp_path: Path) -> None:
+    """Test that a store reopens with its vectors and is discarded when the embedder changes."""
+    embedder = HashingEmbedder(16)
+    vectors = embedder.embed_sync(["one", "two", "three", "one two"])
+    store = VectorStore(tmp_path / "words-vi", 16, embedder.signature)
+    store.append(np.array([2, 5, 9], dtype=np.int64), vectors[:3])
+    with pytest.raises(ValueError):
+        store.append(np.array([4], dtype=np.int64), vectors[3:])
+
+    reopened = VectorStore(tmp_path / "words-vi", 16, embedder.signature)
+    assert reopened.count == 3 and reopened.max_id == 9
+    assert reopened.positions([5, 6]).tolist() == [1, -1]
+    ids, scores = reopened.top_k(vectors[0], 2, exclude=[2])
+    assert sorted(ids.tolist()) == [5, 9] and scores[0] >= scores[1]
+    assert not reopened.vectors([6]).any()
+
+    assert VectorStore(tmp_path / "words-vi", 16, "another-embedder").count == 0
+
+
+def test_vector_store_inserts_late_rows(tmp_path: Path) -> None:
+    """Test that rows stored out of id order are still found, also after reopening."""
+    embedder = HashingEmbedder(16)
+    vectors = embedder.embed_sync(["one", "two", "three", "four"])
+    store = VectorStore(tmp_path / "words-vi", 16, embedder.signature)
+    store.append(np.array([2, 9], dtype=np.int64), vectors[:2])
+    store.insert(np.array([5], dtype=np.int64), vectors[2:3])
+    with pytest.raises(ValueError):
+        store.insert(np.array([9], dtype=np.int64), vectors[3:])
+    store.append(np.array([12], dtype=np.int64), vectors[3:])
+
+    reopened = VectorStore(tmp_path / "words-vi", 16, embedder.signature)
+    assert reopened.max_id == 12
+    assert reopened.positions([2, 5, 6, 9, 12]).tolist() == [0, 2, -1, 1, 3]
+    assert np.allclose(reopened.vectors([5]), vectors[2:3])
+    ids, _ = reopened.top_k(vectors[2], 1)
+    assert ids.tolist() == [5]
+
+
+@pytest.mark.asyncio
+async def test_rows_committed_out_of_order_are_embedded(db_session: AsyncSession) -> None:
+    """Test that a row committed after a newer one was embedded gets its vector on the next write."""
+    assert embedding_index is not None
+    db_session.add_all([
+        Word(id=1, vietnamese_word="ba", english_definition="three"),
+        Word(id=3, vietnamese_word="bốn", english_definition="four"),
+    ])
+    await db_session.commit()
+    await embedding_index.catch_up(db_session, "words", "vi")
+
+    # Id 2 was taken by a transaction that commits only now
+    db_session.add(Word(id=2, vietnamese_word="hai", english_definition="two"))
+    await db_session.commit()
+    assert await embedding_index.catch_up(db_session, "words", "vi") == 0
+
+    with patch("app.embeddings._commits_out_of_order", return_value=True):
+        embed_written_rows(db_session, "words", ["vi"])
+        await wait_for_embeddings()
+    store = embedding_index.store("words", "vi")
+    assert (store.positions([1, 2, 3]) >= 0).all()
+    assert await embedding_index.fill_gaps(db_session, "words", "vi") == 0
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_stores_write_one_at_a_time(tmp_path: Path, db_session: AsyncSession) -> None:
+    """Test that workers on one embedding directory append after each other's rows and read them back."""
+    store = MemoryStore("test:")
+    first, second = (EmbeddingIndex(tmp_path, HashingEmbedder(16), store) for _ in range(2))
+    db_session.add_all([
+        Word(vietnamese_word="ba", english_definition="three (number 3)"),
+        Word(vietnamese_word="cơm", english_definition="rice (cooked)"),
+    ])
+    await db_session.commit()
+    assert await first.catch_up(db_session, "words", "vi") == 2
+    assert second.store("words", "vi").count == 2
+
+    db_session.add(Word(vietnamese_word="bốn", english_definition="four (number 4)"))
+    await db_session.commit()
+    # The first worker's store is stale; its write must not land on the second worker's row
+    assert await second.catch_up(db_session, "words", "vi") == 1
+    assert await first.catch_up(db_session, "words", "vi") == 0
+    assert {row_id for row_id, _ in await first.similar("words", "vi", 1, 2)} == {2, 3}
+
+    # A worker finding another one embedding skips instead of waiting when asked to
+    db_session.add(Word(vietnamese_word="phở", english_definition="noodle soup"))
+    await db_session.commit()
+    async with hold_lock(store, "embeddings:words:vi", ttl_seconds=5):
+        assert await first.catch_up(db_session, "words", "vi", wait=False) == 0
+    assert await first.catch_up(db_session, "words", "vi") == 1
+    assert VectorStore(tmp_path / "words-vi", 16, "hashing-v1-16").ids.tolist() == [1, 2, 3, 4]
+
+
+def test_hard_template_questions_use_neighbours() -> None:
+    """Test that hard template questions take their wrong answers from the most similar words."""
+    words = [{"vietnamese_word": f"w{i}", "english_definition": f"meaning {i}"} for i in range(10)]
+    # Every word's closest neighbours are the next four words
+    neighbours = Neighbours(words=[[(i + k) % 10 for k in range(1, 5)] for i in range(10)])
+
+    questions = TemplateGenerator().build(words, [], 6, difficulty="hard", seed=3, neighbours=neighbours)
+    for question in questions:
+        correct = question.answers[question.correct_idx]
+        index = next(i for i, w in enumerate(words) if correct in w.values())
+        key = "english_definition" if correct.startswith("meaning") else "vietnamese_word"
+        expected = {words[(index + k) % 10][key] for k in range(1, 5)}
+        assert set(question.answers) - {correct} == expected
+
+    # Other difficulties keep drawing at random
+    easy = TemplateGenerator().build(words, [], 6, difficulty="easy", seed=3, neighbours=neighbours)
+    assert easy == TemplateGenerator().build(words, [], 6, difficulty="easy", seed=3)
@@ -0,0 +1,69 @@
+import pytest
+from typing import Any, List
+from unittest.mock import AsyncMock, patch
+from app.openai_service import generate_questions, _plan_shards
+from app.schemas import Question
+
+
+WORDS = [{"vietnamese_word": f"từ {i}", "english_definition": f"word {i}"} for i in range(9)]
+
+
+def make_questions(prefix: str, count: int) -> List[Question]:
+    return [
+        Question(question_type=1, question=f"{prefix} {i}", answers=["a", "b"], correct_idx=0)
+        for i in range(count)
+    ]
+
+
+def test_plan_shards_balances_questions_and_vocabulary() -> None:
+    """Test that shards split questions evenly and get disjoint vocabulary slices."""
+    shards = _plan_shards(WORDS, [], num_questions=12, shard_size=5)
+    assert [count for _, _, count in shards] == [4, 4, 4]
+    assert sorted(w["vietnamese_word"] for words, _, _ in shards for w in words) == sorted(
+        w["vietnamese_word"] for w in WORDS
+    )
+
+
+@pytest.mark.asyncio
+@patch("app.openai_service._generate_batch", new_callable=AsyncMock)
+async def test_fanout_merges_and_deduplicates(mock_batch: AsyncMock) -> None:
+    """Test that shard results are merged and duplicate questions dropped."""
+    async def batch(words: Any, grammar: Any, num_questions: int, *args: Any) -> List[Question]:
+        return make_questions("Shared", 1) + make_questions(words[0]["vietnamese_word"], num_questions - 1)
+    mock_batch.side_effect = batch
+    
+    questions = await generate_questions(WORDS, [], num_questions=12)
+    
+    assert mock_batch.await_count == 3
+    texts = [q.question for q in questions]
+    assert texts.count("Shared 0") == 1
+    assert len(texts) == len(set(texts)) == 10
+
+
+@pytest.mark.asyncio
+@patch("app.openai_service._generate_batch", new_callable=AsyncMock)
+async def test_fanout_retries_failed_shard(mock_batch: AsyncMock) -> None:
+    """Test that a failing shard is retried without failing the request."""
+    failures = {"từ 1": 1}
+    async def batch(words: Any, grammar: Any, num_questions: int, *args: Any) -> List[Question]:
+        first = words[0]["vietnamese_word"]
+        if failures.get(first):
+            failures[first] -= 1
+            raise RuntimeError("upstream error")
+        return make_questions(first, num_questions)
+    mock_batch.side_effect = batch
+    
+    questions = await generate_questions(WORDS, [], num_questions=12)
+    
+    assert len(questions) == 12
+    assert mock_batch.await_count == 4
+
+
+@pytest.mark.asyncio
+@patch("app.openai_service._generate_batch", new_callable=AsyncMock)
+async def test_fanout_raises_when_every_shard_fails(mock_batch: AsyncMock) -> None:
+    """Test that the request fails only when no shard succeeds."""
+    mock_batch.side_effect = RuntimeError("upstream error")
+    
+    with pytest.raises(RuntimeError):
+        await generate_questions(WORDS, [], num_questions=12)
@@ -0,0 +1,126 @@
+import time
+import pytest
+from httpx import AsyncClient
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.generators import (
+    GRAMMAR_MEANING, TRANSLATE_TO_ENGLISH, TRANSLATE_TO_VIETNAMESE,
+    GeneratorUnavailable, TemplateGenerator, get_generator
+)
+from app.models import Word, Grammar
+from app.openai_service import get_llm
+
+WORDS = [
+    {"vietnamese_word": "xin chào", "english_definition": "hello"},
+    {"vietnamese_word": "cảm ơn", "english_definition": "thank you"},
+    {"vietnamese_word": "nước", "english_definition": "water"},
+    {"vietnamese_word": "nhà", "english_definition": "house"},
+    {"vietnamese_word": "ăn", "english_definition": "to eat"},
+]
+GRAMMAR = [
+    {"grammar_point": "đã", "english_explanation": "Past tense marker", "example_sentence": None},
+    {"grammar_point": "sẽ", "english_explanation": "Future tense marker", "example_sentence": None},
+]
+
+
+def test_template_questions_are_correct() -> None:
+    """Test that every template question marks the right answer among distinct choices."""
+    questions = TemplateGenerator().build(WORDS, GRAMMAR, 12, seed=1)
+    assert len(questions) == 12
+    assert len({q.question for q in questions}) == 12
+    meanings = {w["vietnamese_word"]: w["english_definition"] for w in WORDS}
+    for q in questions:
+        assert len(set(q.answers)) == len(q.answers)
+        correct = q.answers[q.correct_idx]
+        if q.question_type != GRAMMAR_MEANING:
+            assert len(q.answers) == 4
+        if q.question_type == TRANSLATE_TO_ENGLISH:
+            assert correct == meanings[q.question.split("'")[1]]
+        elif q.question_type == TRANSLATE_TO_VIETNAMESE:
+            assert meanings[correct] == q.question.split("'")[1]
+        else:
+            # Only two grammar points, so one distractor is all there is
+            assert q.question_type == GRAMMAR_MEANING
+            assert len(q.answers) == 2
+            assert correct in {"Past tense marker", "Future tense marker"}
+
+
+def test_template_is_deterministic_and_scales_with_difficulty() -> None:
+    """Test seeding, answer counts per difficulty and the small-vocabulary limit."""
+    generator = TemplateGenerator()
+    assert generator.build(WORDS, GRAMMAR, 5, seed=7) == generator.build(WORDS, GRAMMAR, 5, seed=7)
+    assert all(len(q.answers) == 3 for q in generator.build(WORDS, [], 5, "easy", seed=1))
+    assert all(len(q.answers) == 5 for q in generator.build(WORDS, [], 5, "hard", seed=1))
+    # One word has no other definitions to use as distractors
+    assert generator.build(WORDS[:1], [], 5) == []
+
+
+def test_template_generator_is_fast() -> None:
+    """Test that the offline generator builds thousands of questions per second."""
+    words = [{"vietnamese_word": f"từ {i}", "english_definition": f"word {i}"} for i in range(2000)]
+    started = time.perf_counter()
+    questions = TemplateGenerator().build(words, [], 2000, seed=1)
+    assert len(questions) == 2000
+    assert time.perf_counter() - started < 2.0
+
+
+def test_unconfigured_generator_raises() -> None:
+    """Test that the local generator needs a base URL."""
+    with pytest.raises(GeneratorUnavailable):
+        get_generator("local")
+    assert get_generator("template").name == "template"
+    assert get_generator().name == "openai"
+
+
+def test_openai_generator_needs_an_api_key() -> None:
+    """Test that without an API key the OpenAI generator is reported as not configured."""
+    with patch("app.generators.settings.openai_api_key", None), patch.dict("app.generators._generators", clear=True):
+        with pytest.raises(GeneratorUnavailable, match="not configured"):
+            get_generator("openai")
+
+
+@pytest.mark.asyncio
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
+async def test_generate_with_template_generator(
+    mock_openai: AsyncMock,
+    client: AsyncClient,
+    db_session: AsyncSession
+) -> None:
+    """Test that a request can pick the offline generator, skipping the model."""
+    db_session.add_all([Word(**w) for w in WORDS])
+    await db_session.commit()
+    
+    response = await client.post(
+        "/api/v1/generate-questions",
+        json={"num_questions": 3, "generator": "template", "seed": 1}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["questions"]) == 3
+    mock_openai.assert_not_awaited()
+    
+    local = await client.post("/api/v1/generate-questions", json={"generator": "local"})
+    assert local.status_code == 400
+    assert "not configured" in local.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_template_fallback_when_circuit_open(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_grammar: Grammar
+) -> None:
+    """Test that an open circuit falls back to template questions when configured."""
+    db_session.add_all([Word(**w) for w in WORDS])
+    await db_session.commit()
+    breaker = get_llm().breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    
+    with patch("app.routes.settings.question_generator_fallback", "template"):
+        response = await client.post("/api/v1/generate-questions", json={"num_questions": 2})
+        assert response.status_code == 200
+        assert len(response.json()["questions"]) == 2
+        
+        stream = await client.post("/api/v1/generate-questions/stream", json={"num_questions": 2})
+        assert stream.status_code == 200
+        assert len(stream.text.splitlines()) == 2
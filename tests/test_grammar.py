@@ -1,3 +1,4 @@
+import json
 import pytest
 from httpx import AsyncClient
 from app.models import Grammar
@@ -59,4 +60,40 @@ async def test_get_grammar(client: AsyncClient, sample_grammar: Grammar) -> None
 async def test_get_grammar_not_found(client: AsyncClient) -> None:
     """Test getting a non-existent grammar point."""
     response = await client.get("/api/v1/grammar/9999")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_list_grammar_pagination(client: AsyncClient, sample_grammar: Grammar) -> None:
+    """Test that a full grammar page returns a next cursor."""
+    response = await client.get("/api/v1/grammar", params={"limit": 1})
+    assert response.status_code == 200
+    assert response.headers["X-Next-Cursor"] == str(sample_grammar.id)
+    
+    response = await client.get("/api/v1/grammar", params={"after": sample_grammar.id})
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_list_grammar_stream(client: AsyncClient, sample_grammar: Grammar) -> None:
+    """Test streaming grammar points as NDJSON."""
+    response = await client.get("/api/v1/grammar", params={"stream": True})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [g["grammar_point"] for g in lines] == ["phải không"]
+
+
+@pytest.mark.asyncio
+async def test_get_grammar_etag(client: AsyncClient, sample_grammar: Grammar) -> None:
+    """Test conditional requests for a single grammar point."""
+    first = await client.get(f"/api/v1/grammar/{sample_grammar.id}")
+    etag = first.headers["ETag"]
+    
+    cached = await client.get(
+        f"/api/v1/grammar/{sample_grammar.id}",
+        headers={"If-None-Match": f'W/{etag}, "stale"'}
+    )
+    assert cached.status_code == 304
+    
+    delta = await client.get("/api/v1/grammar/delta", params={"limit": 1})
+    assert delta.json()["has_more"] is True
+    assert delta.json()["cursor"] == sample_grammar.id
@@ -0,0 +1,130 @@
+import pytest
+from pathlib import Path
+from typing import Any, List
+from httpx import AsyncClient
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.generators import TemplateGenerator
+from app.migrations import LATEST_VERSION, MIGRATIONS, migrate, schema_version
+from app.openai_service import build_messages, build_prompt
+
+# The words, grammar and review tables as they were before languages were added
+LEGACY_SCHEMA = [
+    "CREATE TABLE words (id INTEGER PRIMARY KEY, vietnamese_word VARCHAR(100) NOT NULL, "
+    "english_definition TEXT NOT NULL, created_at DATETIME NOT NULL)",
+    "CREATE UNIQUE INDEX ix_words_vietnamese_word ON words (vietnamese_word)",
+    "CREATE TABLE grammar (id INTEGER PRIMARY KEY, grammar_point VARCHAR(200) NOT NULL, "
+    "english_explanation TEXT NOT NULL, example_sentence TEXT, created_at DATETIME NOT NULL)",
+    "CREATE UNIQUE INDEX ix_grammar_grammar_point ON grammar (grammar_point)",
+    "CREATE TABLE word_reviews (user_id VARCHAR(64) NOT NULL, word_id INTEGER NOT NULL REFERENCES words (id), "
+    "ease_factor FLOAT NOT NULL, interval_days FLOAT NOT NULL, repetitions INTEGER NOT NULL, "
+    "lapses INTEGER NOT NULL, due_at DATETIME NOT NULL, last_reviewed_at DATETIME, PRIMARY KEY (user_id, word_id))",
+    "CREATE INDEX ix_word_reviews_user_due ON word_reviews (user_id, due_at)",
+    "INSERT INTO words VALUES (1, 'xin chào', 'hello', '2025-01-01 00:00:00')",
+    "INSERT INTO grammar VALUES (1, 'đã', 'Past tense marker', NULL, '2025-01-01 00:00:00')",
+    "INSERT INTO word_reviews VALUES ('a', 1, 2.5, 1.0, 1, 0, '2025-01-02 00:00:00', '2025-01-01 00:00:00')",
+]
+
+
+@pytest.mark.asyncio
+async def test_migrates_legacy_database(tmp_path: Path) -> None:
+    """Test that a pre-language database is upgraded in place, its rows becoming Vietnamese."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+    try:
+        async with engine.begin() as conn:
+            for statement in LEGACY_SCHEMA:
+                await conn.exec_driver_sql(statement)
+            assert await conn.run_sync(schema_version) == 0
+            assert await conn.run_sync(migrate) == LATEST_VERSION
+
+        async with engine.begin() as conn:
+            assert await conn.run_sync(schema_version) == LATEST_VERSION
+            assert (await conn.execute(text("SELECT language FROM words"))).scalar() == "vi"
+            assert (await conn.execute(text("SELECT language FROM word_reviews"))).scalar() == "vi"
+            # Existing rows got their prompt lines
+            assert (await conn.execute(text("SELECT prompt_line FROM words"))).scalar() == "- xin chào: hello"
+            assert (await conn.execute(text("SELECT prompt_line FROM grammar"))).scalar() == "- đã: Past tense marker"
+            # The term is now unique per language only, and the search index was rebuilt
+            await conn.execute(text(
+                "INSERT INTO words (language, vietnamese_word, english_definition, created_at) "
+                "VALUES ('ja', 'xin chào', 'hello', '2025-01-01 00:00:00')"
+            ))
+            matches = await conn.execute(text("SELECT rowid FROM words_fts_vi WHERE words_fts_vi MATCH 'chao'"))
+            assert [row[0] for row in matches] == [1]
+            # Running again is a no-op
+            assert await conn.run_sync(migrate) == LATEST_VERSION
+            versions = await conn.execute(text("SELECT count(*) FROM schema_version"))
+            assert versions.scalar() == len(MIGRATIONS)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_current_schema_is_not_touched(tmp_path: Path) -> None:
+    """Test that starting on a database already at the latest version issues no DDL."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'current.db'}")
+    statements: List[str] = []
+
+    def record(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(migrate)
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        async with engine.begin() as conn:
+            assert await conn.run_sync(migrate) == LATEST_VERSION
+        assert statements
+        assert not [s for s in statements if s.lstrip().upper().startswith(("CREATE", "ALTER", "DROP", "INSERT"))]
+
+        # A table missing from a current schema is still created
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("DROP TABLE quiz_answers")
+            await conn.run_sync(migrate)
+        assert any(s.lstrip().startswith("CREATE TABLE quiz_answers") for s in statements)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_vocabulary_is_partitioned_by_language(client: AsyncClient, db_session: AsyncSession) -> None:
+    """Test that lists, search and ETags only see their own language."""
+    await client.post("/api/v1/words/bulk", json=[
+        {"vietnamese_word": "chào", "english_definition": "hello"},
+        {"vietnamese_word": "chào", "english_definition": "hello (ja)", "language": "ja"},
+    ])
+    # The same term may exist once per language
+    duplicate = await client.post("/api/v1/words/bulk", json=[{"vietnamese_word": "chào", "english_definition": "x"}])
+    assert duplicate.json()["written"] == 0
+
+    vietnamese = await client.get("/api/v1/words")
+    assert [(w["vietnamese_word"], w["language"]) for w in vietnamese.json()] == [("chào", "vi")]
+    japanese = await client.get("/api/v1/words", params={"language": "ja"})
+    assert [w["english_definition"] for w in japanese.json()] == ["hello (ja)"]
+
+    search = await client.get("/api/v1/search", params={"q": "hello", "language": "ja"})
+    assert [r["meaning"] for r in search.json()["results"]] == ["hello (ja)"]
+    assert (await client.get("/api/v1/search", params={"q": "hello", "language": "ko"})).json()["results"] == []
+
+    # A write in one language leaves the other language's list ETag valid
+    etag = vietnamese.headers["etag"]
+    await client.post("/api/v1/words", json={"vietnamese_word": "ありがとう", "english_definition": "thanks",
+                                             "language": "ja"})
+    cached = await client.get("/api/v1/words", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    assert (await client.get("/api/v1/words", params={"language": "not a code"})).status_code == 422
+
+
+def test_prompts_name_the_language() -> None:
+    """Test that prompts, the system message and template questions name the target language."""
+    words = [{"vietnamese_word": "ありがとう", "english_definition": "thanks"},
+             {"vietnamese_word": "はい", "english_definition": "yes"}]
+    prompt = build_prompt(words, [], 2, language="ja")
+    assert prompt.startswith("You are a Japanese language teacher")
+    assert "xin chào" not in prompt
+    assert "Vietnamese" in build_messages(build_prompt(words, []))[0]["content"]  # type: ignore[operator]
+    assert "Japanese" in build_messages(prompt, "ja")[0]["content"]  # type: ignore[operator]
+
+    questions = TemplateGenerator().build(words, [], 4, seed=1, language="ja")
+    assert any(q.question.endswith("in Japanese?") for q in questions)
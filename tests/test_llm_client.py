@@ -0,0 +1,247 @@
+import asyncio
+import json
+import pytest
+import httpx
+from typing import AsyncIterator, Callable, Coroutine, List
+from httpx import AsyncClient
+from openai import AsyncOpenAI, BadRequestError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.llm_client import CircuitBreaker, ResilientChatClient, TokenBucket, UpstreamUnavailable
+from app.models import Word
+from app.openai_service import get_llm
+from app.question_pool import add_to_pool
+from app.schemas import Question
+
+Handler = Callable[[httpx.Request], Coroutine[None, None, httpx.Response]]
+
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{
+        "index": 0,
+        "finish_reason": "stop",
+        "message": {"role": "assistant", "content": "[]"},
+    }],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def fake_openai(handler: Handler) -> AsyncOpenAI:
+    """An SDK client whose requests are answered in-process by `handler`."""
+    return AsyncOpenAI(
+        api_key="test",
+        base_url="http://fake-openai/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+
+
+def resilient(handler: Handler, breaker: CircuitBreaker | None = None, **options: float) -> ResilientChatClient:
+    settings = dict(
+        timeout_seconds=2.0, max_retries=3, backoff_base_seconds=0.001, backoff_max_seconds=0.01,
+        max_concurrency=4, requests_per_minute=0, tokens_per_minute=0
+    )
+    settings.update(options)
+    return ResilientChatClient(
+        fake_openai(handler),
+        breaker=breaker or CircuitBreaker(failure_threshold=5, reset_seconds=30.0),
+        **settings  # type: ignore[arg-type]
+    )
+
+
+async def call(client: ResilientChatClient) -> object:
+    return await client.create(model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}])
+
+
+@pytest.mark.asyncio
+async def test_retries_server_errors() -> None:
+    """Test that 5xx responses are retried until one succeeds."""
+    statuses: List[int] = [500, 503]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if statuses:
+            return httpx.Response(statuses.pop(0), json={"error": {"message": "down"}})
+        return httpx.Response(200, json=COMPLETION)
+
+    client = resilient(handler)
+    response = await call(client)
+    assert response.choices[0].message.content == "[]"  # type: ignore[attr-defined]
+    assert client.stats()["calls"] == 3
+    assert client.stats()["retries"] == 2
+    assert client.breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_honours_retry_after() -> None:
+    """Test that a 429 waits at least the Retry-After interval before retrying."""
+    seen: List[float] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(asyncio.get_running_loop().time())
+        if len(seen) == 1:
+            return httpx.Response(429, headers={"retry-after": "0.05"}, json={"error": {"message": "slow down"}})
+        return httpx.Response(200, json=COMPLETION)
+
+    await call(resilient(handler))
+    assert seen[1] - seen[0] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried() -> None:
+    """Test that a 400 is raised at once and does not count against the circuit."""
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(400, json={"error": {"message": "bad request"}})
+
+    client = resilient(handler)
+    with pytest.raises(BadRequestError):
+        await call(client)
+    assert calls == 1
+    assert client.breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_covers_slow_upstream() -> None:
+    """Test that a hung upstream fails with UpstreamUnavailable within the deadline."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(5)
+        return httpx.Response(200, json=COMPLETION)
+
+    client = resilient(handler, timeout_seconds=0.1)
+    started = asyncio.get_running_loop().time()
+    with pytest.raises(UpstreamUnavailable):
+        await call(client)
+    assert asyncio.get_running_loop().time() - started < 1.0
+
+
+@pytest.mark.asyncio
+async def test_deadline_covers_a_stalled_stream() -> None:
+    """Test that a stream that stops sending chunks fails within the deadline and frees its slot."""
+    chunk = {**COMPLETION, "object": "chat.completion.chunk", "usage": None,
+             "choices": [{"index": 0, "delta": {"content": "["}, "finish_reason": None}]}
+
+    async def body() -> AsyncIterator[bytes]:
+        yield f"data: {json.dumps(chunk)}\n\n".encode()
+        await asyncio.sleep(5)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body())
+
+    client = resilient(handler, timeout_seconds=0.2, max_concurrency=1)
+    started = asyncio.get_running_loop().time()
+    received = []
+    with pytest.raises(UpstreamUnavailable):
+        async for item in client.stream(model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}]):
+            received.append(item.choices[0].delta.content)
+    assert received == ["["]
+    assert asyncio.get_running_loop().time() - started < 1.0
+    assert client.breaker.failures == 1
+    assert not client._semaphore.locked()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_recovers() -> None:
+    """Test that the circuit fails fast once open and closes after a successful trial."""
+    clock = FakeClock()
+    healthy = False
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if healthy:
+            return httpx.Response(200, json=COMPLETION)
+        return httpx.Response(502, json={"error": {"message": "bad gateway"}})
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10.0, clock=clock)
+    client = resilient(handler, breaker=breaker, max_retries=5)
+    with pytest.raises(UpstreamUnavailable):
+        await call(client)
+    assert calls == 2
+    assert breaker.state == "open"
+
+    # While open, calls never reach the upstream
+    with pytest.raises(UpstreamUnavailable) as raised:
+        await call(client)
+    assert calls == 2
+    assert raised.value.retry_after == 10.0
+
+    clock.now = 10.0
+    assert breaker.state == "half_open"
+    healthy = True
+    await call(client)
+    assert breaker.state == "closed"
+
+
+def test_token_bucket_spreads_bursts() -> None:
+    """Test that reservations beyond capacity are told how long to wait."""
+    clock = FakeClock()
+    bucket = TokenBucket(per_minute=60, clock=clock)
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    clock.now = 2.0
+    assert bucket.reserve(1) == 0.0
+    bucket.refund(-30)
+    assert bucket.reserve(1) == pytest.approx(31.0)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_beyond_deadline_fails_fast() -> None:
+    """Test that a call whose rate-limit wait exceeds the deadline is rejected without waiting."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=COMPLETION)
+
+    client = resilient(handler, requests_per_minute=1, timeout_seconds=1.0)
+    await call(client)
+    with pytest.raises(UpstreamUnavailable) as raised:
+        await call(client)
+    assert raised.value.retry_after == pytest.approx(60.0, abs=0.5)
+
+
+@pytest.mark.asyncio
+async def test_generate_returns_503_when_circuit_open(client: AsyncClient, sample_word: Word) -> None:
+    """Test that an open circuit with an empty pool is a 503 with Retry-After."""
+    breaker = get_llm().breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    response = await client.post("/api/v1/generate-questions", json={"num_questions": 2})
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_generate_falls_back_to_pool_when_circuit_open(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_word: Word
+) -> None:
+    """Test that an open circuit serves pooled questions of any difficulty."""
+    add_to_pool(db_session, [
+        Question(question_type=1, question="What does xin chào mean?", answers=["hello", "bye"], correct_idx=0)
+    ], "hard", [sample_word.id], [])
+    await db_session.commit()
+    breaker = get_llm().breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    response = await client.post("/api/v1/generate-questions", json={"num_questions": 2, "difficulty": "easy"})
+    assert response.status_code == 200
+    assert [q["question"] for q in response.json()["questions"]] == ["What does xin chào mean?"]
+
+    stream = await client.post("/api/v1/generate-questions/stream", json={"num_questions": 1})
+    assert stream.status_code == 503
+    assert json.loads(stream.text)["detail"].startswith("Question generation is temporarily unavailable")
@@ -0,0 +1,72 @@
+import pytest
+from httpx import AsyncClient
+from unittest.mock import AsyncMock, Mock, patch
+from app.metrics import (
+    DB_QUERY_SECONDS, GENERATION_STAGE_SECONDS, HTTP_REQUEST_SECONDS, LLM_TOKENS,
+    Counter, Histogram, Registry
+)
+from app.models import Word
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    """Test the text exposition of a labelled histogram and counter."""
+    registry = Registry()
+    histogram: Histogram = registry.register(Histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0)))
+    counter: Counter = registry.register(Counter("things_total", "Things", ("kind",)))
+    histogram.observe(0.05, ("db",))
+    histogram.observe(0.5, ("db",))
+    histogram.observe(5.0, ("db",))
+    counter.inc(3, ('a"b',))
+
+    lines = registry.render().splitlines()
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{stage="db",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="db",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="db",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{stage="db"} 5.55' in lines
+    assert 'latency_seconds_count{stage="db"} 3' in lines
+    assert 'things_total{kind="a\\"b"} 3' in lines
+    with pytest.raises(ValueError):
+        registry.register(Counter("things_total", "Duplicate"))
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes(client: AsyncClient, sample_word: Word) -> None:
+    """Test that requests are labelled by route template and exposed on /metrics."""
+    labels = ("GET", "/api/v1/words/{word_id}", "200")
+    before = HTTP_REQUEST_SECONDS.count(labels)
+    queries_before = DB_QUERY_SECONDS.count(("select",))
+    assert (await client.get(f"/api/v1/words/{sample_word.id}")).status_code == 200
+    assert HTTP_REQUEST_SECONDS.count(labels) == before + 1
+    assert DB_QUERY_SECONDS.count(("select",)) > queries_before
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/words/{word_id}",status="200"}' in response.text
+    assert 'llm_circuit_open 0' in response.text
+    assert 'cache_events{cache="vocabulary",event="miss"}' in response.text
+
+
+@pytest.mark.asyncio
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
+async def test_generation_records_stages_and_tokens(
+    mock_openai: AsyncMock,
+    client: AsyncClient,
+    sample_word: Word
+) -> None:
+    """Test that each generation stage is timed and token usage is counted."""
+    message = Mock(content='[{"question_type": 1, "question": "Q?", "answers": ["a", "b"], "correct_idx": 0}]')
+    mock_openai.return_value = Mock(
+        choices=[Mock(message=message)],
+        usage=Mock(prompt_tokens=120, completion_tokens=40, total_tokens=160)
+    )
+    stages = ("db_fetch", "prompt_build", "llm_call", "validation")
+    before = {name: GENERATION_STAGE_SECONDS.count((name,)) for name in stages}
+    prompt_tokens = LLM_TOKENS.value(("gpt-4o-mini", "prompt"))
+
+    response = await client.post("/api/v1/generate-questions", json={"num_questions": 1, "generator": "openai"})
+    assert response.status_code == 200
+    for name in stages:
+        assert GENERATION_STAGE_SECONDS.count((name,)) == before[name] + 1
+    assert LLM_TOKENS.value(("gpt-4o-mini", "prompt")) == prompt_tokens + 120
@@ -0,0 +1,140 @@
+import pytest
+from typing import Any, List
+from httpx import AsyncClient
+from unittest.mock import AsyncMock, patch, Mock
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.models import Word, Grammar
+from app.openai_service import generate_questions
+from app.question_cache import MemoryQuestionCache, DatabaseQuestionCache, make_cache_key
+from app.schemas import Question
+
+
+def make_question(text: str) -> Question:
+    return Question(question_type=1, question=text, answers=["a", "b"], correct_idx=0)
+
+
+def test_cache_key_depends_on_params() -> None:
+    """Test that the key changes with the prompt and model parameters."""
+    key = make_cache_key("prompt", model="gpt-4o-mini", temperature=0.7)
+    assert key == make_cache_key("prompt", temperature=0.7, model="gpt-4o-mini")
+    assert key != make_cache_key("prompt", model="gpt-4o-mini", temperature=0.2)
+    assert key != make_cache_key("other prompt", model="gpt-4o-mini", temperature=0.7)
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_lru_eviction() -> None:
+    """Test that the least recently used entry is evicted first."""
+    cache = MemoryQuestionCache(ttl_seconds=60, max_entries=2)
+    await cache.set("a", [make_question("A")])
+    await cache.set("b", [make_question("B")])
+    assert await cache.get("a") is not None
+    await cache.set("c", [make_question("C")])
+    
+    assert await cache.get("b") is None
+    assert await cache.get("a") is not None
+    assert await cache.get("c") is not None
+    stats = await cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_ttl() -> None:
+    """Test that expired entries are not returned."""
+    cache = MemoryQuestionCache(ttl_seconds=0, max_entries=2)
+    await cache.set("a", [make_question("A")])
+    assert await cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_database_cache_round_trip(db_session: AsyncSession) -> None:
+    """Test the database backend stores, evicts and counts savings."""
+    session_maker = async_sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    cache = DatabaseQuestionCache(ttl_seconds=60, max_entries=1, session_maker=session_maker)
+    await cache.set("a", [make_question("A")], generation_seconds=2.5, total_tokens=100)
+    
+    cached = await cache.get("a")
+    assert cached is not None
+    assert cached[0].question == "A"
+    
+    await cache.set("b", [make_question("B")])
+    assert await cache.get("a") is None
+    stats = await cache.stats()
+    assert stats["entries"] == 1
+    assert stats["saved_seconds"] == 2.5
+    assert stats["saved_tokens"] == 100
+
+
+@pytest.mark.asyncio
+async def test_database_cache_hits_only_read(db_session: AsyncSession) -> None:
+    """Test that hits write nothing, yet the next set still evicts the least recently used entry."""
+    session_maker = async_sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    cache = DatabaseQuestionCache(ttl_seconds=60, max_entries=2, session_maker=session_maker)
+    await cache.set("a", [make_question("A")])
+    await cache.set("b", [make_question("B")])
+
+    statements: List[str] = []
+
+    def record(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement.split()[0].upper())
+
+    engine = db_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert await cache.get("a") is not None
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements == ["SELECT"]
+
+    # "a" was used after "b", so "b" is the one evicted
+    await cache.set("c", [make_question("C")])
+    assert await cache.get("a") is not None
+    assert await cache.get("b") is None
+
+
+@pytest.mark.asyncio
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
+async def test_generate_questions_uses_cache(
+    mock_openai: AsyncMock,
+    client: AsyncClient,
+    sample_word: Word,
+    sample_grammar: Grammar
+) -> None:
+    """Test that an identical request is served from the cache."""
+    mock_message = Mock()
+    mock_message.content = '[{"question_type": 1, "question": "What does xin chào mean?", "answers": ["hello", "goodbye"], "correct_idx": 0}]'
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=mock_message)]
+    mock_response.usage = Mock(prompt_tokens=120, completion_tokens=40, total_tokens=160)
+    mock_openai.return_value = mock_response
+    
+    first = await client.post("/api/v1/generate-questions", json={"num_questions": 1})
+    second = await client.post("/api/v1/generate-questions", json={"num_questions": 1})
+    
+    assert first.json() == second.json()
+    assert mock_openai.await_count == 1
+    
+    stats = (await client.get("/api/v1/cache/stats")).json()["questions"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["saved_tokens"] == 160
+
+
+@pytest.mark.asyncio
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
+async def test_empty_answers_are_cached(mock_openai: AsyncMock) -> None:
+    """Test that a prompt the model answered with no usable questions is not sent again."""
+    mock_message = Mock()
+    mock_message.content = "[]"
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=mock_message)]
+    mock_response.usage = Mock(prompt_tokens=120, completion_tokens=2, total_tokens=122)
+    mock_openai.return_value = mock_response
+    words = [{"vietnamese_word": "xin chào", "english_definition": "hello"}]
+
+    assert await generate_questions(words, [], num_questions=1) == []
+    calls = mock_openai.await_count
+    assert await generate_questions(words, [], num_questions=1) == []
+    assert mock_openai.await_count == calls
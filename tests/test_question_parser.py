@@ -0,0 +1,69 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from app.openai_service import generate_questions
+from app.question_parser import parse_questions, question_response_format, validate_item
+
+WORDS = [{"vietnamese_word": "xin chào", "english_definition": "hello"}]
+
+
+def _question(text: str, correct_idx: int = 0) -> dict:
+    return {"question_type": 1, "question": text, "answers": ["hello", "goodbye"], "correct_idx": correct_idx}
+
+
+def _response(questions: list) -> Mock:
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=json.dumps({"questions": questions})))]
+    response.usage = Mock(total_tokens=100)
+    return response
+
+
+def test_parse_keeps_valid_items() -> None:
+    """Test that one invalid item is dropped without losing the rest of the batch."""
+    content = json.dumps([_question("a"), {"question": "missing fields"}, _question("c", 1)])
+    parsed = parse_questions(content)
+    assert [q.question for q in parsed.questions] == ["a", "c"]
+    assert parsed.rejected == 1
+
+
+def test_parse_rejects_out_of_range_correct_idx() -> None:
+    """Test that correct_idx must point at one of the answers."""
+    parsed = parse_questions(json.dumps({"questions": [_question("a", 2), _question("b", 1)]}))
+    assert [q.question for q in parsed.questions] == ["b"]
+    assert parsed.rejected == 1
+    assert validate_item(_question("a", 5)) is None
+
+
+def test_parse_salvages_truncated_json() -> None:
+    """Test that complete items survive a response cut off mid-item."""
+    content = json.dumps({"questions": [_question("a"), _question("b")]})[:-40]
+    parsed = parse_questions(content)
+    assert [q.question for q in parsed.questions] == ["a"]
+    assert parse_questions("not json at all").questions == []
+
+
+def test_structured_output_schema_is_strict() -> None:
+    """Test that the response format closes every object and requires every field."""
+    schema = question_response_format()["json_schema"]["schema"]
+    item = schema["properties"]["questions"]["items"]
+    assert schema["additionalProperties"] is False
+    assert item["additionalProperties"] is False
+    assert set(item["required"]) == {"question_type", "question", "answers", "correct_idx"}
+
+
+@pytest.mark.asyncio
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
+async def test_top_up_requests_only_missing_questions(mock_openai: AsyncMock) -> None:
+    """Test that a short answer triggers one follow-up asking just for the missing count."""
+    mock_openai.side_effect = [
+        _response([_question("a"), _question("b", 7), _question("c")]),
+        _response([_question("a"), _question("d")]),
+    ]
+    questions = await generate_questions(WORDS, [], num_questions=3, use_cache=False, structured_output=True)
+    assert [q.question for q in questions] == ["a", "c", "d"]
+    assert mock_openai.await_count == 2
+    first, second = mock_openai.await_args_list
+    assert first.kwargs["response_format"]["type"] == "json_schema"
+    follow_up = second.kwargs["messages"]
+    assert follow_up[-2]["role"] == "assistant"
+    assert "Create 1 more" in follow_up[-1]["content"]
@@ -0,0 +1,169 @@
+import pytest
+from pathlib import Path
+from typing import Any, List
+from httpx import AsyncClient
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.database import Base, get_session_maker
+from app.main import app
+from app.models import Word, Grammar, PooledQuestion
+from app.question_pool import add_to_pool, pool_counts, refill_pool
+from app.schemas import Question
+
+
+def make_question(text: str) -> Question:
+    return Question(question_type=1, question=text, answers=["a", "b"], correct_idx=1)
+
+
+@pytest.mark.asyncio
+@patch("app.generators.generate_questions", new_callable=AsyncMock)
+async def test_generate_questions_served_from_pool(
+    mock_generate: AsyncMock,
+    client: AsyncClient,
+    db_session: AsyncSession
+) -> None:
+    """Test that a full pool answers without calling the model and consumes rows."""
+    add_to_pool(db_session, [make_question("Q1"), make_question("Q2")], "easy", [1], [])
+    add_to_pool(db_session, [make_question("Q3")], "hard", [1], [])
+    await db_session.commit()
+    
+    response = await client.post(
+        "/api/v1/generate-questions",
+        json={"num_questions": 2, "difficulty": "easy"}
+    )
+    
+    assert response.status_code == 200
+    assert [q["question"] for q in response.json()["questions"]] == ["Q1", "Q2"]
+    mock_generate.assert_not_awaited()
+    assert await pool_counts(db_session) == {"easy": 0, "medium": 0, "hard": 1}
+
+
+@pytest.mark.asyncio
+@patch("app.generators.generate_questions", new_callable=AsyncMock)
+async def test_generate_questions_tops_up_from_model(
+    mock_generate: AsyncMock,
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_word: Word
+) -> None:
+    """Test that a short pool is topped up by live generation."""
+    add_to_pool(db_session, [make_question("Pooled")], "medium", [sample_word.id], [])
+    await db_session.commit()
+    mock_generate.return_value = [make_question("Live")]
+    
+    response = await client.post(
+        "/api/v1/generate-questions",
+        json={"num_questions": 2, "difficulty": "medium"}
+    )
+    
+    assert response.status_code == 200
+    assert [q["question"] for q in response.json()["questions"]] == ["Pooled", "Live"]
+    assert mock_generate.await_args is not None
+    assert mock_generate.await_args.kwargs["num_questions"] == 1
+
+
+@pytest.mark.asyncio
+@patch("app.generators.generate_questions", new_callable=AsyncMock)
+async def test_seeded_requests_skip_the_pool(
+    mock_generate: AsyncMock,
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_word: Word
+) -> None:
+    """Test that identical seeded requests return identical questions even with a non-empty pool."""
+    add_to_pool(db_session, [make_question("Pooled 1"), make_question("Pooled 2")], "easy", [sample_word.id], [])
+    await db_session.commit()
+    mock_generate.side_effect = lambda **kwargs: [
+        make_question(f"Seed {kwargs['seed']} #{i}") for i in range(kwargs["num_questions"])
+    ]
+    body = {"num_questions": 2, "difficulty": "easy", "seed": 7}
+
+    first = await client.post("/api/v1/generate-questions", json=body)
+    second = await client.post("/api/v1/generate-questions", json=body)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert [q["question"] for q in first.json()["questions"]] == ["Seed 7 #0", "Seed 7 #1"]
+    assert await pool_counts(db_session) == {"easy": 2, "medium": 0, "hard": 0}
+
+
+@pytest.mark.asyncio
+@patch("app.generators.generate_questions", new_callable=AsyncMock)
+async def test_pool_take_does_not_lock_writers_during_the_model_call(
+    mock_generate: AsyncMock,
+    client: AsyncClient,
+    tmp_path: Path
+) -> None:
+    """Test that other connections can write to SQLite while a partly pooled request waits for the model."""
+    # No busy timeout, so a held write lock fails the write at once
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", connect_args={"timeout": 0})
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with maker() as db:
+        db.add(Word(vietnamese_word="xin chào", english_definition="hello"))
+        add_to_pool(db, [make_question("Pooled")], "medium", [1], [])
+        await db.commit()
+
+    async def generate(**kwargs: Any) -> List[Question]:
+        async with maker() as other:
+            other.add(Word(vietnamese_word="cảm ơn", english_definition="thank you"))
+            await other.commit()
+        return [make_question("Live")]
+
+    mock_generate.side_effect = generate
+    app.dependency_overrides[get_session_maker] = lambda: maker
+    try:
+        response = await client.post("/api/v1/generate-questions", json={"num_questions": 2, "difficulty": "medium"})
+        assert response.status_code == 200
+        assert [q["question"] for q in response.json()["questions"]] == ["Pooled", "Live"]
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@patch("app.generators.generate_questions", new_callable=AsyncMock)
+async def test_failed_generation_returns_pooled_questions(
+    mock_generate: AsyncMock,
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_word: Word
+) -> None:
+    """Test that questions taken for a request whose generation fails go back to the pool."""
+    add_to_pool(db_session, [make_question("Pooled")], "medium", [sample_word.id], [])
+    await db_session.commit()
+    mock_generate.side_effect = RuntimeError("model API error")
+
+    with pytest.raises(RuntimeError):
+        await client.post("/api/v1/generate-questions", json={"num_questions": 2, "difficulty": "medium"})
+
+    assert await pool_counts(db_session) == {"easy": 0, "medium": 1, "hard": 0}
+    pooled = (await db_session.execute(select(PooledQuestion))).scalar_one()
+    assert (pooled.question, pooled.word_ids) == ("Pooled", [sample_word.id])
+
+
+@pytest.mark.asyncio
+@patch("app.question_pool.generate_questions", new_callable=AsyncMock)
+async def test_refill_pool(
+    mock_generate: AsyncMock,
+    db_session: AsyncSession,
+    sample_word: Word,
+    sample_grammar: Grammar
+) -> None:
+    """Test that every difficulty below the watermark is filled to the target."""
+    mock_generate.side_effect = lambda **kwargs: [
+        make_question(f"{kwargs['difficulty']} {i}") for i in range(kwargs["num_questions"])
+    ]
+    session_maker = async_sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    
+    with patch("app.question_pool.settings.question_pool_target_size", 25):
+        added = await refill_pool(session_maker)
+    
+    assert added == {"easy": 25, "medium": 25, "hard": 25}
+    assert all(call.kwargs["use_cache"] is False for call in mock_generate.await_args_list)
+    pooled = (await db_session.execute(select(PooledQuestion).limit(1))).scalar_one()
+    assert pooled.word_ids == [sample_word.id]
+    assert pooled.grammar_ids == [sample_grammar.id]
+    total = await db_session.scalar(select(func.count()).select_from(PooledQuestion))
+    assert total == 75
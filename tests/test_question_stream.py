@@ -0,0 +1,160 @@
+import asyncio
+import json
+import pytest
+from typing import Any, AsyncIterator, List
+from httpx import AsyncClient
+from unittest.mock import AsyncMock, patch, Mock
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.json_stream import ArrayItemParser
+from app.llm_client import UpstreamUnavailable
+from app.models import PooledQuestion, Word
+from app.question_pool import add_to_pool, pool_counts
+from app.routes import stream_questions_endpoint
+from app.schemas import Question, QuestionGenerationRequest
+
+
+QUESTIONS_JSON = json.dumps({
+    "questions": [
+        {"question_type": 1, "question": "What does \"chào\" mean? {}", "answers": ["hello", "bye"], "correct_idx": 0},
+        {"question_type": 1, "question": "Broken", "answers": ["only one"], "correct_idx": 0},
+        {"question_type": 2, "question": "Which word means name?", "answers": ["tên", "gì", "em"], "correct_idx": 0}
+    ]
+}, ensure_ascii=False)
+
+
+def test_parser_yields_items_across_chunk_boundaries() -> None:
+    """Test that items are emitted as soon as each object closes, whatever the chunking."""
+    parser = ArrayItemParser()
+    emitted: List[List[str]] = []
+    for i in range(0, len(QUESTIONS_JSON), 7):
+        emitted.append([item["question"] for item in parser.feed(QUESTIONS_JSON[i:i + 7])])
+    
+    flat = [q for batch in emitted for q in batch]
+    assert flat == ['What does "chào" mean? {}', "Broken", "Which word means name?"]
+    # The first item is available before the rest of the body has arrived
+    first_batch = next(i for i, batch in enumerate(emitted) if batch)
+    assert first_batch < len(emitted) - 1
+
+
+def test_parser_handles_bare_array() -> None:
+    """Test a top-level array of objects."""
+    parser = ArrayItemParser()
+    items = parser.feed('[{"a": [1, {"b": 2}]}, {"a": 3}]')
+    assert items == [{"a": [1, {"b": 2}]}, {"a": 3}]
+
+
+def make_stream(text: str, size: int = 11) -> AsyncIterator[Mock]:
+    async def chunks() -> AsyncIterator[Mock]:
+        for i in range(0, len(text), size):
+            yield Mock(choices=[Mock(delta=Mock(content=text[i:i + size]))], usage=None)
+        yield Mock(choices=[], usage=Mock(total_tokens=99))
+    return chunks()
+
+
+@pytest.mark.asyncio
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
+async def test_stream_questions_ndjson(
+    mock_openai: AsyncMock,
+    client: AsyncClient,
+    sample_word: Word
+) -> None:
+    """Test streaming valid questions as NDJSON and skipping invalid ones."""
+    mock_openai.return_value = make_stream(QUESTIONS_JSON)
+    
+    response = await client.post("/api/v1/generate-questions/stream", json={"num_questions": 3})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [q["question"] for q in lines] == ['What does "chào" mean? {}', "Which word means name?"]
+    assert mock_openai.await_args is not None
+    assert mock_openai.await_args.kwargs["stream"] is True
+
+
+@pytest.mark.asyncio
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
+async def test_stream_questions_sse(
+    mock_openai: AsyncMock,
+    client: AsyncClient,
+    sample_word: Word
+) -> None:
+    """Test streaming questions as server-sent events."""
+    mock_openai.return_value = make_stream(QUESTIONS_JSON)
+    
+    response = await client.post(
+        "/api/v1/generate-questions/stream",
+        json={"num_questions": 3},
+        headers={"Accept": "text/event-stream"}
+    )
+    
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block for block in response.text.split("\n\n") if block]
+    assert events[0].startswith("event: question\ndata: ")
+    assert events[-1] == 'event: done\ndata: {"count": 2}'
+
+
+@pytest.mark.asyncio
+async def test_stream_questions_no_data(client: AsyncClient) -> None:
+    """Test that streaming without vocabulary fails before the stream starts."""
+    response = await client.post("/api/v1/generate-questions/stream", json={"num_questions": 3})
+    assert response.status_code == 400
+
+
+def pooled_question(text: str) -> Question:
+    return Question(question_type=1, question=text, answers=["a", "b"], correct_idx=0)
+
+
+@pytest.mark.asyncio
+@patch("app.generators.stream_questions")
+async def test_stream_ends_with_error_when_generation_fails(
+    mock_stream: Mock,
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_word: Word
+) -> None:
+    """Test that a stream cut short by the model API ends with an error event, not a normal done event."""
+    add_to_pool(db_session, [pooled_question("Pooled")], "easy", [sample_word.id], [])
+    await db_session.commit()
+
+    async def failing(**kwargs: Any) -> AsyncIterator[Question]:
+        yield pooled_question("Live")
+        raise UpstreamUnavailable("Model API unavailable after 3 attempt(s)")
+
+    mock_stream.side_effect = failing
+    body = {"num_questions": 3, "difficulty": "easy"}
+
+    sse = await client.post("/api/v1/generate-questions/stream", json=body, headers={"Accept": "text/event-stream"})
+    events = [block for block in sse.text.split("\n\n") if block]
+    assert [event.split("\n")[0] for event in events] == ["event: question", "event: question", "event: error"]
+    assert json.loads(events[-1].split("data: ", 1)[1])["count"] == 2
+
+    ndjson = await client.post("/api/v1/generate-questions/stream", json=body)
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert lines[-1]["count"] == 1 and "unavailable" in lines[-1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_undelivered_pooled_questions_return_to_the_pool(db_session: AsyncSession, sample_word: Word) -> None:
+    """Test that pooled questions a client disconnected before receiving go back to the pool."""
+    add_to_pool(db_session, [pooled_question("First"), pooled_question("Second")], "easy", [sample_word.id], [])
+    await db_session.commit()
+
+    session_maker = async_sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    response = await stream_questions_endpoint(
+        QuestionGenerationRequest(num_questions=3, difficulty="easy"), None, db_session, session_maker
+    )
+    body: Any = response.body_iterator
+    assert "First" in str(await body.__anext__())
+    # The client goes away while the second question is being sent
+    assert "Second" in str(await body.__anext__())
+    await body.aclose()
+
+    # The undelivered question is put back by a task of its own
+    for _ in range(100):
+        if (await pool_counts(db_session))["easy"]:
+            break
+        await asyncio.sleep(0.01)
+    assert await pool_counts(db_session) == {"easy": 1, "medium": 0, "hard": 0}
+    returned = await db_session.scalar(select(PooledQuestion.question))
+    assert returned == "Second"
@@ -17,7 +17,7 @@ async def test_generate_questions_no_data(client: AsyncClient) -> None:
 
 
 @pytest.mark.asyncio
-@patch("app.openai_service.client.chat.completions.create", new_callable=AsyncMock)
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
 async def test_generate_questions(
     mock_openai: AsyncMock,
     client: AsyncClient,
@@ -36,6 +36,7 @@ async def test_generate_questions(
     
     mock_response = Mock()
     mock_response.choices = [mock_choice]
+    mock_response.usage = Mock(prompt_tokens=120, completion_tokens=40, total_tokens=160)
     
     # The AsyncMock itself is awaitable and returns the response
     mock_openai.return_value = mock_response
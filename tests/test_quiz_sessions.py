@@ -0,0 +1,104 @@
+import pytest
+from typing import Any, Dict
+from datetime import datetime, timedelta, UTC
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import QuizAnswer, QuizSession
+from app.quiz_sessions import AnswerBuffer, answer_buffer, quiz_sessions
+
+WORDS = [
+    {"vietnamese_word": "xin chào", "english_definition": "hello"},
+    {"vietnamese_word": "cảm ơn", "english_definition": "thank you"},
+    {"vietnamese_word": "tạm biệt", "english_definition": "goodbye"},
+    {"vietnamese_word": "nước", "english_definition": "water"},
+]
+
+
+async def start_session(client: AsyncClient) -> Dict[str, Any]:
+    await client.post("/api/v1/words/bulk", json=WORDS)
+    response = await client.post("/api/v1/sessions", json={"num_questions": 3, "generator": "template", "seed": 1})
+    assert response.status_code == 201
+    return response.json()  # type: ignore[no-any-return]
+
+
+@pytest.mark.asyncio
+async def test_answers_are_graded_and_written_in_batches(client: AsyncClient, db_session: AsyncSession) -> None:
+    """Test that answers are checked server-side, buffered, then written in one flush."""
+    session = await start_session(client)
+    assert len(session["questions"]) == 3
+    assert all("correct_idx" not in q for q in session["questions"])
+    url = f"/api/v1/sessions/{session['session_id']}/answers"
+
+    first = (await client.post(url, json={"question_idx": 0, "answer_idx": 0})).json()
+    assert first["correct"] == (first["correct_idx"] == 0)
+    await client.post(url, json={"question_idx": 1, "answer_idx": 0})
+    active = await quiz_sessions.get(db_session, session["session_id"])
+    assert active is not None
+    right = active.questions[2].correct_idx
+    third = (await client.post(url, json={"question_idx": 2, "answer_idx": right})).json()
+    assert third["correct"] and third["correct_idx"] == right and third["answered"] == 3
+    expected_score = third["score"]
+
+    assert (await client.post(url, json={"question_idx": 2, "answer_idx": 0})).status_code == 409
+    assert (await client.post(url, json={"question_idx": 3, "answer_idx": 0})).status_code == 400
+    assert (await client.post(url, json={"question_idx": 0, "answer_idx": 9})).status_code == 400
+
+    # Nothing reaches the database until the buffer is flushed, and then it is one batch
+    assert answer_buffer.pending == 3
+    assert (await db_session.execute(select(QuizAnswer))).first() is None
+    assert await answer_buffer.flush(db_session) == 3
+    stored = (await db_session.execute(select(QuizAnswer).order_by(QuizAnswer.question_idx))).scalars().all()
+    assert [(a.question_idx, a.answer_idx) for a in stored] == [(0, 0), (1, 0), (2, right)]
+
+    # A session evicted from memory is reloaded with its progress
+    quiz_sessions.clear()
+    progress = (await client.get(f"/api/v1/sessions/{session['session_id']}")).json()
+    assert (progress["answered"], progress["score"]) == (3, expected_score)
+    assert (await client.get("/api/v1/sessions/missing")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_reload_includes_buffered_answers_and_expiry(client: AsyncClient, db_session: AsyncSession) -> None:
+    """Test that a reloaded session counts answers still in the buffer, and expired sessions are gone."""
+    session = await start_session(client)
+    url = f"/api/v1/sessions/{session['session_id']}/answers"
+    await client.post(url, json={"question_idx": 1, "answer_idx": 0})
+
+    quiz_sessions.clear()
+    assert (await client.post(url, json={"question_idx": 1, "answer_idx": 1})).status_code == 409
+    assert (await client.get(f"/api/v1/sessions/{session['session_id']}")).json()["answered"] == 1
+
+    row = await db_session.get(QuizSession, session["session_id"])
+    assert row is not None
+    row.expires_at = datetime.now(UTC) - timedelta(seconds=1)
+    await db_session.commit()
+    quiz_sessions.clear()
+    assert (await client.post(url, json={"question_idx": 0, "answer_idx": 0})).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_rejected_answers_do_not_block_the_rest(client: AsyncClient, db_session: AsyncSession) -> None:
+    """Test that a row the database rejects is dropped alone and the rest of its batch is written."""
+    session = await start_session(client)
+    url = f"/api/v1/sessions/{session['session_id']}/answers"
+    await client.post(url, json={"question_idx": 0, "answer_idx": 0})
+    answer_buffer.add({
+        "session_id": session["session_id"], "question_idx": 1, "answer_idx": None,
+        "correct": False, "answered_at": datetime.now(UTC),
+    })
+    await client.post(url, json={"question_idx": 2, "answer_idx": 0})
+
+    assert await answer_buffer.flush(db_session) == 3
+    assert (answer_buffer.pending, answer_buffer.flushed, answer_buffer.dropped) == (0, 2, 1)
+    stored = (await db_session.execute(select(QuizAnswer.question_idx))).scalars().all()
+    assert sorted(stored) == [0, 2]
+
+
+def test_answer_buffer_drops_the_oldest_beyond_its_cap() -> None:
+    """Test that the buffer holds at most its cap while writes keep failing."""
+    buffer = AnswerBuffer(batch_size=10, max_pending=3)
+    for idx in range(5):
+        buffer.add({"session_id": "s", "question_idx": idx})
+    assert [row["question_idx"] for row in buffer.pending_for("s")] == [2, 3, 4]
+    assert buffer.dropped == 2
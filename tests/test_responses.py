@@ -0,0 +1,68 @@
+import json
+import pytest
+from typing import Any, List
+from httpx import AsyncClient
+from unittest.mock import AsyncMock, Mock, patch
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Word, Grammar
+from app.pagination import WORD_COLUMNS, GRAMMAR_COLUMNS
+from app.schemas import GrammarDelta, GrammarResponse, QuestionGenerationResponse, WordResponse
+
+
+def reference_json(schema: Any, content: Any) -> bytes:
+    """The bytes FastAPI's validate-then-encode path produces for `content`."""
+    adapter: TypeAdapter[Any] = TypeAdapter(schema)
+    data = adapter.dump_python(adapter.validate_python(content), mode="json")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def test_columns_follow_response_field_order() -> None:
+    """Test that listing projections match the response models, so rows encode as-is."""
+    assert [column.key for column in WORD_COLUMNS] == list(WordResponse.model_fields)
+    assert [column.key for column in GRAMMAR_COLUMNS] == list(GrammarResponse.model_fields)
+
+
+@pytest.mark.asyncio
+async def test_list_endpoints_match_validated_output(client: AsyncClient, db_session: AsyncSession) -> None:
+    """Test that the trusted-row path encodes byte-for-byte what response_model validation would."""
+    db_session.add_all([
+        Word(vietnamese_word="xin chào", english_definition="hello"),
+        Word(vietnamese_word="đường", english_definition='road "street"'),
+        Grammar(grammar_point="đã", english_explanation="Past tense marker", example_sentence="Tôi đã ăn."),
+        Grammar(grammar_point="sẽ", english_explanation="Future tense marker"),
+    ])
+    await db_session.commit()
+
+    words = await client.get("/api/v1/words", params={"limit": 1})
+    assert words.headers["content-type"] == "application/json"
+    assert "etag" in words.headers and words.headers["x-next-cursor"] == "1"
+    assert words.content == reference_json(List[WordResponse], words.json())
+
+    word = await client.get("/api/v1/words/2")
+    assert word.content == reference_json(WordResponse, word.json())
+    assert word.json()["vietnamese_word"] == "đường"
+
+    grammar = await client.get("/api/v1/grammar")
+    assert grammar.content == reference_json(List[GrammarResponse], grammar.json())
+    assert grammar.json()[1]["example_sentence"] is None
+
+    delta = await client.get("/api/v1/grammar/delta")
+    assert delta.content == reference_json(GrammarDelta, delta.json())
+    assert delta.json()["cursor"] == 2
+
+
+@pytest.mark.asyncio
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
+async def test_generated_questions_match_validated_output(
+    mock_openai: AsyncMock,
+    client: AsyncClient,
+    sample_word: Word
+) -> None:
+    """Test that generated questions are serialized exactly as response_model would."""
+    content = '[{"question_type": 1, "question": "“Xin chào” nghĩa là gì?", "answers": ["hello", "bye"], "correct_idx": 0}]'
+    mock_openai.return_value = Mock(choices=[Mock(message=Mock(content=content))], usage=None)
+
+    response = await client.post("/api/v1/generate-questions", json={"num_questions": 1, "generator": "openai"})
+    assert response.status_code == 200
+    assert response.content == reference_json(QuestionGenerationResponse, response.json())
@@ -0,0 +1,122 @@
+import pytest
+from datetime import datetime, timedelta, UTC
+from httpx import AsyncClient
+from unittest.mock import AsyncMock, Mock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.context_selector import select_due_context
+from app.models import Word, Grammar
+from app.scheduler import ReviewState, record_review, schedule
+
+
+def test_schedule_sm2_intervals() -> None:
+    """Test that passing grades grow the interval and a lapse resets it."""
+    state = schedule(ReviewState(), 4)
+    assert (state.interval_days, state.repetitions) == (1.0, 1)
+    state = schedule(state, 4)
+    assert (state.interval_days, state.repetitions) == (6.0, 2)
+    state = schedule(state, 5)
+    assert state.interval_days == pytest.approx(15.0)
+    assert state.ease_factor == pytest.approx(2.6)
+    
+    lapsed = schedule(state, 1)
+    assert (lapsed.interval_days, lapsed.repetitions, lapsed.lapses) == (1.0, 0, 1)
+    assert lapsed.ease_factor < state.ease_factor
+    
+    with pytest.raises(ValueError):
+        schedule(ReviewState(), 6)
+
+
+def test_schedule_ease_factor_floor() -> None:
+    """Test that repeated failures never push the ease factor below 1.3."""
+    state = ReviewState()
+    for _ in range(10):
+        state = schedule(state, 0)
+    assert state.ease_factor == pytest.approx(1.3)
+
+
+@pytest.mark.asyncio
+async def test_review_and_due_queue(client: AsyncClient, sample_word: Word, sample_grammar: Grammar) -> None:
+    """Test that reviewed items leave the due queue until their interval passes."""
+    response = await client.post(
+        f"/api/v1/review/words/{sample_word.id}",
+        json={"user_id": "learner-1", "grade": 4}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["item_id"] == sample_word.id
+    assert data["repetitions"] == 1
+    assert data["interval_days"] == 1.0
+    
+    # A failed recall is due again tomorrow as well
+    await client.post(
+        f"/api/v1/review/grammar/{sample_grammar.id}",
+        json={"user_id": "learner-1", "grade": 1}
+    )
+    
+    due = await client.get("/api/v1/review/due", params={"user_id": "learner-1"})
+    assert due.status_code == 200
+    assert due.json()["items"] == []
+    
+    missing = await client.post("/api/v1/review/words/9999", json={"user_id": "learner-1", "grade": 4})
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_due_queue_orders_by_due_time(db_session: AsyncSession) -> None:
+    """Test the due queue contents, order and per-user isolation."""
+    db_session.add_all([Word(vietnamese_word=f"từ {i}", english_definition=f"word {i}") for i in range(3)])
+    db_session.add(Grammar(grammar_point="đã", english_explanation="Past tense marker"))
+    await db_session.commit()
+    
+    past = datetime.now(UTC) - timedelta(days=10)
+    await record_review(db_session, "words", "a", 1, 4, now=past)
+    await record_review(db_session, "words", "a", 2, 4, now=past - timedelta(days=1))
+    await record_review(db_session, "words", "a", 3, 4, now=datetime.now(UTC))
+    await record_review(db_session, "grammar", "a", 1, 4, now=past + timedelta(hours=1))
+    await record_review(db_session, "words", "b", 3, 4, now=past)
+    await db_session.commit()
+    
+    context = await select_due_context(db_session, "a")
+    assert context.word_ids == [2, 1]
+    assert context.grammar_ids == [1]
+    
+    other = await select_due_context(db_session, "b")
+    assert other.word_ids == [3]
+    assert other.grammar_ids == []
+
+
+@pytest.mark.asyncio
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
+async def test_generate_due_only(
+    mock_openai: AsyncMock,
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_word: Word
+) -> None:
+    """Test that due-only generation prompts with the learner's due words only."""
+    db_session.add(Word(vietnamese_word="nước", english_definition="water"))
+    await db_session.commit()
+    
+    no_user = await client.post("/api/v1/generate-questions", json={"due_only": True})
+    assert no_user.status_code == 422
+    
+    nothing_due = await client.post("/api/v1/generate-questions", json={"due_only": True, "user_id": "a"})
+    assert nothing_due.status_code == 400
+    assert nothing_due.json()["detail"] == "No words or grammar are due for review."
+    
+    await record_review(db_session, "words", "a", sample_word.id, 4, now=datetime.now(UTC) - timedelta(days=2))
+    await db_session.commit()
+    
+    mock_message = Mock(content='[{"question_type": 1, "question": "What does xin chào mean?", "answers": ["hello", "water"], "correct_idx": 0}]')
+    mock_response = Mock(choices=[Mock(message=mock_message)])
+    mock_response.usage = Mock(prompt_tokens=120, completion_tokens=40, total_tokens=160)
+    mock_openai.return_value = mock_response
+    
+    response = await client.post(
+        "/api/v1/generate-questions",
+        json={"num_questions": 1, "due_only": True, "user_id": "a"}
+    )
+    assert response.status_code == 200
+    prompt = mock_openai.call_args.kwargs["messages"][-1]["content"]
+    assert "xin chào" in prompt
+    assert "nước" not in prompt
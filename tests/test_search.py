@@ -0,0 +1,91 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Word
+from app.search import build_match_query
+
+
+def test_build_match_query() -> None:
+    """Test that queries become quoted prefix terms with đ folded."""
+    assert build_match_query("Chào bạn") == '"Chào"* "bạn"*'
+    assert build_match_query("đi") == '"di"*'
+    assert build_match_query('NOT "x" OR') == '"NOT"* "x"* "OR"*'
+    assert build_match_query("  ?! ") is None
+
+
+@pytest.mark.asyncio
+async def test_search_ignores_diacritics(client: AsyncClient) -> None:
+    """Test that unaccented queries find accented words, including đ."""
+    await client.post("/api/v1/words/bulk", json=[
+        {"vietnamese_word": "chào", "english_definition": "hello"},
+        {"vietnamese_word": "đi", "english_definition": "to go"},
+        {"vietnamese_word": "cảm ơn", "english_definition": "thank you"},
+    ])
+    
+    response = await client.get("/api/v1/search", params={"q": "chao"})
+    assert response.status_code == 200
+    assert [r["text"] for r in response.json()["results"]] == ["chào"]
+    
+    response = await client.get("/api/v1/search", params={"q": "di"})
+    assert [r["text"] for r in response.json()["results"]] == ["đi"]
+    
+    # Prefix matching and English definitions
+    response = await client.get("/api/v1/search", params={"q": "than"})
+    result = response.json()["results"][0]
+    assert result["type"] == "word"
+    assert result["text"] == "cảm ơn"
+    assert result["meaning"] == "thank you"
+
+
+@pytest.mark.asyncio
+async def test_search_ranking_and_pagination(client: AsyncClient) -> None:
+    """Test that Vietnamese matches outrank English ones and pages chain."""
+    await client.post("/api/v1/words/bulk", json=[
+        {"vietnamese_word": "xin chào", "english_definition": "hello"},
+        {"vietnamese_word": "tạm biệt", "english_definition": "goodbye, not xin chào"},
+    ])
+    await client.post("/api/v1/grammar", json={
+        "grammar_point": "xin",
+        "english_explanation": "Polite request"
+    })
+    
+    first = await client.get("/api/v1/search", params={"q": "xin chao", "limit": 1})
+    data = first.json()
+    assert data["results"][0]["text"] == "xin chào"
+    assert data["next_offset"] == 1
+    
+    second = await client.get("/api/v1/search", params={"q": "xin chao", "limit": 5, "offset": 1})
+    assert [r["text"] for r in second.json()["results"]] == ["tạm biệt"]
+    assert second.json()["next_offset"] is None
+    
+    grammar = await client.get("/api/v1/search", params={"q": "xin", "type": "grammar"})
+    assert [(r["type"], r["text"]) for r in grammar.json()["results"]] == [("grammar", "xin")]
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_updates_and_deletes(client: AsyncClient, db_session: AsyncSession) -> None:
+    """Test that the triggers keep the index in sync with the words table."""
+    await client.post("/api/v1/words/bulk", json=[{"vietnamese_word": "nước", "english_definition": "water"}])
+    await client.post(
+        "/api/v1/words/bulk", params={"upsert": True},
+        json=[{"vietnamese_word": "nước", "english_definition": "country"}]
+    )
+    assert (await client.get("/api/v1/search", params={"q": "water"})).json()["results"] == []
+    assert len((await client.get("/api/v1/search", params={"q": "country"})).json()["results"]) == 1
+    
+    word = await db_session.get(Word, 1)
+    await db_session.delete(word)
+    await db_session.commit()
+    assert (await client.get("/api/v1/search", params={"q": "nuoc"})).json()["results"] == []
+
+
+@pytest.mark.asyncio
+async def test_best_match_ranks_first_among_many(client: AsyncClient) -> None:
+    """Test that the best match wins even when thousands of weaker matches were written before it."""
+    await client.post("/api/v1/words/bulk", json=[
+        {"vietnamese_word": f"từ {i}", "english_definition": f"a word about water, number {i}"} for i in range(2100)
+    ])
+    await client.post("/api/v1/words", json={"vietnamese_word": "water", "english_definition": "water"})
+
+    response = await client.get("/api/v1/search", params={"q": "water", "limit": 1})
+    assert [r["text"] for r in response.json()["results"]] == ["water"]
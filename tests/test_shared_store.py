@@ -0,0 +1,162 @@
+import asyncio
+import pytest
+import orjson
+from typing import List
+from app.languages import partition
+from app.llm_client import SharedTokenBucket
+from app.question_cache import SharedQuestionCache
+from app.schemas import Question
+from app.shared_store import MemoryStore, hold_lock
+from app.singleflight import SharedSingleFlight
+from app.vocab_cache import INVALIDATION_CHANNEL, run_invalidation_listener, vocab_cache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_locks_and_rate_limits_are_shared() -> None:
+    """Test that workers on one store exclude each other from a lock and draw from one rate limit."""
+    clock = FakeClock()
+    store = MemoryStore("test:", clock=clock)
+
+    async with hold_lock(store, "refill", ttl_seconds=10) as first:
+        async with hold_lock(store, "refill", ttl_seconds=10) as second:
+            assert first and not second
+        # The worker that did not get the lock cannot release it
+        assert await store.get("lock:refill") is not None
+    async with hold_lock(store, "refill", ttl_seconds=10) as again:
+        assert again
+
+    # A dead holder's lock expires
+    assert await store.set_if_absent("lock:stuck", b"gone", ttl_seconds=5)
+    clock.now = 6.0
+    async with hold_lock(store, "stuck", ttl_seconds=5) as taken_over:
+        assert taken_over
+
+    # Two workers' buckets for the same limit share one budget
+    worker_a = SharedTokenBucket(store, "openai:requests", per_minute=60)
+    worker_b = SharedTokenBucket(store, "openai:requests", per_minute=60)
+    assert await worker_a.reserve(60) == 0.0
+    assert await worker_b.reserve(1) == pytest.approx(1.0)
+    clock.now += 2.0
+    assert await worker_b.reserve(1) == 0.0
+    await worker_a.refund(-30)
+    assert await worker_b.reserve(1) == pytest.approx(31.0)
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_run_once_across_workers() -> None:
+    """Test that concurrent identical calls on different workers make one call and share its cached result."""
+    store = MemoryStore("test:")
+    cache = SharedQuestionCache(ttl_seconds=60, max_entries=100, store=store)
+    workers = [SharedSingleFlight(store, poll_interval_seconds=0.001) for _ in range(3)]
+    question = Question(question_type=1, question="What does 'phở' mean?", answers=["Noodle soup", "Rice"],
+                        correct_idx=0)
+    calls = 0
+
+    async def generate() -> List[Question]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        await cache.set("prompt", [question], generation_seconds=1.5, total_tokens=100)
+        return [question]
+
+    results = await asyncio.gather(
+        *(worker.do("prompt", generate, lambda: cache.get("prompt"), ttl_seconds=5) for worker in workers)
+    )
+    assert calls == 1
+    assert results == [[question]] * 3
+    assert sum(worker.executed for worker in workers) == 1
+    assert (await cache.stats())["saved_tokens"] == 200
+
+    # A failed call leaves nothing cached, so a waiting worker makes the call itself
+    async def fail() -> List[Question]:
+        await asyncio.sleep(0.02)
+        raise RuntimeError("model API error")
+
+    failed, recovered = await asyncio.gather(
+        workers[0].do("other", fail, lambda: cache.get("other"), ttl_seconds=5),
+        workers[1].do("other", generate, lambda: cache.get("other"), ttl_seconds=5),
+        return_exceptions=True
+    )
+    assert isinstance(failed, RuntimeError) and recovered == [question]
+
+    # A worker that takes the lock after another released it reads the stored result instead of calling again
+    await cache.set("finished", [question], generation_seconds=1.5, total_tokens=100)
+    calls = 0
+    assert await workers[2].do("finished", generate, lambda: cache.get("finished"), ttl_seconds=5) == [question]
+    assert calls == 0
+
+
+@pytest.mark.asyncio
+async def test_each_waiter_counts_once_and_reads_empty_results() -> None:
+    """Test that an empty cached result is shared rather than regenerated, and every waiter is counted once."""
+    store = MemoryStore("test:")
+    cache = SharedQuestionCache(ttl_seconds=60, max_entries=100, store=store)
+    workers = [SharedSingleFlight(store, poll_interval_seconds=0.001) for _ in range(3)]
+    calls = 0
+
+    async def generate_nothing() -> List[Question]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        await cache.set("empty", [])
+        return []
+
+    results = await asyncio.gather(
+        *(worker.do("empty", generate_nothing, lambda: cache.get("empty"), ttl_seconds=5) for worker in workers)
+    )
+    assert calls == 1
+    assert results == [[]] * 3
+    assert sum(worker.executed for worker in workers) == 1
+    assert sum(worker.waited for worker in workers) == 2
+
+    # A waiter that outlives a failed call and waits again on its retry is still one wait
+    async def fail() -> List[Question]:
+        await asyncio.sleep(0.02)
+        raise RuntimeError("model API error")
+
+    async def generate_later() -> List[Question]:
+        await asyncio.sleep(0.02)
+        await cache.set("retried", [])
+        return []
+
+    for worker in workers:
+        worker.reset()
+    outcomes = await asyncio.gather(
+        workers[0].do("retried", fail, lambda: cache.get("retried"), ttl_seconds=5),
+        workers[1].do("retried", generate_later, lambda: cache.get("retried"), ttl_seconds=5),
+        workers[2].do("retried", generate_later, lambda: cache.get("retried"), ttl_seconds=5),
+        return_exceptions=True
+    )
+    assert isinstance(outcomes[0], RuntimeError) and outcomes[1] == outcomes[2] == []
+    assert sum(worker.executed for worker in workers) == 2
+    assert sum(worker.waited for worker in workers) == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_on_other_workers_invalidate_the_vocabulary_cache() -> None:
+    """Test that an invalidation published by another worker drops this worker's cached rows."""
+    store = MemoryStore("test:")
+
+    async def load() -> List[str]:
+        return ["xin chào"]
+
+    namespace = partition("words", "vi")
+    await vocab_cache.get_or_load(namespace, ("page", 1), load)
+    generation = vocab_cache.generation(namespace)
+    listener = asyncio.create_task(run_invalidation_listener(store))
+    await asyncio.sleep(0)
+    try:
+        await store.publish(INVALIDATION_CHANNEL, orjson.dumps({"worker": "another", "names": [namespace]}))
+        await asyncio.sleep(0)
+        assert vocab_cache.stats()["entries"] == 0
+        assert vocab_cache.generation(namespace) == generation + 1
+    finally:
+        listener.cancel()
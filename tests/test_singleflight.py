@@ -0,0 +1,130 @@
+import asyncio
+from typing import List
+import pytest
+from httpx import AsyncClient
+from unittest.mock import AsyncMock, patch, Mock
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.models import Word
+from app.routes import create_session
+from app.schemas import Question, QuestionGenerationRequest
+from app.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution() -> None:
+    """Test that callers with the same key await one call."""
+    flight = SingleFlight()
+    calls = 0
+    
+    async def work() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+    
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+    
+    assert results == [42] * 5
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+    
+    # Once finished, the next call runs again
+    assert await flight.do("key", work) == 42
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller() -> None:
+    """Test that a failure is raised to the leader and all followers."""
+    flight = SingleFlight()
+    
+    async def fail() -> int:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    results = await asyncio.gather(
+        flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others() -> None:
+    """Test that cancelling the leader leaves the shared call running for followers."""
+    flight = SingleFlight()
+    
+    async def work() -> str:
+        await asyncio.sleep(0.02)
+        return "done"
+    
+    leader = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+    
+    assert await follower == "done"
+
+
+@pytest.mark.asyncio
+@patch("openai.resources.chat.completions.AsyncCompletions.create", new_callable=AsyncMock)
+async def test_identical_requests_are_coalesced(
+    mock_openai: AsyncMock,
+    client: AsyncClient,
+    sample_word: Word
+) -> None:
+    """Test that a burst of identical requests makes one model call."""
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=Mock(
+        content='[{"question_type": 1, "question": "What does xin chào mean?", "answers": ["hello", "bye"], "correct_idx": 0}]'
+    ))]
+    mock_response.usage = Mock(total_tokens=10)
+    
+    async def slow_create(**kwargs: object) -> Mock:
+        await asyncio.sleep(0.05)
+        return mock_response
+    mock_openai.side_effect = slow_create
+    
+    responses = await asyncio.gather(*(
+        client.post("/api/v1/generate-questions", json={"num_questions": 1, "seed": 3})
+        for _ in range(5)
+    ))
+    
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.text for r in responses}) == 1
+    assert mock_openai.await_count == 1
+    stats = (await client.get("/api/v1/cache/stats")).json()["in_flight"]
+    assert stats["coalesced"] >= 4
+
+
+@pytest.mark.asyncio
+@patch("app.generators.generate_questions", new_callable=AsyncMock)
+async def test_coalesced_request_survives_first_caller_leaving(
+    mock_generate: AsyncMock,
+    db_session: AsyncSession,
+    sample_word: Word
+) -> None:
+    """Test that the shared generation does not run in the first caller's session, so its disconnect is harmless."""
+    question = Question(question_type=1, question="What does xin chào mean?", answers=["hello", "bye"], correct_idx=0)
+
+    async def slow_generate(**kwargs: object) -> List[Question]:
+        await asyncio.sleep(0.05)
+        return [question]
+    mock_generate.side_effect = slow_generate
+    session_maker = async_sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    request = QuestionGenerationRequest(num_questions=1, generator="openai")
+
+    async def start_session() -> str:
+        # Each caller has its own request session, closed when the caller goes away
+        async with session_maker() as db:
+            response = await create_session(request, db, session_maker)
+            return response.session_id
+
+    leader = asyncio.create_task(start_session())
+    follower = asyncio.create_task(start_session())
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower
+    assert mock_generate.await_count == 1
@@ -0,0 +1,106 @@
+import pytest
+from typing import List
+from httpx import AsyncClient
+from app.models import Word
+from app.vocab_cache import VocabularyCache
+
+
+@pytest.mark.asyncio
+async def test_read_through_and_invalidation() -> None:
+    """Test that values are loaded once and reloaded after a generation bump."""
+    cache = VocabularyCache(max_entries=10, max_rows=100)
+    loads = 0
+    
+    async def load() -> List[int]:
+        nonlocal loads
+        loads += 1
+        return [loads]
+    
+    assert await cache.get_or_load("words", "all", load) == [1]
+    assert await cache.get_or_load("words", "all", load) == [1]
+    cache.invalidate("grammar")
+    assert await cache.get_or_load("words", "all", load) == [1]
+    cache.invalidate("words")
+    assert await cache.get_or_load("words", "all", load) == [2]
+    
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["generations"] == {"words": 1, "grammar": 1}
+
+
+@pytest.mark.asyncio
+async def test_memory_is_bounded_by_rows_and_entries() -> None:
+    """Test that least recently used entries are evicted past either bound."""
+    cache = VocabularyCache(max_entries=3, max_rows=5)
+    
+    async def rows(count: int) -> List[int]:
+        return list(range(count))
+    
+    await cache.get_or_load("words", "a", lambda: rows(2))
+    await cache.get_or_load("words", "b", lambda: rows(2))
+    await cache.get_or_load("words", "c", lambda: rows(2))
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["rows"] == 4
+    
+    await cache.get_or_load("words", "too big", lambda: rows(6))
+    assert cache.stats()["rows"] == 4
+
+
+@pytest.mark.asyncio
+async def test_entries_expire() -> None:
+    """Test that entries are reloaded after their TTL, without any invalidation."""
+    now = 0.0
+    cache = VocabularyCache(max_entries=10, max_rows=100, ttl_seconds=30, clock=lambda: now)
+    loads = 0
+
+    async def load() -> List[int]:
+        nonlocal loads
+        loads += 1
+        return [loads]
+
+    assert await cache.get_or_load("words", "all", load) == [1]
+    now = 29.0
+    assert await cache.get_or_load("words", "all", load) == [1]
+    now = 30.0
+    assert await cache.get_or_load("words", "all", load) == [2]
+    assert cache.stats()["rows"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_load_is_not_stored() -> None:
+    """Test that a value read across a write is not cached."""
+    cache = VocabularyCache(max_entries=10, max_rows=100)
+    
+    async def load_during_write() -> str:
+        cache.invalidate("words")
+        return "stale"
+    
+    await cache.get_or_load("words", "row", load_during_write)
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_word_reads_are_cached_until_a_write(client: AsyncClient, sample_word: Word) -> None:
+    """Test that repeated reads are served from the cache and creates invalidate it."""
+    for _ in range(3):
+        assert (await client.get(f"/api/v1/words/{sample_word.id}")).status_code == 200
+        assert len((await client.get("/api/v1/words")).json()) == 1
+    
+    stats = (await client.get("/api/v1/cache/stats")).json()["vocabulary"]
+    assert stats["misses"] == 2
+    assert stats["hits"] == 4
+    
+    await client.post("/api/v1/words", json={"vietnamese_word": "mới", "english_definition": "new"})
+    assert len((await client.get("/api/v1/words")).json()) == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_invalidates(client: AsyncClient) -> None:
+    """Test that the bulk path invalidates cached pages."""
+    assert (await client.get("/api/v1/grammar")).json() == []
+    await client.post(
+        "/api/v1/grammar/bulk",
+        json=[{"grammar_point": "mẫu", "english_explanation": "pattern"}]
+    )
+    assert len((await client.get("/api/v1/grammar")).json()) == 1
@@ -1,6 +1,9 @@
+import json
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Word
+from app.revisions import bump_vocabulary_revisions
 
 
 @pytest.mark.asyncio
@@ -67,4 +70,111 @@ async def test_create_word_validation_error(client: AsyncClient) -> None:
             "english_definition": "hello"
         }
     )
-    assert response.status_code == 422  # Validation error
\ No newline at end of file
+    assert response.status_code == 422  # Validation error
+
+@pytest.mark.asyncio
+async def test_list_words_pagination(client: AsyncClient) -> None:
+    """Test paging through words with limit and after."""
+    for i in range(3):
+        await client.post(
+            "/api/v1/words",
+            json={"vietnamese_word": f"từ {i}", "english_definition": f"word {i}"}
+        )
+    
+    first = await client.get("/api/v1/words", params={"limit": 2})
+    assert first.status_code == 200
+    assert [w["vietnamese_word"] for w in first.json()] == ["từ 0", "từ 1"]
+    cursor = first.headers["X-Next-Cursor"]
+    
+    second = await client.get("/api/v1/words", params={"limit": 2, "after": cursor})
+    assert [w["vietnamese_word"] for w in second.json()] == ["từ 2"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+@pytest.mark.asyncio
+async def test_list_words_stream(client: AsyncClient, sample_word: Word) -> None:
+    """Test streaming words as NDJSON."""
+    response = await client.get("/api/v1/words", params={"stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["vietnamese_word"] == "xin chào"
+    assert lines[0]["id"] == sample_word.id
+
+
+@pytest.mark.asyncio
+async def test_list_words_etag(client: AsyncClient) -> None:
+    """Test that an unchanged word list answers If-None-Match with 304."""
+    await client.post("/api/v1/words", json={"vietnamese_word": "nước", "english_definition": "water"})
+    
+    first = await client.get("/api/v1/words")
+    etag = first.headers["ETag"]
+    
+    cached = await client.get("/api/v1/words", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.content == b""
+    
+    # Other query parameters are a different representation
+    other = await client.get("/api/v1/words", params={"limit": 1}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    
+    # A write changes the revision, so the old ETag no longer matches
+    await client.post("/api/v1/words", json={"vietnamese_word": "trà", "english_definition": "tea"})
+    changed = await client.get("/api/v1/words", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 2
+
+
+@pytest.mark.asyncio
+async def test_writes_from_other_processes_refresh_cached_rows(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_word: Word
+) -> None:
+    """Test that a write this worker never saw changes the rows served, not just the ETag."""
+    assert (await client.get("/api/v1/words")).json()[0]["english_definition"] == "hello"
+    assert (await client.get(f"/api/v1/words/{sample_word.id}")).json()["english_definition"] == "hello"
+
+    # Another process updates the row and bumps the revisions, without touching this worker's cache
+    sample_word.english_definition = "hi"
+    await bump_vocabulary_revisions(db_session, "words", [sample_word.language])
+    await db_session.commit()
+
+    listed = await client.get("/api/v1/words")
+    assert listed.json()[0]["english_definition"] == "hi"
+    single = await client.get(f"/api/v1/words/{sample_word.id}")
+    assert single.json()["english_definition"] == "hi"
+    delta = await client.get("/api/v1/words/delta")
+    assert delta.json()["items"][0]["english_definition"] == "hi"
+
+
+@pytest.mark.asyncio
+async def test_words_delta(client: AsyncClient) -> None:
+    """Test syncing words created since a cursor."""
+    await client.post("/api/v1/words", json={"vietnamese_word": "nước", "english_definition": "water"})
+    
+    first = await client.get("/api/v1/words/delta")
+    assert first.status_code == 200
+    data = first.json()
+    assert [w["vietnamese_word"] for w in data["items"]] == ["nước"]
+    assert data["cursor"] == data["items"][0]["id"]
+    assert data["revision"] == 1
+    assert data["has_more"] is False
+    
+    # Nothing new since the cursor
+    empty = await client.get("/api/v1/words/delta", params={"since": data["cursor"]})
+    assert empty.json()["items"] == []
+    assert empty.json()["cursor"] == data["cursor"]
+    
+    await client.post("/api/v1/words/bulk", json=[{"vietnamese_word": "trà", "english_definition": "tea"}])
+    delta = await client.get(
+        "/api/v1/words/delta",
+        params={"since": data["cursor"]},
+        headers={"If-None-Match": empty.headers["ETag"]}
+    )
+    assert delta.status_code == 200
+    assert [w["vietnamese_word"] for w in delta.json()["items"]] == ["trà"]
+    assert delta.json()["revision"] == 2